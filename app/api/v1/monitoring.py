@@ -51,6 +51,80 @@ async def get_metrics():
         if "users" in metrics:
             prometheus_metrics.append(f'api_active_users {metrics["users"]["active"]}')
 
+        # PDF extraction metrics
+        from app.services.pdf_extraction_engine import extraction_engine
+        extraction = extraction_engine.stats()
+        prometheus_metrics.append(f'pdf_extraction_queue_depth {extraction["queue_depth"]}')
+        prometheus_metrics.append(f'pdf_extraction_running {extraction["running"]}')
+        prometheus_metrics.append(f'pdf_extraction_jobs_completed {extraction["completed"]}')
+        prometheus_metrics.append(f'pdf_extraction_jobs_failed {extraction["failed"]}')
+        prometheus_metrics.append(f'pdf_extraction_jobs_timed_out {extraction["timed_out"]}')
+        prometheus_metrics.append(f'pdf_extraction_jobs_rejected {extraction["rejected"]}')
+        prometheus_metrics.append(f'pdf_extraction_cpu_seconds_total {extraction["cpu_time_total"]}')
+        prometheus_metrics.append(f'pdf_extraction_cpu_seconds_last {extraction["cpu_time_last"]}')
+
+        # PDF store cache metrics
+        from app.services.pdf_store import pdf_store
+        store = pdf_store.stats()
+        prometheus_metrics.append(f'pdf_store_hits_total {store["hits"]}')
+        prometheus_metrics.append(f'pdf_store_misses_total {store["misses"]}')
+        prometheus_metrics.append(f'pdf_store_url_hits_total {store["url_hits"]}')
+        prometheus_metrics.append(f'pdf_store_evictions_total {store["evictions"]}')
+
+        # LLM response cache metrics
+        from app.services.llm_cache import llm_cache
+        llm = llm_cache.stats()
+        prometheus_metrics.append(f'llm_cache_hits_total {llm["hits"]}')
+        prometheus_metrics.append(f'llm_cache_misses_total {llm["misses"]}')
+        prometheus_metrics.append(f'llm_cache_hit_rate {llm["hit_rate"]}')
+        prometheus_metrics.append(f'llm_cache_evictions_total {llm["evictions"]}')
+        for operation, counts in llm["operations"].items():
+            prometheus_metrics.append(f'llm_cache_operation_hits_total{{operation="{operation}"}} {counts["hits"]}')
+            prometheus_metrics.append(f'llm_cache_operation_misses_total{{operation="{operation}"}} {counts["misses"]}')
+
+        # Knowledge entry summary batching metrics
+        from app.services.entry_summarizer import entry_summarizer
+        entries = entry_summarizer.stats()
+        prometheus_metrics.append(f'knowledge_summaries_queued {entries["queued"]}')
+        prometheus_metrics.append(f'knowledge_summary_batches_total {entries["batches"]}')
+        prometheus_metrics.append(f'knowledge_summaries_total {entries["summarized"]}')
+
+        # Paper question metrics
+        from app.services.passage_index import passage_index
+        passages = passage_index.stats()
+        prometheus_metrics.append(f'passage_index_builds_total {passages["builds"]}')
+        prometheus_metrics.append(f'passage_index_searches_total {passages["searches"]}')
+        prometheus_metrics.append(f'passage_indexes_cached {passages["cached"]}')
+
+        # Streaming summary metrics
+        from app.services.summary_stream import summary_streams
+        streams = summary_streams.stats()
+        prometheus_metrics.append(f'summary_streams_active {streams["active"]}')
+        prometheus_metrics.append(f'summary_streams_started_total {streams["started"]}')
+        prometheus_metrics.append(f'summary_stream_viewers_attached_total {streams["attached"]}')
+        prometheus_metrics.append(f'summary_streams_failed_total {streams["failed"]}')
+
+        # LLM provider failover metrics
+        from app.services.ai_service import ai_service
+        providers = ai_service.provider_stats()
+        prometheus_metrics.append(f'llm_hedged_requests_total {providers["hedged"]}')
+        prometheus_metrics.append(f'llm_hedges_won_total {providers["hedges_won"]}')
+        for name, breaker in providers["providers"].items():
+            prometheus_metrics.append(f'llm_circuit_open{{provider="{name}"}} {int(breaker["state"] != "closed")}')
+            prometheus_metrics.append(f'llm_circuit_opened_total{{provider="{name}"}} {breaker["times_opened"]}')
+
+        # AI token, cost and latency metrics
+        from app.services.ai_usage import ai_usage
+        usage = ai_usage.stats()
+        prometheus_metrics.append(f'ai_usage_records_buffered {usage["buffered"]}')
+        prometheus_metrics.append(f'ai_usage_records_dropped_total {usage["dropped"]}')
+        for model, totals in usage["models"].items():
+            prometheus_metrics.append(f'ai_calls_total{{model="{model}"}} {totals["calls"]}')
+            prometheus_metrics.append(f'ai_prompt_tokens_total{{model="{model}"}} {totals["prompt_tokens"]}')
+            prometheus_metrics.append(f'ai_completion_tokens_total{{model="{model}"}} {totals["completion_tokens"]}')
+            prometheus_metrics.append(f'ai_cost_usd_total{{model="{model}"}} {totals["cost"]}')
+            prometheus_metrics.append(f'ai_latency_seconds_sum{{model="{model}"}} {totals["latency"]}')
+
         return "\n".join(prometheus_metrics)
 
     except Exception as e:
@@ -61,6 +135,23 @@ async def get_metrics():
         )
 
 
+@router.get("/metrics/pdf")
+async def get_pdf_metrics():
+    """Get PDF extraction pool and PDF store statistics."""
+    from app.services.pdf_extraction_engine import extraction_engine
+    from app.services.pdf_store import pdf_store
+
+    return {"extraction": extraction_engine.stats(), "store": pdf_store.stats()}
+
+
+@router.get("/metrics/llm-cache")
+async def get_llm_cache_metrics():
+    """Get LLM response cache statistics."""
+    from app.services.llm_cache import llm_cache
+
+    return llm_cache.stats()
+
+
 @router.get("/metrics/realtime")
 async def get_realtime_metrics(
     current_user: UserInDB = Depends(require_subscription_tier("institution"))
@@ -102,6 +193,31 @@ async def get_historical_metrics(
         )
 
 
+@router.get("/metrics/ai-usage")
+async def get_ai_usage_metrics(
+    days: int = 7,
+    current_user: UserInDB = Depends(require_subscription_tier("institution"))
+):
+    """Get AI cost per subscription tier and latency per model (requires institution subscription)."""
+    try:
+        if days > 30:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Maximum 30 days of AI usage data allowed"
+            )
+
+        metrics = await metrics_collector.get_ai_usage_metrics(days)
+        return metrics
+    except HTTPException:
+        raise
+    except Exception as e:
+        api_logger.error(f"Failed to get AI usage metrics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve AI usage metrics"
+        )
+
+
 @router.get("/analytics/user")
 async def get_user_analytics(
     days: int = 30,
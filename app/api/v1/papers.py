@@ -1,14 +1,18 @@
 """
 Paper management API endpoints.
 """
-from typing import List, Optional
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.core.security import get_current_active_user
 from app.db.database import get_db
+from app.db.models import SummaryTier
 from app.db.queries.paper_queries import (
     get_paper_by_id, get_user_paper, update_user_paper,
     get_user_papers, get_user_paper_stats
@@ -16,11 +20,12 @@ from app.db.queries.paper_queries import (
 from app.schemas.paper import (
     PaperCreate, PaperDetailed, PaperPublic, PaperSearchRequest, PaperSearchResponse,
     UserPaperUpdate, PaperRecommendationsResponse, ProcessingTaskStatus,
-    BulkPaperCreate, BulkOperationResponse
+    BulkPaperCreate, BulkOperationResponse, PaperUploadResponse, PaperQuestionRequest, PaperAnswer
 )
 from app.schemas.user import UserInDB
 from app.services.paper_service import paper_service
-from app.services.pdf_processor import pdf_processor
+from app.services.summary_stream import summary_streams
+from app.services.pdf_processor import pdf_processor, PDFTooLargeError
 from app.services.celery_tasks import process_paper_task, batch_process_papers_task
 from app.core.app_logging import api_logger
 from app.core.config import settings
@@ -75,14 +80,14 @@ async def add_paper_from_url(
         )
 
 
-@router.post("/upload", response_model=PaperDetailed, status_code=status.HTTP_201_CREATED)
+@router.post("/upload", response_model=PaperUploadResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_paper(
     file: UploadFile = File(...),
     title: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: UserInDB = Depends(get_current_active_user)
 ):
-    """Upload a PDF paper for processing."""
+    """Upload a PDF paper and queue it for extraction and AI processing."""
 
     api_logger.info(f"Uploading paper for user {current_user.id}: {file.filename}")
 
@@ -93,45 +98,67 @@ async def upload_paper(
             detail="Only PDF files are supported"
         )
 
-    # Check file size
-    file_content = await file.read()
-    if len(file_content) > settings.upload_max_size:
+    # Copy in chunks, aborting as soon as the size limit is crossed
+    try:
+        spool = await pdf_processor.spool_upload(file)
+    except PDFTooLargeError:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail=f"File too large. Maximum size: {settings.upload_max_size} bytes"
         )
 
     try:
-        # Process uploaded PDF
-        pdf_data = await pdf_processor.process_uploaded_pdf(file_content)
-
-        # Create paper record
-        from app.db.queries.paper_queries import create_paper, create_user_paper
+        from app.db.queries.paper_queries import (
+            create_paper, create_user_paper, get_paper_by_pdf_sha256
+        )
         from app.db.models import PaperSource, ProcessingStatus
 
-        paper_data = {
-            "title": title or pdf_data["metadata"].get("title", file.filename),
-            "authors": pdf_data["metadata"].get("authors", []),
-            "abstract": pdf_data["metadata"].get("abstract", ""),
-            "full_text": pdf_data["text"],
-            "source": PaperSource.PDF_UPLOAD,
-            "processing_status": ProcessingStatus.PENDING
-        }
+        # The same PDF uploaded before is added to the library as is
+        paper = await get_paper_by_pdf_sha256(db, spool.sha256)
+        duplicate = paper is not None
+        task_id = None
 
-        paper = await create_paper(db, paper_data)
+        if duplicate:
+            spool.cleanup()
+            api_logger.info(f"Uploaded PDF matches existing paper: {paper.id}")
+        else:
+            content_hash = await pdf_processor.store_upload(spool)
+
+            paper_data = {
+                "title": title or file.filename,
+                "pdf_sha256": content_hash,
+                "source": PaperSource.PDF_UPLOAD,
+                "processing_status": ProcessingStatus.PENDING
+            }
+
+            try:
+                paper = await create_paper(db, paper_data)
+            except IntegrityError:
+                # A concurrent upload of the same file won the race
+                paper = await get_paper_by_pdf_sha256(db, content_hash)
+                if not paper:
+                    raise
+                duplicate = True
 
         # Add to user's library
-        await create_user_paper(db, str(current_user.id), str(paper.id))
+        if not await get_user_paper(db, str(current_user.id), str(paper.id)):
+            await create_user_paper(db, str(current_user.id), str(paper.id))
 
-        # Queue for AI processing
-        process_paper_task.delay(str(paper.id))
+        # Text extraction and AI processing run in the background
+        if not duplicate:
+            task_id = process_paper_task.delay(str(paper.id)).id
 
-        api_logger.info(f"Paper uploaded successfully: {paper.id}")
+        api_logger.info(f"Paper upload accepted: {paper.id}")
 
-        # Return detailed response
-        return PaperDetailed(**paper.__dict__)
+        return PaperUploadResponse(
+            paper_id=paper.id,
+            task_id=task_id,
+            processing_status=paper.processing_status,
+            duplicate=duplicate
+        )
 
     except Exception as e:
+        spool.cleanup()
         api_logger.error(f"Failed to upload paper: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -381,6 +408,7 @@ async def get_paper_summary(
             "limitations": paper.limitations,
             "contributions": paper.contributions or [],
             "processing_status": paper.processing_status.value,
+            "summary_tier": paper.summary_tier.value if paper.summary_tier else None,
             "processed_at": paper.processed_at
         }
 
@@ -394,6 +422,113 @@ async def get_paper_summary(
         )
 
 
+@router.get("/{paper_id}/summary/stream")
+async def stream_paper_summary(
+    paper_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """Stream the paper summary over Server-Sent Events, generating it if it is missing.
+
+    Sends "section" and "token" events while the summary is generated, then
+    "summary" with the complete summary and "done". Concurrent viewers of a
+    paper share one generation, across API workers as long as Redis is
+    reachable; without Redis each worker runs its own.
+    """
+
+    # Get paper
+    paper = await get_paper_by_id(db, str(paper_id))
+    if not paper:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Paper not found"
+        )
+
+    # Check user access
+    user_paper = await get_user_paper(db, str(current_user.id), str(paper_id))
+    if not user_paper:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this paper"
+        )
+
+    if paper.summary and paper.summary_tier != SummaryTier.PREVIEW:
+        events = _finished_summary_events(paper.summary)
+    elif paper.full_text or paper.abstract:
+        events = summary_streams.subscribe(
+            str(paper_id), lambda: paper_service.stream_summary(str(paper_id))
+        )
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Paper text is not available yet. Please check back later."
+        )
+
+    return StreamingResponse(
+        _server_sent_events(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _finished_summary_events(summary: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """Events for a summary that is already stored."""
+
+    yield {"event": "summary", "data": summary}
+    yield {"event": "done", "data": {}}
+
+
+async def _server_sent_events(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Format events as Server-Sent Events."""
+
+    async for event in events:
+        yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+@router.post("/{paper_id}/ask", response_model=PaperAnswer)
+async def ask_paper(
+    paper_id: UUID,
+    question_request: PaperQuestionRequest,
+    db: Session = Depends(get_db),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """Answer a question about a paper from its most relevant passages."""
+
+    try:
+        # Get paper
+        paper = await get_paper_by_id(db, str(paper_id))
+        if not paper:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Paper not found"
+            )
+
+        # Check user access
+        user_paper = await get_user_paper(db, str(current_user.id), str(paper_id))
+        if not user_paper:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied to this paper"
+            )
+
+        if not paper.full_text and not paper.abstract:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Paper text is not available yet. Please check back later."
+            )
+
+        return await paper_service.ask_paper(paper, question_request.question, question_request.top_k)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        api_logger.error(f"Failed to answer question for paper {paper_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to answer question"
+        )
+
+
 @router.get("/recommendations", response_model=PaperRecommendationsResponse)
 async def get_recommendations(
     limit: int = 10,
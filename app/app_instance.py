@@ -11,6 +11,7 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 from app.core.config import settings
 from app.core.app_logging import setup_logging, app_logger
+from app.core.request_limits import UploadSizeLimitMiddleware
 from app.db.database import init_db, DatabaseManager
 
 
@@ -43,6 +44,16 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     # Shutdown
     app_logger.info("Shutting down AI Research Assistant API...")
 
+    from app.services.pdf_extraction_engine import extraction_engine
+    extraction_engine.shutdown()
+
+    # Summarize knowledge entries still waiting out their debounce
+    from app.services.entry_summarizer import entry_summarizer
+    try:
+        await entry_summarizer.flush()
+    except Exception as e:
+        app_logger.error(f"Failed to flush knowledge entry summaries: {e}")
+
 
 def create_app() -> FastAPI:
     """Create and configure FastAPI application."""
@@ -88,6 +99,13 @@ def setup_middleware(app: FastAPI) -> None:
     # GZip Middleware
     app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+    # Upload size limit, checked before the multipart body is parsed
+    app.add_middleware(
+        UploadSizeLimitMiddleware,
+        max_size=settings.upload_max_size,
+        paths=["/api/v1/papers/upload"]
+    )
+
 
 def include_routers(app: FastAPI) -> None:
     """Include API routers."""
@@ -1,4 +1,4 @@
-  """
+"""
 Performance monitoring and analytics middleware.
 """
 import time
@@ -12,11 +12,13 @@ from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 import redis
+from sqlalchemy import case, func
 
 from app.core.config import settings
 from app.core.app_logging import api_logger, get_logger
 from app.db.database import SessionLocal
-from app.db.models import APIUsage, UserActivity
+from app.db.models import APIUsage, UserActivity, AIUsage
+from app.services.ai_usage import UsageTotals, usage_context
 
 
 # Analytics logger
@@ -70,9 +72,13 @@ class PerformanceMonitoringMiddleware(BaseHTTPMiddleware):
 
         request_info["user_id"] = user_id
 
+        # AI calls made while handling the request add their tokens and cost here
+        usage = UsageTotals()
+
         # Process request
         try:
-            response = await call_next(request)
+            with usage_context(request_id=request_id, user_id=user_id, totals=usage):
+                response = await call_next(request)
 
             # Calculate response time
             response_time = time.time() - start_time
@@ -81,7 +87,9 @@ class PerformanceMonitoringMiddleware(BaseHTTPMiddleware):
             response_info = {
                 "status_code": response.status_code,
                 "response_time": response_time,
-                "success": 200 <= response.status_code < 400
+                "success": 200 <= response.status_code < 400,
+                "tokens_used": usage.tokens,
+                "cost": usage.cost
             }
 
             # Log performance metrics
@@ -101,7 +109,9 @@ class PerformanceMonitoringMiddleware(BaseHTTPMiddleware):
                 "status_code": 500,
                 "response_time": response_time,
                 "success": False,
-                "error": str(e)
+                "error": str(e),
+                "tokens_used": usage.tokens,
+                "cost": usage.cost
             }
 
             await self._log_performance_metrics(request_info, response_info)
@@ -197,8 +207,8 @@ class PerformanceMonitoringMiddleware(BaseHTTPMiddleware):
                         status_code=response_info['status_code'],
                         response_time=response_info['response_time'],
                         ai_service=self._extract_ai_service(request_info),
-                        tokens_used=0,  # Would be populated by AI service calls
-                        cost=0.0,
+                        tokens_used=response_info['tokens_used'],
+                        cost=response_info['cost'],
                         created_at=datetime.utcnow()
                     )
 
@@ -422,6 +432,81 @@ class MetricsCollector:
             analytics_logger.error(f"Failed to get historical metrics: {e}")
             return {}
 
+    @staticmethod
+    async def get_ai_usage_metrics(days: int = 7) -> Dict[str, Any]:
+        """Get AI cost by subscription tier and latency by model and operation."""
+
+        try:
+            db = SessionLocal()
+
+            try:
+                # Calculate date range
+                end_date = datetime.utcnow()
+                start_date = end_date - timedelta(days=days)
+
+                tokens = AIUsage.prompt_tokens + AIUsage.completion_tokens
+
+                by_tier = db.query(
+                    AIUsage.subscription_tier,
+                    func.count(AIUsage.id),
+                    func.sum(tokens),
+                    func.sum(AIUsage.cost)
+                ).filter(
+                    AIUsage.created_at >= start_date
+                ).group_by(AIUsage.subscription_tier).all()
+
+                by_model = db.query(
+                    AIUsage.model,
+                    AIUsage.operation,
+                    func.count(AIUsage.id),
+                    func.sum(case((AIUsage.success.is_(False), 1), else_=0)),
+                    func.avg(AIUsage.latency),
+                    func.max(AIUsage.latency),
+                    func.sum(tokens),
+                    func.sum(AIUsage.cost)
+                ).filter(
+                    AIUsage.created_at >= start_date
+                ).group_by(AIUsage.model, AIUsage.operation).all()
+
+                return {
+                    "period": f"{days} days",
+                    "start_date": start_date.isoformat(),
+                    "end_date": end_date.isoformat(),
+                    "summary": {
+                        "total_calls": sum(row[1] for row in by_tier),
+                        "total_tokens": int(sum(row[2] or 0 for row in by_tier)),
+                        "total_cost": round(sum(row[3] or 0.0 for row in by_tier), 4)
+                    },
+                    "by_tier": {
+                        tier or "unattributed": {
+                            "calls": calls,
+                            "tokens": int(tier_tokens or 0),
+                            "cost": round(cost or 0.0, 4)
+                        }
+                        for tier, calls, tier_tokens, cost in by_tier
+                    },
+                    "by_model": [
+                        {
+                            "model": model,
+                            "operation": operation,
+                            "calls": calls,
+                            "errors": int(errors or 0),
+                            "average_latency": round(avg_latency or 0.0, 3),
+                            "max_latency": round(max_latency or 0.0, 3),
+                            "tokens": int(model_tokens or 0),
+                            "cost": round(cost or 0.0, 4)
+                        }
+                        for model, operation, calls, errors, avg_latency, max_latency, model_tokens, cost in by_model
+                    ]
+                }
+
+            finally:
+                db.close()
+
+        except Exception as e:
+            analytics_logger.error(f"Failed to get AI usage metrics: {e}")
+            return {}
+
     @staticmethod
     async def get_user_analytics(user_id: str, days: int = 30) -> Dict[str, Any]:
         """Get analytics for specific user."""
@@ -88,9 +88,137 @@ class Settings(BaseSettings):
     rate_limit_window: int = Field(default=60, description="Rate limit window in seconds")
 
     # AI Processing
-    ai_batch_size: int = Field(default=5, description="AI processing batch size")
+    ai_batch_size: int = Field(default=5, description="Papers kept in flight by AI batch processing")
     ai_timeout_seconds: int = Field(default=120, description="AI API timeout in seconds")
     max_paper_length: int = Field(default=50000, description="Maximum paper content length for AI processing")
+    pdf_max_text_length: int = Field(
+        default=400000,
+        description="Characters of text extracted from a PDF; content over ai_max_input_tokens is map-reduced per prompt"
+    )
+    ai_max_input_tokens: int = Field(
+        default=12000, description="Token budget for paper content in one request; longer papers are map-reduced"
+    )
+    ai_chunk_tokens: int = Field(default=3000, description="Token budget per chunk when map-reducing long papers")
+    ai_chunk_summary_tokens: int = Field(default=400, description="Maximum tokens per chunk summary")
+    ai_chunk_concurrency: int = Field(default=4, description="Chunk summaries run concurrently for one paper")
+    embedding_provider: str = Field(
+        default="openai",
+        description="Embedding backend: openai or local; vectors from different backends are not comparable"
+    )
+    local_embedding_model: str = Field(
+        default="sentence-transformers/all-MiniLM-L6-v2", description="Sentence-transformers model for local embeddings"
+    )
+    local_embedding_batch_size: int = Field(default=64, description="Texts per CPU batch for local embeddings")
+    local_embedding_threads: int = Field(default=0, description="Torch CPU threads for local embeddings (0 for torch default)")
+    local_embedding_quantize: bool = Field(default=False, description="Quantize the local embedding model to int8")
+    local_embedding_max_tokens: int = Field(default=256, description="Maximum tokens per input for local embeddings")
+    ai_embedding_batch_size: int = Field(default=256, description="Maximum texts per embedding request")
+    ai_embedding_batch_tokens: int = Field(default=100000, description="Maximum tokens per embedding request")
+    ai_embedding_concurrency: int = Field(default=4, description="Embedding requests run concurrently")
+    ai_embedding_chunk_tokens: int = Field(default=1000, description="Token budget per chunk for chunk-level embeddings")
+    ai_hedging_enabled: bool = Field(default=True, description="Duplicate LLM requests that run past the usual latency")
+    ai_hedge_percentile: float = Field(default=95.0, description="Latency percentile after which a request is hedged")
+    ai_hedge_initial_delay: float = Field(default=30.0, description="Seconds before hedging until enough latencies are recorded")
+    ai_hedge_min_delay: float = Field(default=2.0, description="Minimum seconds before hedging a request")
+    ai_failover_models: dict[str, str] = Field(
+        default_factory=lambda: {"openai": "claude-3-sonnet-20240229", "anthropic": "gpt-4-turbo"},
+        description="Model on the alternate provider used for failover and hedging, by provider"
+    )
+    ai_breaker_window: int = Field(default=60, description="Seconds of call outcomes the circuit breaker considers")
+    ai_breaker_min_requests: int = Field(default=10, description="Calls in the window before the circuit breaker can open")
+    ai_breaker_error_rate: float = Field(default=0.5, description="Error rate that opens a provider's circuit")
+    ai_breaker_slow_seconds: float = Field(default=60.0, description="Latency in seconds counted as a slow call")
+    ai_breaker_slow_rate: float = Field(default=0.5, description="Share of slow calls that opens a provider's circuit")
+    ai_breaker_cooldown: int = Field(default=30, description="Seconds a circuit stays open before a trial call")
+    ai_preview_enabled: bool = Field(default=True, description="Write a title and abstract preview summary at ingest")
+    ai_preview_model: str = Field(default="gpt-3.5-turbo", description="Model for preview summaries, empty for extractive previews")
+    ai_preview_timeout: float = Field(default=10.0, description="Seconds before a preview falls back to extraction")
+    knowledge_summary_debounce: float = Field(default=5.0, description="Seconds without edits before a knowledge entry is summarized")
+    knowledge_summary_batch_size: int = Field(default=10, description="Knowledge entries summarized per LLM request")
+    ai_usage_enabled: bool = Field(default=True, description="Store token, cost and latency records for every AI call")
+    ai_usage_batch_size: int = Field(default=100, description="AI usage records buffered before a write")
+    ai_usage_flush_interval: float = Field(default=5.0, description="Seconds before buffered AI usage records are written")
+    passage_tokens: int = Field(default=300, description="Token budget per passage in a paper's question index")
+    passage_overlap_tokens: int = Field(default=50, description="Tokens each passage repeats from the one before it")
+    passage_index_on_ingest: bool = Field(default=True, description="Index passages when a paper is processed, not on its first question")
+    paper_qa_top_k: int = Field(default=5, description="Passages sent to the model per question")
+    paper_qa_model: str = Field(default="gpt-3.5-turbo", description="Model answering questions about a paper")
+    paper_qa_max_tokens: int = Field(default=500, description="Maximum tokens per answer")
+    ai_fake_llm: bool = Field(default=False, description="Answer chat requests with the offline fake provider, for load tests")
+    ai_fake_llm_latency: float = Field(default=1.0, description="Median seconds per fake provider call")
+    ai_fake_llm_failure_rate: float = Field(default=0.0, description="Share of fake provider calls that fail")
+    ai_stage_concurrency: int = Field(default=5, description="Analysis stages run concurrently for one paper")
+    ai_worker_concurrency: int = Field(default=8, description="Analysis stages run concurrently per worker process")
+    ai_analysis_mode: str = Field(
+        default="staged",
+        description="AI analysis mode: staged (one request per stage) or combined (one structured request)"
+    )
+    ai_analysis_mode_by_tier: dict[str, str] = Field(
+        default_factory=dict,
+        description="AI analysis mode per subscription tier, overriding ai_analysis_mode"
+    )
+    llm_cache_enabled: bool = Field(default=True, description="Cache LLM responses and embeddings")
+    llm_cache_ttl: int = Field(default=30 * 24 * 3600, description="LLM cache entry lifetime in seconds (30 days)")
+    llm_cache_max_entries: int = Field(default=100000, description="Maximum LLM cache entries kept in Redis")
+    llm_cache_dir: str = Field(default="data/llm_cache", description="Directory for the LLM cache when Redis is unavailable")
+    llm_cache_max_disk_bytes: int = Field(default=512 * 1024 * 1024, description="LLM disk cache size limit in bytes (512MB)")
+    llm_rate_limit_enabled: bool = Field(default=True, description="Share provider rate limits across workers through Redis")
+    llm_rate_limits: dict[str, dict[str, int]] = Field(
+        default_factory=lambda: {
+            "openai": {"rpm": 3500, "tpm": 600000},
+            "openai:gpt-4-turbo": {"rpm": 500, "tpm": 300000},
+            "anthropic": {"rpm": 1000, "tpm": 200000},
+        },
+        description="Requests (rpm) and tokens (tpm) per minute by provider or provider:model"
+    )
+    llm_rate_limit_max_wait: int = Field(default=300, description="Seconds to wait for rate limit capacity before sending anyway")
+    llm_rate_limit_retries: int = Field(default=3, description="Retries of a request rejected with 429")
+    llm_rate_limit_retry_after: float = Field(default=10.0, description="Seconds to hold a model after a 429 without a retry-after hint")
+    stream_sharing_enabled: bool = Field(default=True, description="Share streaming summary generations across workers through Redis")
+
+    # PDF Processing
+    pdf_extraction_workers: int = Field(default=2, description="Number of PDF extraction worker processes")
+    pdf_extraction_queue_size: int = Field(default=16, description="Max extraction jobs waiting for a free worker")
+    pdf_extraction_timeout_seconds: int = Field(default=120, description="Time limit for a single extraction job")
+    pdf_extraction_max_tasks_per_child: int = Field(
+        default=50,
+        description="Jobs a worker process runs before it is replaced"
+    )
+    pdf_download_chunk_size: int = Field(default=64 * 1024, description="Chunk size for streamed PDF downloads")
+    pdf_spool_max_memory: int = Field(
+        default=1024 * 1024,
+        description="PDF size kept in memory before spooling to a temp file"
+    )
+    pdf_spool_dir: Optional[str] = Field(default=None, description="Directory for spooled PDFs (system temp if unset)")
+    pdf_parallel_page_threshold: int = Field(
+        default=200,
+        description="Page count from which PDFs are split across extraction workers (0 disables)"
+    )
+    pdf_parallel_pages_per_job: int = Field(default=25, description="Pages per parallel extraction job")
+    pdf_range_requests_enabled: bool = Field(
+        default=True,
+        description="Read metadata of remote PDFs with HTTP range requests instead of a full download"
+    )
+    pdf_range_tail_size: int = Field(default=64 * 1024, description="Bytes fetched from the end of a PDF to find its xref")
+    pdf_range_max_bytes: int = Field(
+        default=2 * 1024 * 1024,
+        description="Bytes a range-request metadata read may fetch before falling back to a full download"
+    )
+    pdf_store_dir: str = Field(default="data/pdf_store", description="Directory for the content-addressed PDF store")
+    pdf_store_max_bytes: int = Field(default=2 * 1024 * 1024 * 1024, description="PDF store size limit in bytes (2GB)")
+    pdf_store_pending_ttl_seconds: int = Field(
+        default=24 * 60 * 60,
+        description="How long a PDF waiting for its first extraction is protected from eviction"
+    )
+    pdf_store_url_ttl_seconds: int = Field(
+        default=24 * 60 * 60,
+        description="How long a URL's known content is reused before it is revalidated with the server"
+    )
+    passage_index_dir: str = Field(default="data/passage_index", description="Directory for per-paper passage indexes")
+    passage_index_max_bytes: int = Field(
+        default=1024 * 1024 * 1024,
+        description="Passage index directory size limit in bytes (1GB)"
+    )
 
     # Logging
     log_level: str = Field(default="INFO", description="Logging level")
@@ -107,6 +235,30 @@ class Settings(BaseSettings):
             raise ValueError("Database URL must be a PostgreSQL URL")
         return v
 
+    @field_validator("ai_analysis_mode")
+    @classmethod
+    def validate_ai_analysis_mode(cls, v: str) -> str:
+        """Validate AI analysis mode."""
+        if v not in ("staged", "combined"):
+            raise ValueError("AI analysis mode must be 'staged' or 'combined'")
+        return v
+
+    @field_validator("embedding_provider")
+    @classmethod
+    def validate_embedding_provider(cls, v: str) -> str:
+        """Validate embedding provider."""
+        if v not in ("openai", "local"):
+            raise ValueError("Embedding provider must be 'openai' or 'local'")
+        return v
+
+    @field_validator("ai_analysis_mode_by_tier")
+    @classmethod
+    def validate_ai_analysis_mode_by_tier(cls, v: dict[str, str]) -> dict[str, str]:
+        """Validate AI analysis modes per tier."""
+        for mode in v.values():
+            cls.validate_ai_analysis_mode(mode)
+        return v
+
     @field_validator("secret_key")
     @classmethod
     def validate_secret_key(cls, v: str) -> str:
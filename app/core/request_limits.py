@@ -0,0 +1,60 @@
+"""
+Request body size limits for upload endpoints.
+"""
+from typing import Iterable
+
+from fastapi import HTTPException, status
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Allowance for multipart boundaries, part headers and form fields around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """Reject oversized upload bodies before they are parsed and spooled.
+
+    Requests announcing a larger Content-Length are refused without reading
+    the body; chunked bodies are cut off as soon as they cross the limit.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int, paths: Iterable[str]):
+        """Initialize middleware."""
+        self.app = app
+        self.max_size = max_size + MULTIPART_OVERHEAD
+        self.paths = frozenset(paths)
+        self.detail = f"File too large. Maximum size: {max_size} bytes"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Apply the size limit to POST requests on upload paths."""
+
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        declared_length = Headers(scope=scope).get("content-length")
+        if declared_length and declared_length.isdigit() and int(declared_length) > self.max_size:
+            response = JSONResponse(
+                {"detail": self.detail}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    # Raised inside form parsing, so FastAPI turns it into the response
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=self.detail
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -14,6 +14,7 @@ from app.core.config import settings
 from app.core.security_utils import SecurityUtils
 from app.db.database import get_db
 from app.db.queries.user_queries import get_user_by_id
+from app.services.ai_usage import bind_usage
 
 
 # JWT Security
@@ -56,6 +57,9 @@ async def get_current_user(
             detail="User not found"
         )
 
+    # Attribute AI calls made for this request to the user and their tier
+    bind_usage(user_id=str(user.id), subscription_tier=getattr(user.subscription_tier, "value", None))
+
     return user
 
 
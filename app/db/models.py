@@ -40,6 +40,12 @@ class PaperSource(str, PyEnum):
     URL = "url"
 
 
+class SummaryTier(str, PyEnum):
+    """How much of a paper its stored summary was generated from."""
+    PREVIEW = "preview"  # Title and abstract only
+    FULL = "full"  # Full-text analysis
+
+
 class ReadingStatus(str, PyEnum):
     """User's reading status for a paper."""
     SAVED = "saved"
@@ -127,17 +133,21 @@ class Paper(Base):
     # URLs and files
     url = Column(String(500))
     pdf_url = Column(String(500))
+    pdf_sha256 = Column(String(64), unique=True, index=True, nullable=True)  # Uploaded PDF content hash
     source = Column(Enum(PaperSource), nullable=False)
 
     # Content
     full_text = Column(Text)  # Extracted full text
+    section_index = Column(JSON, nullable=True)  # Section names with offsets into full_text
 
     # AI-generated content
     summary = Column(JSON, nullable=True)  # Structured summary
+    summary_tier = Column(Enum(SummaryTier), nullable=True)
     key_insights = Column(JSON, default=list)  # List of key insights
     methodology = Column(Text)
     limitations = Column(Text)
     contributions = Column(JSON, default=list)  # List of contributions
+    embedding = Column(JSON, nullable=True)  # Full-text embedding vector
 
     # Processing status
     processing_status = Column(
@@ -343,4 +353,31 @@ class APIUsage(Base):
     cost = Column(Float, default=0.0)
 
     # Timestamp
-    created_at = Column(DateTime, default=func.now(), nullable=False)
\ No newline at end of file
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+
+# AI Usage Accounting
+class AIUsage(Base):
+    """Tokens, cost and latency of one AI provider call."""
+
+    __tablename__ = "ai_usage"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+
+    # Attribution
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True, index=True)
+    paper_id = Column(UUID(as_uuid=True), ForeignKey("papers.id"), nullable=True, index=True)
+    request_id = Column(String(64), nullable=True)
+    subscription_tier = Column(String(20), nullable=True)  # Tier the call was made for, if known
+
+    # Call details
+    operation = Column(String(50), nullable=False)  # summarization, embeddings, etc.
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    cost = Column(Float, default=0.0)  # USD
+    latency = Column(Float)  # Seconds
+    success = Column(Boolean, default=True, nullable=False)
+
+    # Timestamp
+    created_at = Column(DateTime, default=func.now(), nullable=False, index=True)
@@ -67,6 +67,15 @@ async def get_paper_by_url(db: Session, url: str) -> Optional[Paper]:
         return None
 
 
+async def get_paper_by_pdf_sha256(db: Session, pdf_sha256: str) -> Optional[Paper]:
+    """Get paper by uploaded PDF content hash."""
+    try:
+        return db.query(Paper).filter(Paper.pdf_sha256 == pdf_sha256).first()
+    except Exception as e:
+        db_logger.error(f"Error getting paper by PDF hash {pdf_sha256}: {e}")
+        return None
+
+
 async def update_paper(db: Session, paper_id: str, paper_update: dict) -> Optional[Paper]:
     """Update paper information."""
     try:
@@ -161,6 +170,19 @@ async def get_user_paper(db: Session, user_id: str, paper_id: str) -> Optional[U
         return None
 
 
+async def get_paper_subscription_tiers(db: Session, paper_id: str) -> List[str]:
+    """Get the subscription tiers of users who have a paper in their library."""
+    try:
+        rows = db.query(User.subscription_tier).join(
+            UserPaper, UserPaper.user_id == User.id
+        ).filter(UserPaper.paper_id == UUID(paper_id)).distinct().all()
+
+        return [row[0].value for row in rows if row[0]]
+    except Exception as e:
+        db_logger.error(f"Error getting subscription tiers for paper {paper_id}: {e}")
+        return []
+
+
 async def update_user_paper(
     db: Session,
     user_id: str,
@@ -7,7 +7,7 @@ from uuid import UUID
 
 from pydantic import BaseModel, Field, HttpUrl
 
-from app.db.models import ProcessingStatus, PaperSource, ReadingStatus
+from app.db.models import ProcessingStatus, PaperSource, ReadingStatus, SummaryTier
 
 
 # Paper schemas
@@ -66,6 +66,7 @@ class PaperResponse(PaperBase):
     pdf_url: Optional[str] = None
     source: PaperSource
     processing_status: ProcessingStatus
+    summary_tier: Optional[SummaryTier] = None
     processed_at: Optional[datetime] = None
     processing_error: Optional[str] = None
     citation_count: int = 0
@@ -166,6 +167,15 @@ class PaperProcessingStatus(BaseModel):
     processed_at: Optional[datetime] = None
 
 
+# Paper upload schema
+class PaperUploadResponse(BaseModel):
+    """Schema for an accepted PDF upload."""
+    paper_id: UUID
+    task_id: Optional[str] = None
+    processing_status: ProcessingStatus
+    duplicate: bool = False
+
+
 # Paper URL submission schema
 class PaperURLSubmission(BaseModel):
     """Schema for submitting a paper URL for processing."""
@@ -185,6 +195,7 @@ class PaperPublic(BaseModel):
     publication_year: Optional[int] = None
     source: PaperSource
     processing_status: ProcessingStatus
+    summary_tier: Optional[SummaryTier] = None
     citation_count: int = 0
     influence_score: float = 0.0
     created_at: datetime
@@ -215,6 +226,31 @@ class PaperSearchResponse(BaseModel):
     processing_time: Optional[float] = None
 
 
+# Paper question schemas
+class PaperQuestionRequest(BaseModel):
+    """Schema for questions about a paper."""
+    question: str = Field(..., min_length=3, max_length=1000, description="Question about the paper")
+    top_k: Optional[int] = Field(default=None, ge=1, le=20, description="Passages to answer from")
+
+
+class PaperPassage(BaseModel):
+    """Schema for a passage an answer was drawn from."""
+    index: int
+    text: str
+    start: int
+    end: int
+    score: float
+
+
+class PaperAnswer(BaseModel):
+    """Schema for answers to paper questions."""
+    paper_id: str
+    question: str
+    answer: str
+    passages: List[PaperPassage]
+    processing_time: Optional[float] = None
+
+
 # Recommendations response schema
 class PaperRecommendationsResponse(BaseModel):
     """Schema for paper recommendations."""
@@ -3,17 +3,82 @@ AI service for paper analysis and processing.
 """
 import json
 import asyncio
-from typing import List, Dict, Any, Optional, Tuple
+import hashlib
+import math
+import os
+import re
+import time
+import weakref
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable, AsyncIterator
 from datetime import datetime
 
+from pydantic import ValidationError
+
 import openai
 from openai import AsyncOpenAI
 import anthropic
 from anthropic import AsyncAnthropic
 
 from app.core.config import settings
-from app.core.app_logging import ai_logger, log_ai_request, log_error
+from app.core.app_logging import ai_logger, log_error
 from app.schemas.paper import PaperSummary, KeyInsight, PaperContribution
+from app.services.section_index import select_sections
+from app.services.chunking import chunk_text, chunk_spans, count_tokens, estimate_cost
+from app.services.llm_cache import llm_cache
+from app.services.llm_rate_limiter import llm_rate_limiter
+from app.services.llm_providers import ChatProvider, OpenAIChatProvider, AnthropicChatProvider, FakeChatProvider
+from app.services.llm_resilience import CircuitBreaker, LatencyTracker
+from app.services.ai_usage import ai_usage, usage_context
+from app.services.local_embeddings import local_embeddings
+
+
+# Sections each analysis stage reads when the paper has a section index
+STAGE_SECTIONS = {
+    "summarization": (
+        "front_matter", "abstract", "introduction", "methods", "results",
+        "discussion", "limitations", "conclusion", "body"
+    ),
+    "insight_extraction": ("abstract", "results", "discussion", "conclusion"),
+    "methodology": ("methods",),
+    "limitations": ("limitations", "discussion", "conclusion"),
+    "contributions": ("abstract", "introduction", "conclusion"),
+}
+
+# OpenAI embedding model and its per-input token limit
+EMBEDDING_MODEL = "text-embedding-3-large"
+EMBEDDING_MAX_TOKENS = 8191
+
+# The combined request needs every section any stage reads
+STAGE_SECTIONS["combined"] = tuple(dict.fromkeys(
+    kind for kinds in STAGE_SECTIONS.values() for kind in kinds
+))
+
+
+# Abstract sentences that report results, used for extractive previews
+PREVIEW_FINDING_PATTERN = re.compile(
+    r"\b(we (show|find|found|demonstrate|observe)|results?|outperform\w*|improv\w*|achiev\w*|\d+(\.\d+)?%)",
+    re.IGNORECASE
+)
+
+
+# Headers of a streamed summary, in order, and the summary fields they fill
+SUMMARY_SECTIONS = {
+    "Executive Summary": "executive_summary",
+    "Key Findings": "key_findings",
+    "Methodology": "methodology_overview",
+    "Contributions": "contributions",
+    "Limitations": "limitations",
+    "Future Work": "future_work",
+    "Scores": "scores",
+}
+
+SUMMARY_BULLET_PATTERN = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])\s+(.*)$")
+CONTRIBUTION_TYPE_PATTERN = re.compile(r"^\[(\w+)\]\s*(.*)$")
+SUMMARY_SCORE_PATTERN = re.compile(r"^\s*(relevance|confidence)\s*:\s*([01](?:\.\d+)?)", re.IGNORECASE | re.MULTILINE)
+
+
+class CombinedAnalysisError(ValueError):
+    """Raised when a combined analysis response does not match the expected structure."""
 
 
 class AIService:
@@ -28,21 +93,43 @@ class AIService:
         else:
             self.anthropic_client = None
 
+        # Chat providers by name, each behind a circuit breaker
+        self.providers: Dict[str, ChatProvider] = {"openai": OpenAIChatProvider(self.openai_client)}
+        if self.anthropic_client:
+            self.providers["anthropic"] = AnthropicChatProvider(self.anthropic_client)
+        if settings.ai_fake_llm:
+            # Load tests exercise the pipeline without calling paid APIs
+            fake = FakeChatProvider(
+                latency=settings.ai_fake_llm_latency, failure_rate=settings.ai_fake_llm_failure_rate, seed=None
+            )
+            self.providers = {"openai": fake, "anthropic": fake}
+        self.breakers: Dict[str, CircuitBreaker] = {name: CircuitBreaker(name) for name in self.providers}
+        self.latencies = LatencyTracker()
+        self.hedge_counts = {"hedged": 0, "won": 0}
+
+        # In-flight chunk summarizations per event loop, shared by concurrent stages
+        self._chunk_tasks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
     async def summarize_paper(
         self,
         paper_content: str,
         paper_title: str,
         paper_authors: List[str] = None,
-        model: str = "gpt-4-turbo"
+        model: str = "gpt-4-turbo",
+        section_index: Optional[List[Dict[str, Any]]] = None
     ) -> PaperSummary:
         """Generate comprehensive paper summary using AI."""
 
         ai_logger.info(f"Generating summary for paper: {paper_title[:50]}...")
-        start_time = datetime.now()
 
         try:
             # Prepare content for AI
-            content = self._prepare_paper_content(paper_content, paper_title, paper_authors)
+            content = self._prepare_paper_content(
+                await self._stage_input(paper_content, paper_title, section_index, "summarization", model),
+                paper_title, paper_authors
+            )
 
             # Create prompt for summarization
             prompt = self._create_summarization_prompt(content)
@@ -53,10 +140,6 @@ class AIService:
             else:
                 summary_data = await self._generate_openai_summary(prompt, model)
 
-            # Process response time
-            response_time = (datetime.now() - start_time).total_seconds()
-            log_ai_request("summarization", model, len(content), response_time)
-
             # Parse and validate summary
             summary = self._parse_summary_response(summary_data)
 
@@ -68,20 +151,82 @@ class AIService:
             log_error(e, {"paper_title": paper_title, "model": model})
             raise
 
+    async def stream_summary(
+        self,
+        paper_content: str,
+        paper_title: str,
+        paper_authors: List[str] = None,
+        model: str = "gpt-4-turbo",
+        section_index: Optional[List[Dict[str, Any]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Generate a paper summary as a stream of events.
+
+        Yields a "section" event at each section header, "token" events
+        with the text in between, and finally a "summary" event with the
+        parsed summary.
+        """
+
+        ai_logger.info(f"Streaming summary for paper: {paper_title[:50]}...")
+
+        content = self._prepare_paper_content(
+            await self._stage_input(paper_content, paper_title, section_index, "summarization", model),
+            paper_title, paper_authors
+        )
+
+        parts = []
+        pending = []
+        header = None
+        line_start = True
+
+        async for delta in self.stream_chat(
+            "streaming_summary", model, self._create_streaming_summary_prompt(content),
+            temperature=0.3, max_tokens=2000
+        ):
+            parts.append(delta)
+
+            # Header lines are held back until complete, other text is passed on as it arrives
+            for char in delta:
+                if header is not None:
+                    if char == "\n":
+                        yield self._section_event(header)
+                        header = None
+                        line_start = True
+                    else:
+                        header += char
+                elif line_start and char == "#":
+                    if pending:
+                        yield {"event": "token", "data": {"text": "".join(pending)}}
+                        pending = []
+                    header = char
+                else:
+                    pending.append(char)
+                    line_start = char == "\n"
+
+            if pending:
+                yield {"event": "token", "data": {"text": "".join(pending)}}
+                pending = []
+
+        if header is not None:
+            yield self._section_event(header)
+
+        summary = self._parse_sectioned_summary("".join(parts))
+        ai_logger.info(f"Summary streamed successfully for: {paper_title[:50]}...")
+        yield {"event": "summary", "data": summary.dict()}
+
     async def extract_key_insights(
         self,
         paper_content: str,
         paper_title: str,
-        max_insights: int = 7
+        max_insights: int = 7,
+        section_index: Optional[List[Dict[str, Any]]] = None
     ) -> List[KeyInsight]:
         """Extract key insights from paper."""
 
         ai_logger.info(f"Extracting insights for paper: {paper_title[:50]}...")
-        start_time = datetime.now()
 
         try:
             # Prepare content
-            content = paper_content[:settings.max_paper_length]
+            content = await self._stage_input(paper_content, paper_title, section_index, "insight_extraction")
 
             prompt = f"""
             Extract {max_insights} key insights from this academic paper that would be valuable for researchers:
@@ -111,34 +256,11 @@ class AIService:
             Ensure insights are specific, actionable, and ranked by relevance (0.0-1.0).
             """
 
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=1000
+            insights = await self.complete_chat(
+                "insight_extraction", "gpt-4-turbo", prompt,
+                parse=self._parse_key_insights, temperature=0.3, max_tokens=1000
             )
 
-            # Parse response
-            content_text = response.choices[0].message.content
-            insights_data = json.loads(content_text)
-
-            # Convert to KeyInsight objects
-            insights = [
-                KeyInsight(
-                    insight=item["insight"],
-                    relevance_score=item.get("relevance_score", 0.5),
-                    section=item.get("section"),
-                    page_number=item.get("page_number")
-                )
-                for item in insights_data
-            ]
-
-            # Sort by relevance score
-            insights.sort(key=lambda x: x.relevance_score, reverse=True)
-
-            response_time = (datetime.now() - start_time).total_seconds()
-            log_ai_request("insight_extraction", "gpt-4-turbo", len(content), response_time)
-
             ai_logger.info(f"Extracted {len(insights)} insights for: {paper_title[:50]}...")
             return insights
 
@@ -147,13 +269,18 @@ class AIService:
             log_error(e, {"paper_title": paper_title})
             raise
 
-    async def analyze_methodology(self, paper_content: str, paper_title: str) -> str:
+    async def analyze_methodology(
+        self,
+        paper_content: str,
+        paper_title: str,
+        section_index: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
         """Analyze paper methodology."""
 
         ai_logger.info(f"Analyzing methodology for: {paper_title[:50]}...")
 
         try:
-            content = paper_content[:settings.max_paper_length]
+            content = await self._stage_input(paper_content, paper_title, section_index, "methodology")
 
             prompt = f"""
             Analyze the methodology section of this academic paper and provide a comprehensive summary:
@@ -174,15 +301,10 @@ class AIService:
             Focus on being specific and technical while remaining accessible.
             """
 
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2,
-                max_tokens=800
+            methodology = await self.complete_chat(
+                "methodology", "gpt-4-turbo", prompt, temperature=0.2, max_tokens=800
             )
 
-            methodology = response.choices[0].message.content
-
             ai_logger.info(f"Methodology analysis completed for: {paper_title[:50]}...")
             return methodology
 
@@ -191,13 +313,18 @@ class AIService:
             log_error(e, {"paper_title": paper_title})
             raise
 
-    async def identify_limitations(self, paper_content: str, paper_title: str) -> str:
+    async def identify_limitations(
+        self,
+        paper_content: str,
+        paper_title: str,
+        section_index: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
         """Identify paper limitations."""
 
         ai_logger.info(f"Identifying limitations for: {paper_title[:50]}...")
 
         try:
-            content = paper_content[:settings.max_paper_length]
+            content = await self._stage_input(paper_content, paper_title, section_index, "limitations")
 
             prompt = f"""
             Identify and analyze the limitations of this academic paper:
@@ -219,15 +346,10 @@ class AIService:
             Be constructive and specific in identifying limitations.
             """
 
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=600
+            limitations = await self.complete_chat(
+                "limitations", "gpt-4-turbo", prompt, temperature=0.3, max_tokens=600
             )
 
-            limitations = response.choices[0].message.content
-
             ai_logger.info(f"Limitations analysis completed for: {paper_title[:50]}...")
             return limitations
 
@@ -239,14 +361,15 @@ class AIService:
     async def extract_contributions(
         self,
         paper_content: str,
-        paper_title: str
+        paper_title: str,
+        section_index: Optional[List[Dict[str, Any]]] = None
     ) -> List[PaperContribution]:
         """Extract paper contributions."""
 
         ai_logger.info(f"Extracting contributions for: {paper_title[:50]}...")
 
         try:
-            content = paper_content[:settings.max_paper_length]
+            content = await self._stage_input(paper_content, paper_title, section_index, "contributions")
 
             prompt = f"""
             Extract the key contributions of this academic paper:
@@ -272,25 +395,11 @@ class AIService:
             Rate significance from 0.0 (minor) to 1.0 (major breakthrough).
             """
 
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2,
-                max_tokens=800
+            contributions = await self.complete_chat(
+                "contributions", "gpt-4-turbo", prompt,
+                parse=self._parse_contributions, temperature=0.2, max_tokens=800
             )
 
-            content_text = response.choices[0].message.content
-            contributions_data = json.loads(content_text)
-
-            contributions = [
-                PaperContribution(
-                    contribution=item["contribution"],
-                    type=item["type"],
-                    significance=item.get("significance", 0.5)
-                )
-                for item in contributions_data
-            ]
-
             ai_logger.info(f"Extracted {len(contributions)} contributions for: {paper_title[:50]}...")
             return contributions
 
@@ -299,19 +408,88 @@ class AIService:
             log_error(e, {"paper_title": paper_title})
             raise
 
+    async def analyze_paper_combined(
+        self,
+        paper_content: str,
+        paper_title: str,
+        paper_authors: List[str] = None,
+        section_index: Optional[List[Dict[str, Any]]] = None,
+        model: str = "gpt-4-turbo"
+    ) -> Dict[str, Any]:
+        """Run summary, insights, methodology, limitations and contributions as one structured request.
+
+        Raises CombinedAnalysisError when the response does not validate, so
+        callers can fall back to the per-stage calls.
+        """
+
+        ai_logger.info(f"Running combined analysis for: {paper_title[:50]}...")
+
+        content = self._prepare_paper_content(
+            await self._stage_input(paper_content, paper_title, section_index, "combined", model),
+            paper_title, paper_authors
+        )
+
+        analysis = await self.complete_chat(
+            "combined_analysis", model, self._create_combined_analysis_prompt(content),
+            parse=self._parse_combined_analysis, temperature=0.2, max_tokens=3000,
+            response_format={"type": "json_object"}
+        )
+
+        ai_logger.info(f"Combined analysis completed for: {paper_title[:50]}...")
+        return analysis
+
+    async def generate_preview_summary(
+        self,
+        paper_title: str,
+        paper_abstract: str,
+        model: Optional[str] = None
+    ) -> PaperSummary:
+        """Summarize a paper from its title and abstract alone, for display before full analysis.
+
+        Uses the cheap preview model, falling back to sentences picked from
+        the abstract when no model is configured or it does not answer
+        within `ai_preview_timeout`.
+        """
+
+        model = settings.ai_preview_model if model is None else model
+
+        if model:
+            try:
+                return await asyncio.wait_for(
+                    self.complete_chat(
+                        "preview", model, self._create_preview_prompt(paper_title, paper_abstract),
+                        parse=self._parse_preview, temperature=0.2, max_tokens=300
+                    ),
+                    timeout=settings.ai_preview_timeout
+                )
+            except Exception as e:
+                ai_logger.warning(f"Preview model failed for {paper_title[:50]}, using extractive preview: {e!r}")
+
+        return self._extractive_preview(paper_abstract)
+
+    async def answer_question(
+        self,
+        question: str,
+        paper_title: str,
+        passages: List[Dict[str, Any]],
+        model: Optional[str] = None
+    ) -> str:
+        """Answer a question about a paper from retrieved passages only."""
+
+        model = model or settings.paper_qa_model
+        answer = await self.complete_chat(
+            "paper_question", model, self._create_question_prompt(question, paper_title, passages),
+            temperature=0.2, max_tokens=settings.paper_qa_max_tokens
+        )
+
+        ai_logger.info(f"Answered question from {len(passages)} passages for: {paper_title[:50]}...")
+        return answer.strip()
+
     async def generate_embeddings(self, text: str) -> List[float]:
         """Generate embeddings for semantic search."""
 
         try:
-            # Truncate text if too long
-            text = text[:8000]  # OpenAI embedding limit
-
-            response = await self.openai_client.embeddings.create(
-                model="text-embedding-3-large",
-                input=text
-            )
-
-            embeddings = response.data[0].embedding
+            embeddings = (await self.embed_texts([text]))[0]
 
             ai_logger.info(f"Generated embeddings for text of length {len(text)}")
             return embeddings
@@ -321,45 +499,424 @@ class AIService:
             log_error(e, {"text_length": len(text)})
             raise
 
-    async def batch_process_papers(
+    async def embed_texts(self, texts: List[str], provider: Optional[str] = None) -> List[List[float]]:
+        """Embed many texts in batched requests, returning vectors in input order.
+
+        Identical texts are embedded once. Texts over the model's input limit
+        are embedded chunk by chunk and mean-pooled instead of truncated.
+        """
+
+        provider = provider or settings.embedding_provider
+        model, max_tokens = self._embedding_model(provider)
+
+        # Split long texts so every piece fits one embedding input
+        pieces = {}
+        for text in dict.fromkeys(texts):
+            if count_tokens(text, model) > max_tokens:
+                pieces[text] = chunk_text(text, max_tokens, model) or [text]
+            else:
+                pieces[text] = [text]
+
+        vectors = await self._embed_pieces(
+            list(dict.fromkeys(piece for text_pieces in pieces.values() for piece in text_pieces)),
+            provider, model
+        )
+
+        pooled = {}
+        for text, text_pieces in pieces.items():
+            if len(text_pieces) == 1:
+                pooled[text] = vectors[text_pieces[0]]
+            else:
+                pooled[text] = self._mean_pool(
+                    [vectors[piece] for piece in text_pieces],
+                    [count_tokens(piece, model) for piece in text_pieces]
+                )
+
+        return [pooled[text] for text in texts]
+
+    async def embed_document(
         self,
-        papers_data: List[Dict[str, Any]],
-        batch_size: int = None
+        text: str,
+        chunk_tokens: Optional[int] = None,
+        provider: Optional[str] = None,
+        overlap_tokens: int = 0,
+        section_index: Optional[List[Dict[str, Any]]] = None
     ) -> List[Dict[str, Any]]:
-        """Process multiple papers in batches."""
+        """Embed a full text chunk by chunk, returning each chunk with its offsets and vector.
 
-        batch_size = batch_size or settings.ai_batch_size
-        results = []
+        With `overlap_tokens`, each chunk repeats the end of the one before it.
+        """
 
-        ai_logger.info(f"Starting batch processing of {len(papers_data)} papers")
+        provider = provider or settings.embedding_provider
+        model, max_tokens = self._embedding_model(provider)
 
-        for i in range(0, len(papers_data), batch_size):
-            batch = papers_data[i:i + batch_size]
+        spans = chunk_spans(
+            text, min(chunk_tokens or settings.ai_embedding_chunk_tokens, max_tokens), model,
+            section_index, overlap_tokens
+        )
+        chunks = [text[start:end] for start, end in spans]
+        vectors = await self.embed_texts(chunks, provider)
 
-            # Process batch concurrently
-            batch_tasks = [
-                self._process_single_paper(paper_data)
-                for paper_data in batch
-            ]
+        return [
+            {"text": chunk, "start": start, "end": end, "embedding": vector}
+            for chunk, (start, end), vector in zip(chunks, spans, vectors)
+        ]
 
-            try:
-                batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
+    def embedding_model(self, provider: Optional[str] = None) -> str:
+        """Get the name of the embedding model used for a provider."""
+        return self._embedding_model(provider or settings.embedding_provider)[0]
 
-                for j, result in enumerate(batch_results):
-                    if isinstance(result, Exception):
-                        ai_logger.error(f"Failed to process paper in batch: {result}")
-                        results.append({"error": str(result), "paper_index": i + j})
-                    else:
-                        results.append(result)
+    def _embedding_model(self, provider: str) -> Tuple[str, int]:
+        """Get the embedding model and its per-input token limit for a provider."""
 
-            except Exception as e:
-                ai_logger.error(f"Batch processing failed: {e}")
-                log_error(e, {"batch_start": i, "batch_size": len(batch)})
+        if provider == "local":
+            return local_embeddings.model_name, settings.local_embedding_max_tokens
+
+        return EMBEDDING_MODEL, EMBEDDING_MAX_TOKENS
+
+    async def _embed_pieces(self, pieces: List[str], provider: str, model: str) -> Dict[str, List[float]]:
+        """Embed unique pieces, serving cached vectors and batching the rest concurrently."""
+
+        keys = {piece: llm_cache.make_key(provider, model, piece) for piece in pieces}
+
+        cached = await llm_cache.get_many(list(keys.values()), "embeddings")
+        vectors = {piece: cached[key] for piece, key in keys.items() if key in cached}
+
+        missing = [piece for piece in pieces if piece not in vectors]
+        if not missing:
+            return vectors
+
+        start_time = datetime.now()
+
+        if provider == "local":
+            # The local model batches on CPU itself, so send everything at once
+            batches = [missing]
+            results = [await local_embeddings.embed(missing)]
+            ai_usage.record(
+                "embeddings", "local", model, sum(count_tokens(piece, model) for piece in missing), 0,
+                (datetime.now() - start_time).total_seconds()
+            )
+        else:
+            batches = self._embedding_batches(missing, model)
+            results = await self._embed_openai_batches(batches, model)
+
+        for batch, embeddings in zip(batches, results):
+            for piece, embedding in zip(batch, embeddings):
+                vectors[piece] = embedding
+
+        await llm_cache.set_many({keys[piece]: vectors[piece] for piece in missing})
+
+        ai_logger.info(
+            f"Embedded {len(missing)} texts in {len(batches)} batches in "
+            f"{(datetime.now() - start_time).total_seconds():.2f}s"
+        )
+
+        return vectors
+
+    async def _embed_openai_batches(self, batches: List[List[str]], model: str) -> List[List[List[float]]]:
+        """Send embedding batches to OpenAI concurrently."""
+
+        semaphore = asyncio.Semaphore(settings.ai_embedding_concurrency)
+
+        async def embed_batch(batch: List[str]) -> List[List[float]]:
+            tokens = sum(count_tokens(text, model) for text in batch)
+
+            async with semaphore:
+                response, latency = await self._rate_limited(
+                    "openai", model, tokens,
+                    lambda: self.openai_client.embeddings.create(model=model, input=batch)
+                )
+
+            reported = getattr(getattr(response, "usage", None), "prompt_tokens", None)
+            ai_usage.record(
+                "embeddings", "openai", model, reported if isinstance(reported, int) else tokens, 0, latency
+            )
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+        return await asyncio.gather(*(embed_batch(batch) for batch in batches))
+
+    def _embedding_batches(self, texts: List[str], model: str) -> List[List[str]]:
+        """Pack texts into batches within the per-request input and token limits."""
+
+        batches = []
+        batch = []
+        batch_tokens = 0
+
+        for text in texts:
+            tokens = count_tokens(text, model)
+
+            if batch and (
+                len(batch) >= settings.ai_embedding_batch_size
+                or batch_tokens + tokens > settings.ai_embedding_batch_tokens
+            ):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+
+            batch.append(text)
+            batch_tokens += tokens
+
+        if batch:
+            batches.append(batch)
+
+        return batches
+
+    @staticmethod
+    def _mean_pool(vectors: List[List[float]], weights: List[int]) -> List[float]:
+        """Weighted mean of vectors, normalized to unit length."""
+
+        total = sum(weights) or 1
+        pooled = [
+            sum(vector[i] * weight for vector, weight in zip(vectors, weights)) / total
+            for i in range(len(vectors[0]))
+        ]
+
+        norm = math.sqrt(sum(value * value for value in pooled)) or 1.0
+        return [value / norm for value in pooled]
+
+    async def batch_process_papers(
+        self,
+        papers_data: List[Dict[str, Any]],
+        batch_size: int = None,
+        checkpoint_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Process multiple papers, keeping `batch_size` in flight, and return results in input order."""
+
+        results = [
+            result async for result in self.iter_process_papers(papers_data, batch_size, checkpoint_path)
+        ]
+        results.sort(key=lambda result: result["paper_index"])
 
         ai_logger.info(f"Batch processing completed: {len(results)} results")
         return results
 
+    async def iter_process_papers(
+        self,
+        papers_data: List[Dict[str, Any]],
+        window: int = None,
+        checkpoint_path: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Process papers with `window` always in flight, yielding results as they complete.
+
+        With `checkpoint_path`, each completed result is appended to a JSONL
+        file; papers already completed there are yielded from it first and
+        not processed again, so an interrupted batch resumes where it stopped.
+        Failed papers are not checkpointed and are retried on resume.
+        """
+
+        window = window or settings.ai_batch_size
+        completed = self._load_checkpoint(checkpoint_path) if checkpoint_path else {}
+
+        ai_logger.info(
+            f"Starting batch processing of {len(papers_data)} papers, {window} at a time"
+            + (f", {len(completed)} already completed" if completed else "")
+        )
+
+        queue = []
+        for index, paper_data in enumerate(papers_data):
+            previous = completed.get(self._checkpoint_key(index, paper_data))
+            if previous is not None:
+                yield {**previous, "paper_index": index}
+            else:
+                queue.append((index, paper_data))
+
+        checkpoint = None
+        if checkpoint_path:
+            os.makedirs(os.path.dirname(os.path.abspath(checkpoint_path)), exist_ok=True)
+            checkpoint = open(checkpoint_path, "a", encoding="utf-8")
+            # Start after a line torn by the interruption rather than extending it
+            if checkpoint.tell() and not self._ends_with_newline(checkpoint_path):
+                checkpoint.write("\n")
+
+        pending = set()
+        papers = iter(queue)
+
+        try:
+            while True:
+                # Refill the window as soon as any paper finishes
+                for index, paper_data in papers:
+                    pending.add(asyncio.ensure_future(self._process_indexed_paper(index, paper_data)))
+                    if len(pending) >= window:
+                        break
+
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    result = task.result()
+
+                    if checkpoint and result.get("processing_status") == "completed":
+                        key = self._checkpoint_key(result["paper_index"], papers_data[result["paper_index"]])
+                        checkpoint.write(json.dumps({"key": key, "result": result}, default=str) + "\n")
+                        checkpoint.flush()
+
+                    yield result
+
+        finally:
+            # The consumer stopped early or the batch was cancelled
+            for task in pending:
+                task.cancel()
+            if checkpoint:
+                checkpoint.close()
+
     # Private helper methods
+    async def _process_indexed_paper(self, index: int, paper_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Process one paper of a batch, returning failures as error results."""
+
+        try:
+            with usage_context(paper_id=paper_data.get("id")):
+                result = await self._process_single_paper(paper_data)
+        except Exception as e:
+            ai_logger.error(f"Failed to process paper in batch: {e}")
+            log_error(e, {"paper_index": index})
+            result = {"paper_id": paper_data.get("id"), "error": str(e), "processing_status": "failed"}
+
+        return {**result, "paper_index": index}
+
+    @staticmethod
+    def _checkpoint_key(index: int, paper_data: Dict[str, Any]) -> str:
+        """Get the key identifying a paper in a batch checkpoint."""
+        return str(paper_data.get("id") or f"index:{index}")
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        """Check whether a file ends with a newline."""
+
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    @staticmethod
+    def _load_checkpoint(checkpoint_path: str) -> Dict[str, Dict[str, Any]]:
+        """Read completed results from a batch checkpoint, ignoring a torn last line."""
+
+        completed = {}
+
+        try:
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    completed[entry["key"]] = entry["result"]
+        except FileNotFoundError:
+            pass
+
+        return completed
+
+    async def summarize_chunks(
+        self,
+        paper_content: str,
+        paper_title: str,
+        model: str = "gpt-4-turbo",
+        section_index: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
+        """Map-summarize a long paper in token-budgeted chunks and join the chunk summaries.
+
+        Concurrent callers for the same paper share one run, and chunk
+        summaries are cached, so later stages and re-summaries reuse them.
+        """
+
+        key = hashlib.sha256(f"{model}\0{paper_content}".encode("utf-8")).hexdigest()
+        tasks = self._chunk_tasks.setdefault(asyncio.get_running_loop(), {})
+
+        task = tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._map_chunks(paper_content, paper_title, model, section_index)
+            )
+            tasks[key] = task
+            task.add_done_callback(lambda _: tasks.pop(key, None))
+
+        # One caller being cancelled must not cancel the run for the others
+        return await asyncio.shield(task)
+
+    async def _map_chunks(
+        self,
+        paper_content: str,
+        paper_title: str,
+        model: str,
+        section_index: Optional[List[Dict[str, Any]]]
+    ) -> str:
+        """Summarize chunks concurrently and report throughput and cost."""
+
+        chunks = chunk_text(paper_content, settings.ai_chunk_tokens, model, section_index)
+        semaphore = asyncio.Semaphore(settings.ai_chunk_concurrency)
+        start_time = datetime.now()
+
+        async def summarize(number: int, chunk: str) -> Tuple[str, str]:
+            prompt = self._create_chunk_summary_prompt(chunk, paper_title, number, len(chunks))
+            async with semaphore:
+                summary = await self.complete_chat(
+                    "chunk_summary", model, prompt,
+                    temperature=0.2, max_tokens=settings.ai_chunk_summary_tokens
+                )
+            return prompt, summary
+
+        results = await asyncio.gather(*(
+            summarize(number, chunk) for number, chunk in enumerate(chunks, start=1)
+        ))
+
+        response_time = (datetime.now() - start_time).total_seconds()
+        input_tokens = sum(count_tokens(prompt, model) for prompt, _ in results)
+        output_tokens = sum(count_tokens(summary, model) for _, summary in results)
+
+        ai_logger.info(
+            f"Summarized {len(chunks)} chunks for: {paper_title[:50]}... - "
+            f"Tokens: {input_tokens} in / {output_tokens} out, "
+            f"Throughput: {input_tokens / max(response_time, 0.001):.0f} tokens/s, "
+            f"Estimated cost: ${estimate_cost(model, input_tokens, output_tokens):.4f}"
+        )
+
+        return "\n\n".join(
+            f"[Part {number} of {len(results)}]\n{summary.strip()}"
+            for number, (_, summary) in enumerate(results, start=1)
+        )
+
+    async def _stage_input(
+        self,
+        content: str,
+        title: str,
+        section_index: Optional[List[Dict[str, Any]]],
+        stage: str,
+        model: str = "gpt-4-turbo"
+    ) -> str:
+        """Get a stage's content within the token budget.
+
+        Papers over the budget use the stage's sections when those fit and
+        the chunk summaries otherwise, instead of losing the paper's end.
+        """
+
+        if count_tokens(content, model) <= settings.ai_max_input_tokens:
+            return self._select_content(content, section_index, stage)
+
+        if section_index:
+            selected = select_sections(content, section_index, STAGE_SECTIONS[stage], len(content))
+            if selected and count_tokens(selected, model) <= settings.ai_max_input_tokens:
+                return selected
+
+        return await self.summarize_chunks(content, title, model, section_index)
+
+    def _select_content(
+        self,
+        content: str,
+        section_index: Optional[List[Dict[str, Any]]],
+        stage: str
+    ) -> str:
+        """Get the sections a stage needs, or the start of the paper without a usable index."""
+
+        if section_index:
+            selected = select_sections(
+                content, section_index, STAGE_SECTIONS[stage], settings.max_paper_length
+            )
+            if selected:
+                return selected
+
+        return content[:settings.max_paper_length]
+
     def _prepare_paper_content(
         self,
         content: str,
@@ -388,12 +945,15 @@ class AIService:
 
         Return a JSON object with this exact structure:
         {{
-            "research_question": "What is the main research question or problem addressed?",
-            "methodology": "Brief description of the research methods and approach used",
+            "executive_summary": "Two to three sentence overview of the paper",
             "key_findings": ["Finding 1", "Finding 2", "Finding 3"],
+            "methodology_overview": "Brief description of the research methods",
+            "contributions": [
+                {{"contribution": "Specific contribution", "type": "theoretical/empirical/methodological/practical", "significance": 0.8}}
+            ],
             "limitations": ["Limitation 1", "Limitation 2"],
-            "significance": "Why this research is important and its contribution to the field",
             "future_work": ["Future direction 1", "Future direction 2"],
+            "relevance_score": 0.8,
             "confidence_score": 0.85
         }}
 
@@ -401,50 +961,652 @@ class AIService:
         - Be specific and accurate
         - Focus on the most important aspects
         - Limit key_findings to 3-5 items
+        - Limit contributions to 2-4 items
         - Limit limitations to 2-4 items
         - Limit future_work to 2-3 items
+        - Relevance score should reflect how significant the work is for its field (0.0-1.0)
         - Confidence score should reflect how well the paper is understood (0.0-1.0)
         """
 
+    def _create_streaming_summary_prompt(self, content: str) -> str:
+        """Create prompt for a summary written as sections, so it can be shown while it streams."""
+
+        return f"""
+        Analyze this academic paper and summarize it for a researcher:
+
+        {content}
+
+        Write the summary in these sections, each starting with its header on its own line:
+
+        ## Executive Summary
+        Two or three sentences on the problem, approach and main result.
+
+        ## Key Findings
+        - 3-5 bullet points
+
+        ## Methodology
+        A short paragraph on the research methods used.
+
+        ## Contributions
+        - One bullet per contribution, starting with its type in brackets:
+          [theoretical], [methodological], [empirical] or [practical]
+
+        ## Limitations
+        - 2-4 bullet points
+
+        ## Future Work
+        - 2-3 bullet points
+
+        ## Scores
+        Relevance: 0.0-1.0, how significant the work is for its field
+        Confidence: 0.0-1.0, how well the paper is understood
+
+        Be specific and accurate, and do not add other sections.
+        """
+
+    def _create_chunk_summary_prompt(self, chunk: str, title: str, number: int, total: int) -> str:
+        """Create prompt for summarizing one chunk of a long paper."""
+
+        return f"""
+        Summarize part {number} of {total} of the academic paper "{title}".
+
+        Keep the research question, methods, datasets, quantitative results,
+        conclusions and stated limitations that appear in this part. Preserve
+        numbers and names exactly. Do not speculate about other parts.
+
+        Respond in at most 250 words of plain text.
+
+        Part {number}:
+        {chunk}
+        """
+
+    def _create_combined_analysis_prompt(self, content: str) -> str:
+        """Create prompt asking for every analysis stage in one JSON object."""
+
+        return f"""
+        Analyze this academic paper for researchers:
+
+        {content}
+
+        Return a JSON object with this exact structure:
+        {{
+            "summary": {{
+                "executive_summary": "Two to three sentence overview of the paper",
+                "key_findings": ["Finding 1", "Finding 2", "Finding 3"],
+                "methodology_overview": "Brief description of the research methods",
+                "limitations": ["Limitation 1", "Limitation 2"],
+                "future_work": ["Future direction 1", "Future direction 2"],
+                "relevance_score": 0.8,
+                "confidence_score": 0.85
+            }},
+            "key_insights": [
+                {{"insight": "Specific insight or finding", "relevance_score": 0.9, "section": "Results", "page_number": 5}}
+            ],
+            "methodology": "Detailed analysis of research design, data collection, sample, analytical techniques, tools, experimental setup, controls and validation",
+            "limitations": "Constructive analysis of stated and implicit limitations: methodological, sample, data, scope, temporal, technical and potential biases",
+            "contributions": [
+                {{"contribution": "Specific contribution", "type": "theoretical/empirical/methodological/practical", "significance": 0.8}}
+            ]
+        }}
+
+        Guidelines:
+        - Be specific and accurate
+        - Give up to 7 key insights ranked by relevance (0.0-1.0)
+        - Limit key_findings to 3-5 items and future_work to 2-3 items
+        - Rate contribution significance from 0.0 (minor) to 1.0 (major breakthrough)
+        - Scores must be between 0.0 and 1.0
+        """
+
+    def _create_preview_prompt(self, title: str, abstract: str) -> str:
+        """Create prompt for a quick preview summary from title and abstract."""
+
+        return f"""
+        Give a quick preview of this academic paper from its title and abstract.
+
+        Title: {title}
+        Abstract: {abstract}
+
+        Return a JSON object with this exact structure:
+        {{
+            "preview": "Two sentence plain-language overview",
+            "key_findings": ["Finding 1", "Finding 2"]
+        }}
+
+        Only use claims stated in the abstract. Limit key_findings to 3 items.
+        """
+
+    def _create_question_prompt(self, question: str, title: str, passages: List[Dict[str, Any]]) -> str:
+        """Create prompt answering a question from numbered passages, in document order."""
+
+        excerpts = "\n\n".join(
+            f"[{number}] {passage['text'].strip()}"
+            for number, passage in enumerate(sorted(passages, key=lambda passage: passage["start"]), start=1)
+        )
+
+        return f"""
+        Answer the question about the academic paper "{title}" using only the excerpts below.
+        Cite the excerpts you use by their number, e.g. [2]. If the excerpts do not contain
+        the answer, say so instead of guessing.
+
+        Excerpts:
+        {excerpts}
+
+        Question: {question}
+        """
+
+    def _parse_preview(self, response_text: str) -> PaperSummary:
+        """Parse a preview response into a summary with only overview and findings filled in."""
+
+        data = json.loads(response_text)
+        return self._preview_summary(data["preview"], data.get("key_findings", [])[:3], confidence_score=0.5)
+
+    def _extractive_preview(self, abstract: str) -> PaperSummary:
+        """Build a preview from the abstract's opening sentences and its result sentences."""
+
+        sentences = [sentence.strip() for sentence in re.split(r"(?<=[.!?])\s+", abstract or "") if sentence.strip()]
+
+        findings = [
+            sentence for sentence in sentences[2:]
+            if PREVIEW_FINDING_PATTERN.search(sentence)
+        ][:3]
+
+        return self._preview_summary(" ".join(sentences[:2]), findings, confidence_score=0.3)
+
+    @staticmethod
+    def _preview_summary(overview: str, findings: List[str], confidence_score: float) -> PaperSummary:
+        """Wrap preview text in the summary schema, leaving full-analysis fields empty."""
+
+        return PaperSummary(
+            executive_summary=overview,
+            key_findings=findings,
+            methodology_overview="",
+            contributions=[],
+            limitations=[],
+            future_work=[],
+            relevance_score=0.5,
+            confidence_score=confidence_score
+        )
+
+    @staticmethod
+    def _section_event(header: str) -> Dict[str, Any]:
+        """Build the event for a streamed section header."""
+
+        title = header.lstrip("#").strip()
+        return {
+            "event": "section",
+            "data": {"section": SUMMARY_SECTIONS.get(title, title.lower().replace(" ", "_")), "title": title}
+        }
+
+    def _parse_sectioned_summary(self, response_text: str) -> PaperSummary:
+        """Parse a streamed summary's sections, leaving sections the model skipped empty."""
+
+        sections = {}
+        field = None
+        for line in response_text.splitlines():
+            if line.startswith("#"):
+                field = SUMMARY_SECTIONS.get(line.lstrip("#").strip())
+                sections.setdefault(field, [])
+            elif field and line.strip():
+                sections[field].append(line.strip())
+
+        def bullets(name: str) -> List[str]:
+            items = []
+            for line in sections.get(name, []):
+                match = SUMMARY_BULLET_PATTERN.match(line)
+                items.append(match.group(1).strip() if match else line)
+            return items
+
+        contributions = []
+        for bullet in bullets("contributions"):
+            match = CONTRIBUTION_TYPE_PATTERN.match(bullet)
+            contributions.append(PaperContribution(
+                contribution=match.group(2) if match else bullet,
+                type=match.group(1).lower() if match else "empirical",
+                significance=0.5
+            ))
+
+        scores = {
+            name.lower(): min(float(value), 1.0)
+            for name, value in SUMMARY_SCORE_PATTERN.findall("\n".join(sections.get("scores", [])))
+        }
+
+        return PaperSummary(
+            executive_summary=" ".join(sections.get("executive_summary", [])),
+            key_findings=bullets("key_findings"),
+            methodology_overview=" ".join(sections.get("methodology_overview", [])),
+            contributions=contributions,
+            limitations=bullets("limitations"),
+            future_work=bullets("future_work"),
+            relevance_score=scores.get("relevance", 0.5),
+            confidence_score=scores.get("confidence", 0.5)
+        )
+
+    def _parse_combined_analysis(self, response_text: str) -> Dict[str, Any]:
+        """Validate a combined analysis response into the stage schemas."""
+
+        try:
+            data = json.loads(response_text)
+
+            contributions = [PaperContribution(**item) for item in data["contributions"]]
+            insights = [KeyInsight(**item) for item in data["key_insights"]]
+            insights.sort(key=lambda x: x.relevance_score, reverse=True)
+
+            summary = PaperSummary(**{**data["summary"], "contributions": contributions})
+
+            methodology = data["methodology"]
+            limitations = data["limitations"]
+            if not isinstance(methodology, str) or not isinstance(limitations, str):
+                raise TypeError("methodology and limitations must be text")
+
+        except (json.JSONDecodeError, ValidationError, KeyError, TypeError) as e:
+            raise CombinedAnalysisError(f"Invalid combined analysis response: {e}") from e
+
+        return {
+            "summary": summary,
+            "key_insights": insights,
+            "methodology": methodology,
+            "limitations": limitations,
+            "contributions": contributions
+        }
+
     async def _generate_openai_summary(self, prompt: str, model: str) -> dict:
         """Generate summary using OpenAI."""
 
-        response = await self.openai_client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=1200
+        return await self.complete_chat(
+            "summarization", model, prompt, parse=json.loads, temperature=0.2, max_tokens=1200
         )
 
-        content = response.choices[0].message.content
-        return json.loads(content)
-
     async def _generate_claude_summary(self, prompt: str) -> dict:
         """Generate summary using Claude."""
 
         if not self.anthropic_client:
             raise ValueError("Anthropic client not initialized")
 
-        response = await self.anthropic_client.messages.create(
-            model="claude-3-sonnet-20240229",
-            max_tokens=1200,
-            temperature=0.2,
-            messages=[{"role": "user", "content": prompt}]
+        return await self.complete_chat(
+            "summarization", "claude-3-sonnet-20240229", prompt,
+            parse=json.loads, temperature=0.2, max_tokens=1200
+        )
+
+    async def complete_chat(
+        self,
+        operation: str,
+        model: str,
+        prompt: str,
+        parse: Optional[Callable[[str], Any]] = None,
+        **params
+    ) -> Any:
+        """Run a single-prompt chat completion through the LLM response cache.
+
+        Responses are only cached once `parse` accepts them, and a cached
+        response that no longer parses is dropped and regenerated.
+        """
+
+        provider = self._provider_for(model)
+        key = llm_cache.make_key(provider, model, prompt, params)
+
+        cached = await llm_cache.get(key, operation)
+        if cached is not None:
+            try:
+                return parse(cached) if parse else cached
+            except Exception as e:
+                ai_logger.warning(f"Dropping unparseable cached {operation} response: {e}")
+                await llm_cache.delete(key)
+
+        text, answered_provider, answered_model = await self._hedged_chat(operation, provider, model, prompt, params)
+
+        result = parse(text) if parse else text
+        if (answered_provider, answered_model) != (provider, model):
+            # A hedge or failover answer belongs to the model that produced it
+            key = llm_cache.make_key(answered_provider, answered_model, prompt, params)
+        await llm_cache.set(key, text)
+        return result
+
+    async def stream_chat(
+        self,
+        operation: str,
+        model: str,
+        prompt: str,
+        **params
+    ) -> AsyncIterator[str]:
+        """Stream a single-prompt chat completion's text as it is generated.
+
+        A provider with an open circuit fails over before the first token,
+        but a stream is not hedged or retried once it has started. Finished
+        responses are cached and replayed as a single chunk.
+        """
+
+        requested = self._provider_for(model)
+        key = llm_cache.make_key(requested, model, prompt, params)
+
+        cached = await llm_cache.get(key, operation)
+        if cached is not None:
+            yield cached
+            return
+
+        if requested not in self.providers:
+            raise ValueError(f"Chat provider '{requested}' not configured")
+
+        targets = self._chat_targets(requested, model)
+        allowed = [target for target in targets if self.breakers[target[0]].allow()]
+        provider, target_model = allowed[0] if allowed else targets[0]
+        breaker = self.breakers[provider]
+
+        await llm_rate_limiter.acquire(
+            provider, target_model, count_tokens(prompt, target_model) + params.get("max_tokens", 0)
+        )
+
+        start = time.monotonic()
+        parts = []
+        prompt_tokens = completion_tokens = None
+
+        try:
+            async for delta in self.providers[provider].stream(target_model, prompt, params):
+                prompt_tokens = delta.prompt_tokens if delta.prompt_tokens is not None else prompt_tokens
+                completion_tokens = delta.completion_tokens if delta.completion_tokens is not None else completion_tokens
+                if delta.text:
+                    parts.append(delta.text)
+                    yield delta.text
+        except (asyncio.CancelledError, GeneratorExit):
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record(False, time.monotonic() - start)
+            ai_usage.record(operation, provider, target_model, 0, 0, time.monotonic() - start, success=False)
+            raise
+
+        text = "".join(parts)
+        latency = time.monotonic() - start
+        breaker.record(True, latency)
+
+        ai_usage.record(
+            operation, provider, target_model,
+            prompt_tokens if prompt_tokens is not None else count_tokens(prompt, target_model),
+            completion_tokens if completion_tokens is not None else count_tokens(text, target_model),
+            latency
         )
+        await llm_cache.set(key, text)
+
+    def register_provider(self, name: str, provider: ChatProvider) -> None:
+        """Add or replace a chat provider, e.g. a stub for tests and benchmarks."""
+
+        self.providers[name] = provider
+        self.breakers[name] = CircuitBreaker(name)
+
+    def provider_stats(self) -> Dict[str, Any]:
+        """Get circuit breaker state per provider and hedging counts for monitoring."""
+
+        return {
+            "providers": {name: breaker.stats() for name, breaker in self.breakers.items()},
+            "hedged": self.hedge_counts["hedged"],
+            "hedges_won": self.hedge_counts["won"]
+        }
+
+    def _provider_for(self, model: str) -> str:
+        """Get the provider serving a model."""
+        return "anthropic" if model.startswith("claude") else "openai"
 
-        content = response.content[0].text
-        return json.loads(content)
+    def _chat_targets(self, provider: str, model: str) -> List[Tuple[str, str]]:
+        """Get the requested provider and model, then the configured alternate if it is available."""
+
+        targets = [(provider, model)]
+        alternate_model = settings.ai_failover_models.get(provider)
+
+        if alternate_model:
+            alternate = self._provider_for(alternate_model)
+            if alternate != provider and alternate in self.providers:
+                targets.append((alternate, alternate_model))
+
+        return targets
+
+    async def _hedged_chat(
+        self,
+        operation: str,
+        provider: str,
+        model: str,
+        prompt: str,
+        params: Dict[str, Any]
+    ) -> Tuple[str, str, str]:
+        """Send a chat request, hedging it once it runs past the usual latency.
+
+        Providers whose circuit is open are skipped in favour of the
+        alternate. A request still running after the latency percentile,
+        counted from when it was sent rather than queued on the rate limiter,
+        is duplicated on the alternate provider, or the same one without an
+        alternate, and whichever answers first wins. A request failing before
+        that is retried once on the alternate, unless it was rate limited.
+
+        Returns the text with the provider and model that answered.
+        """
+
+        if provider not in self.providers:
+            raise ValueError(f"Chat provider '{provider}' not configured")
+
+        targets = self._chat_targets(provider, model)
+        allowed = [target for target in targets if self.breakers[target[0]].allow()]
+
+        # With every circuit open, the requested provider is still tried
+        primary = allowed[0] if allowed else targets[0]
+        alternate = next((target for target in allowed if target != primary), None)
+
+        sent = asyncio.Event()
+        first = asyncio.ensure_future(self._chat_attempt(operation, *primary, prompt, params, sent=sent))
+
+        if settings.ai_hedging_enabled:
+            # Time spent waiting on our own rate limiter does not count towards the hedge delay
+            sending = asyncio.ensure_future(sent.wait())
+            try:
+                await asyncio.wait({first, sending}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                sending.cancel()
+
+            delay = self._hedge_delay(operation, *primary)
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if not done:
+                return await self._hedge(operation, first, primary, alternate or primary, delay, prompt, params)
+        else:
+            await asyncio.wait({first})
+
+        error = first.exception()
+        if error is None:
+            return (first.result(), *primary)
+
+        if alternate is None or isinstance(error, (openai.RateLimitError, anthropic.RateLimitError)):
+            raise error
+
+        ai_logger.warning(f"{operation} failed on {primary[0]}:{primary[1]}, failing over to {alternate[0]}: {error}")
+        try:
+            return (await self._chat_attempt(operation, *alternate, prompt, params), *alternate)
+        except Exception as failover_error:
+            ai_logger.warning(f"Failover of {operation} to {alternate[0]} failed too: {failover_error}")
+
+        # Report the original request's error
+        raise error
+
+    async def _hedge(
+        self,
+        operation: str,
+        first: "asyncio.Future[str]",
+        primary: Tuple[str, str],
+        hedge: Tuple[str, str],
+        delay: float,
+        prompt: str,
+        params: Dict[str, Any]
+    ) -> Tuple[str, str, str]:
+        """Race a slow request against a duplicate on the hedge target."""
+
+        ai_logger.warning(f"Hedging {operation} on {hedge[0]}:{hedge[1]} after {delay:.1f}s")
+        second = asyncio.ensure_future(self._chat_attempt(operation, *hedge, prompt, params))
+        self.hedge_counts["hedged"] += 1
+
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_counts["won"] += 1
+                            return (task.result(), *hedge)
+                        return (task.result(), *primary)
+
+            # Both failed, report the original request's error
+            return (first.result(), *primary)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _chat_attempt(
+        self,
+        operation: str,
+        provider: str,
+        model: str,
+        prompt: str,
+        params: Dict[str, Any],
+        sent: Optional[asyncio.Event] = None
+    ) -> str:
+        """Send one rate-limited chat request, recording its outcome for the breaker and hedging.
+
+        Latency is measured from when the request is sent, so queueing on the
+        rate limiter is not blamed on the provider. `sent` is set at that point.
+        """
+
+        breaker = self.breakers[provider]
+        sent_at = None
+
+        def on_send() -> None:
+            nonlocal sent_at
+            sent_at = time.monotonic()
+            if sent is not None:
+                sent.set()
+
+        try:
+            completion, latency = await self._rate_limited(
+                provider, model, count_tokens(prompt, model) + params.get("max_tokens", 0),
+                lambda: self.providers[provider].complete(model, prompt, params),
+                on_send=on_send
+            )
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            elapsed = time.monotonic() - sent_at if sent_at is not None else 0.0
+            breaker.record(False, elapsed)
+            ai_usage.record(operation, provider, model, 0, 0, elapsed, success=False)
+            raise
+
+        breaker.record(True, latency)
+        self.latencies.record(f"{provider}:{model}:{operation}", latency)
+
+        # Providers report exact counts, estimates cover responses without usage
+        ai_usage.record(
+            operation, provider, model,
+            completion.prompt_tokens if completion.prompt_tokens is not None else count_tokens(prompt, model),
+            completion.completion_tokens if completion.completion_tokens is not None
+            else count_tokens(completion.text, model),
+            latency
+        )
+        return completion.text
+
+    def _hedge_delay(self, operation: str, provider: str, model: str) -> float:
+        """Get how long to wait before hedging, from recent latencies of the same call."""
+
+        observed = self.latencies.percentile(f"{provider}:{model}:{operation}", settings.ai_hedge_percentile)
+        if observed is None:
+            return settings.ai_hedge_initial_delay
+
+        return max(observed, settings.ai_hedge_min_delay)
+
+    async def _rate_limited(
+        self,
+        provider: str,
+        model: str,
+        tokens: int,
+        call: Callable[[], Awaitable[Any]],
+        on_send: Optional[Callable[[], None]] = None
+    ) -> Tuple[Any, float]:
+        """Run a provider call within the shared rate limits, waiting out 429s.
+
+        Returns the result with the seconds its successful send took, leaving
+        out time spent waiting for capacity. `on_send` runs before each send.
+        """
+
+        for attempt in range(settings.llm_rate_limit_retries + 1):
+            await llm_rate_limiter.acquire(provider, model, tokens)
+
+            if on_send is not None:
+                on_send()
+            start = time.monotonic()
+
+            try:
+                result = await call()
+                return result, time.monotonic() - start
+            except (openai.RateLimitError, anthropic.RateLimitError) as e:
+                if attempt == settings.llm_rate_limit_retries or not settings.llm_rate_limit_enabled:
+                    raise
+                await llm_rate_limiter.block(provider, model, self._retry_after(e))
+
+    @staticmethod
+    def _retry_after(error: Exception) -> float:
+        """Get the seconds a 429 response asks to wait."""
+
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except ValueError:
+            pass  # HTTP-date hints fall back to the default
+
+        return settings.llm_rate_limit_retry_after
+
+    def _parse_key_insights(self, response_text: str) -> List[KeyInsight]:
+        """Parse key insights sorted by relevance."""
+
+        insights = [
+            KeyInsight(
+                insight=item["insight"],
+                relevance_score=item.get("relevance_score", 0.5),
+                section=item.get("section"),
+                page_number=item.get("page_number")
+            )
+            for item in json.loads(response_text)
+        ]
+
+        insights.sort(key=lambda x: x.relevance_score, reverse=True)
+        return insights
+
+    def _parse_contributions(self, response_text: str) -> List[PaperContribution]:
+        """Parse paper contributions."""
+
+        return [
+            PaperContribution(
+                contribution=item["contribution"],
+                type=item["type"],
+                significance=item.get("significance", 0.5)
+            )
+            for item in json.loads(response_text)
+        ]
 
     def _parse_summary_response(self, summary_data: dict) -> PaperSummary:
         """Parse and validate summary response."""
 
         return PaperSummary(
-            research_question=summary_data.get("research_question", ""),
-            methodology=summary_data.get("methodology", ""),
+            executive_summary=summary_data.get("executive_summary", ""),
             key_findings=summary_data.get("key_findings", []),
+            methodology_overview=summary_data.get("methodology_overview", ""),
+            contributions=[
+                PaperContribution(
+                    contribution=item["contribution"],
+                    type=item["type"],
+                    significance=item.get("significance", 0.5)
+                )
+                for item in summary_data.get("contributions", [])
+            ],
             limitations=summary_data.get("limitations", []),
-            significance=summary_data.get("significance", ""),
             future_work=summary_data.get("future_work", []),
+            relevance_score=summary_data.get("relevance_score", 0.5),
             confidence_score=summary_data.get("confidence_score", 0.5)
         )
 
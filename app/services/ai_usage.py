@@ -0,0 +1,221 @@
+"""
+Token, cost and latency accounting for AI calls.
+
+AIService reports every provider call here with the provider's own token
+counts. Each record is attributed to the user, paper and request that
+caused it, taken from a context variable that API dependencies, the
+monitoring middleware and paper processing set. Records are buffered and
+written to the ai_usage table in batches off the event loop.
+"""
+import asyncio
+import contextvars
+import threading
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.app_logging import ai_logger, log_ai_request
+from app.services.chunking import estimate_cost
+
+
+@dataclass
+class UsageTotals:
+    """Running totals for one API request."""
+    tokens: int = 0
+    cost: float = 0.0
+
+
+@dataclass
+class UsageContext:
+    """Who and what an AI call is made for."""
+    user_id: Optional[str] = None
+    paper_id: Optional[str] = None
+    request_id: Optional[str] = None
+    subscription_tier: Optional[str] = None
+    totals: Optional[UsageTotals] = field(default=None, compare=False)
+
+
+_usage_context: contextvars.ContextVar[UsageContext] = contextvars.ContextVar(
+    "ai_usage_context", default=UsageContext()
+)
+
+
+def current_usage_context() -> UsageContext:
+    """Get the attribution for AI calls made now."""
+    return _usage_context.get()
+
+
+@contextmanager
+def usage_context(**fields) -> Iterator[UsageContext]:
+    """Attribute AI calls in the block, and tasks started from it, to a user, paper or request."""
+
+    context = replace(_usage_context.get(), **{key: value for key, value in fields.items() if value is not None})
+    token = _usage_context.set(context)
+    try:
+        yield context
+    finally:
+        _usage_context.reset(token)
+
+
+def bind_usage(**fields) -> None:
+    """Attribute the rest of the current task's AI calls, e.g. from a request dependency."""
+
+    _usage_context.set(
+        replace(_usage_context.get(), **{key: value for key, value in fields.items() if value is not None})
+    )
+
+
+def _as_uuid(value: Optional[str]) -> Optional[UUID]:
+    """Convert an id to a UUID, dropping ids that are not UUIDs."""
+
+    try:
+        return UUID(str(value)) if value else None
+    except ValueError:
+        return None
+
+
+class AIUsageRecorder:
+    """Buffers usage records and writes them to the database in batches."""
+
+    def __init__(self):
+        """Initialize AI usage recorder."""
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+        # One flush timer per event loop, Celery tasks may each run on a new loop
+        self._flushers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        self._written = 0
+        self._dropped = 0
+        self._by_model: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "latency": 0.0}
+        )
+
+    def record(
+        self,
+        operation: str,
+        provider: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency: float,
+        success: bool = True
+    ) -> float:
+        """Record one provider call and return its cost in USD."""
+
+        cost = estimate_cost(model, prompt_tokens, completion_tokens) if success else 0.0
+        context = _usage_context.get()
+
+        log_ai_request(operation, model, prompt_tokens + completion_tokens, latency)
+
+        with self._lock:
+            totals = self._by_model[model]
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cost"] += cost
+            totals["latency"] += latency
+
+        if context.totals is not None:
+            context.totals.tokens += prompt_tokens + completion_tokens
+            context.totals.cost += cost
+
+        if not settings.ai_usage_enabled:
+            return cost
+
+        with self._lock:
+            self._buffer.append({
+                "user_id": _as_uuid(context.user_id),
+                "paper_id": _as_uuid(context.paper_id),
+                "request_id": context.request_id,
+                "subscription_tier": context.subscription_tier,
+                "operation": operation,
+                "provider": provider,
+                "model": model,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost": cost,
+                "latency": latency,
+                "success": success
+            })
+            full = len(self._buffer) >= settings.ai_usage_batch_size
+
+        self._schedule_flush(immediate=full)
+        return cost
+
+    async def flush(self) -> None:
+        """Write buffered records now."""
+
+        with self._lock:
+            records, self._buffer = self._buffer, []
+
+        if records:
+            await asyncio.to_thread(self._write, records)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get per-model totals for monitoring."""
+
+        with self._lock:
+            return {
+                "buffered": len(self._buffer),
+                "written": self._written,
+                "dropped": self._dropped,
+                "models": {model: dict(totals) for model, totals in self._by_model.items()}
+            }
+
+    def _schedule_flush(self, immediate: bool) -> None:
+        """Start a flush on the running loop, after the flush interval unless the buffer is full."""
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        flusher = self._flushers.get(loop)
+        if flusher is not None and not flusher.done():
+            if not immediate:
+                return
+            flusher.cancel()
+
+        # Flushes run outside the caller's context so they are not attributed to its request
+        self._flushers[loop] = loop.create_task(
+            self._flush_after(0 if immediate else settings.ai_usage_flush_interval),
+            context=contextvars.Context()
+        )
+
+    async def _flush_after(self, delay: float) -> None:
+        """Flush after a delay."""
+
+        if delay:
+            await asyncio.sleep(delay)
+        await self.flush()
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        """Insert usage records in one transaction."""
+
+        from app.db.database import SessionLocal
+        from app.db.models import AIUsage
+
+        db = SessionLocal()
+        try:
+            db.add_all([AIUsage(**record) for record in records])
+            db.commit()
+            with self._lock:
+                self._written += len(records)
+        except Exception as e:
+            db.rollback()
+            ai_logger.error(f"Failed to write {len(records)} AI usage records: {e}")
+            with self._lock:
+                self._dropped += len(records)
+        finally:
+            db.close()
+
+
+# Global AI usage recorder instance
+ai_usage = AIUsageRecorder()
@@ -24,6 +24,7 @@ celery_app.conf.update(
     task_routes={
         "app.services.celery_tasks.process_paper_task": {"queue": "paper_processing"},
         "app.services.celery_tasks.generate_embeddings_task": {"queue": "ai_processing"},
+        "app.services.celery_tasks.generate_preview_task": {"queue": "previews"},
         "app.services.celery_tasks.update_citations_task": {"queue": "citations"},
     },
 
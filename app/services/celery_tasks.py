@@ -4,6 +4,7 @@ Celery task definitions for background processing.
 import asyncio
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
+from uuid import UUID
 
 from celery import current_task
 from sqlalchemy.orm import Session
@@ -113,11 +114,18 @@ def generate_embeddings_task(self, paper_id: str, content: str):
     try:
         from app.services.ai_service import ai_service
 
-        # Generate embeddings
+        # Generate embeddings over the full text
         embeddings = run_async(ai_service.generate_embeddings(content))
 
-        # Store embeddings (you'd implement vector storage here)
-        # For now, just log success
+        db = SessionLocal()
+        try:
+            paper = db.query(Paper).filter(Paper.id == UUID(paper_id)).first()
+            if paper:
+                paper.embedding = embeddings
+                db.commit()
+        finally:
+            db.close()
+
         paper_logger.info(f"Generated embeddings for paper {paper_id}: {len(embeddings)} dimensions")
 
         return {"status": "completed", "paper_id": paper_id, "embedding_size": len(embeddings)}
@@ -127,6 +135,29 @@ def generate_embeddings_task(self, paper_id: str, content: str):
         raise
 
 
+@celery_app.task(bind=True)
+def generate_preview_task(self, paper_id: str):
+    """Write a quick title and abstract summary ahead of full processing."""
+
+    paper_logger.info(f"Generating preview summary for paper: {paper_id}")
+
+    try:
+        db = SessionLocal()
+
+        try:
+            from app.services.paper_service import paper_service
+
+            written = run_async(paper_service.generate_preview(paper_id, db))
+            return {"status": "completed" if written else "skipped", "paper_id": paper_id}
+
+        finally:
+            db.close()
+
+    except Exception as exc:
+        paper_logger.error(f"Preview generation failed for {paper_id}: {exc}")
+        raise
+
+
 @celery_app.task
 def process_pending_papers_task():
     """Process papers with pending status."""
@@ -0,0 +1,166 @@
+"""
+Token counting and token-budgeted chunking of paper text.
+"""
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.app_logging import ai_logger
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to a character estimate
+    tiktoken = None
+
+
+# Characters per token used when no tokenizer is available for the model
+CHARS_PER_TOKEN = 4
+
+# Boundaries tried in order when a piece of text is over the token budget
+SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+# Word boundaries a chunk overlap may start after
+WHITESPACE_PATTERN = re.compile(r'\s')
+
+# USD per 1K tokens as (input, output)
+MODEL_PRICES = {
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "claude-3-sonnet-20240229": (0.003, 0.015),
+    "text-embedding-3-large": (0.00013, 0.0),
+}
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """Get the tiktoken encoding for a model, or None when it cannot be loaded."""
+    if tiktoken is None or model.startswith("claude"):
+        return None
+
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+
+    except Exception as e:
+        # Encodings are downloaded on first use, which fails on offline hosts
+        ai_logger.warning(f"tiktoken encoding for {model} unavailable, estimating tokens: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4-turbo") -> int:
+    """Count the tokens `text` uses with `model`."""
+
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimate the USD cost of a request, 0.0 for unpriced models."""
+
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1000
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int,
+    model: str = "gpt-4-turbo",
+    section_index: Optional[List[Dict[str, Any]]] = None
+) -> List[str]:
+    """Split text into chunks of at most `max_tokens`, preferring section and paragraph boundaries."""
+
+    segments = _section_segments(text, section_index) if section_index else [text]
+
+    # Pack pieces greedily, starting a new chunk at a section that would overflow the current one
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for segment in segments:
+        if current and current_tokens + count_tokens(segment, model) > max_tokens:
+            chunks.append("".join(current))
+            current = []
+            current_tokens = 0
+
+        for piece in _split(segment, max_tokens, model, SEPARATORS):
+            tokens = count_tokens(piece, model)
+
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append("".join(current))
+                current = []
+                current_tokens = 0
+
+            current.append(piece)
+            current_tokens += tokens
+
+    if current:
+        chunks.append("".join(current))
+
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def chunk_spans(
+    text: str,
+    max_tokens: int,
+    model: str = "gpt-4-turbo",
+    section_index: Optional[List[Dict[str, Any]]] = None,
+    overlap_tokens: int = 0
+) -> List[Tuple[int, int]]:
+    """Split text into (start, end) spans of at most about `max_tokens`.
+
+    Each span after the first also covers up to `overlap_tokens` of the
+    text before it, starting at a word boundary, so a passage that straddles
+    a chunk boundary is whole in at least one span.
+    """
+
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+    spans = []
+    offset = 0
+
+    for chunk in chunk_text(text, max_tokens - overlap_tokens, model, section_index):
+        start = text.index(chunk, offset)
+        offset = start + len(chunk)
+
+        if overlap_tokens and spans:
+            earliest = max(spans[-1][0], start - overlap_tokens * CHARS_PER_TOKEN)
+            boundary = WHITESPACE_PATTERN.search(text, earliest, start)
+            start = boundary.end() if boundary else start
+
+        spans.append((start, offset))
+
+    return spans
+
+
+def _section_segments(text: str, section_index: List[Dict[str, Any]]) -> List[str]:
+    """Cut text at section starts."""
+
+    bounds = sorted({0, len(text)} | {section["start"] for section in section_index})
+    return [text[start:end] for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def _split(text: str, max_tokens: int, model: str, separators: tuple) -> List[str]:
+    """Split text on the coarsest separator that brings every piece under the budget."""
+
+    if count_tokens(text, model) <= max_tokens:
+        return [text]
+
+    if not separators:
+        step = max_tokens * CHARS_PER_TOKEN
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    separator = separators[0]
+    parts = text.split(separator)
+    parts = [part + separator for part in parts[:-1]] + [parts[-1]]
+
+    pieces = []
+    for part in parts:
+        if part:
+            pieces.extend(_split(part, max_tokens, model, separators[1:]))
+
+    return pieces
@@ -0,0 +1,171 @@
+"""
+Background summarization of knowledge entries.
+
+Saving an entry only schedules its summary. Entries wait out a debounce
+window, restarted by every further edit, and due entries are summarized
+together, several per LLM request. Summaries are written only if the
+entry's content is unchanged since the batch read it.
+"""
+import asyncio
+import contextvars
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.app_logging import paper_logger, log_error
+from app.db.database import SessionLocal
+from app.db.models import KnowledgeEntry
+from app.services.ai_service import ai_service
+
+
+# Entries shorter than this are not summarized
+MIN_SUMMARY_LENGTH = 500
+
+# Characters of each entry sent for summarization
+MAX_ENTRY_CHARS = 2000
+
+
+class EntrySummaryBatcher:
+    """Debounced, batched entry summaries run on the event loop that scheduled them."""
+
+    def __init__(self):
+        """Initialize entry summary batcher."""
+        self._due: Dict[str, float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self._batches = 0
+        self._summarized = 0
+        self._stale = 0
+
+    def schedule(self, entry_id: str) -> None:
+        """Summarize an entry after the debounce window, restarting the window if already queued."""
+
+        self._due[entry_id] = time.monotonic() + settings.knowledge_summary_debounce
+
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            # The worker outlives the request that started it, so its AI calls are not attributed to it
+            self._worker = loop.create_task(self._run(), context=contextvars.Context())
+        self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Summarize every queued entry now, e.g. on shutdown."""
+
+        while self._due:
+            batch = list(self._due)[:settings.knowledge_summary_batch_size]
+            for entry_id in batch:
+                del self._due[entry_id]
+            await self._summarize_batch(batch)
+
+    def stats(self) -> Dict[str, int]:
+        """Get batcher statistics."""
+
+        return {
+            "queued": len(self._due),
+            "batches": self._batches,
+            "summarized": self._summarized,
+            "stale": self._stale
+        }
+
+    async def _run(self) -> None:
+        """Wait for entries to come due and summarize them in batches until the queue is empty."""
+
+        while self._due:
+            self._wakeup.clear()
+            now = time.monotonic()
+            due = [entry_id for entry_id, due_at in self._due.items() if due_at <= now]
+
+            if not due:
+                # Sleep until the next entry is due, or a new edit arrives
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(self._due.values()) - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = due[:settings.knowledge_summary_batch_size]
+            for entry_id in batch:
+                del self._due[entry_id]
+
+            try:
+                await self._summarize_batch(batch)
+            except Exception as e:
+                paper_logger.error(f"Failed to summarize knowledge entries: {e}")
+                log_error(e, {"entry_ids": batch})
+
+    async def _summarize_batch(self, entry_ids: List[str]) -> None:
+        """Summarize a batch of entries in one request and store the results."""
+
+        db = SessionLocal()
+        try:
+            entries = db.query(KnowledgeEntry).filter(
+                KnowledgeEntry.id.in_([UUID(entry_id) for entry_id in entry_ids])
+            ).all()
+            entries = [entry for entry in entries if len(entry.content or "") > MIN_SUMMARY_LENGTH]
+            if not entries:
+                return
+
+            versions = {str(entry.id): self._content_hash(entry.content) for entry in entries}
+            summaries = await ai_service.complete_chat(
+                "entry_summary", "gpt-3.5-turbo", self._create_batch_prompt(entries),
+                parse=self._parse_summaries, temperature=0.3, max_tokens=120 * len(entries),
+                response_format={"type": "json_object"}
+            )
+            self._batches += 1
+
+            for entry in entries:
+                # Read the current content, the entry may have been edited during the request
+                db.refresh(entry)
+                entry_id = str(entry.id)
+
+                if self._content_hash(entry.content) != versions[entry_id]:
+                    self._stale += 1
+                    continue
+
+                if summaries.get(entry_id):
+                    entry.summary = summaries[entry_id]
+                    self._summarized += 1
+
+            db.commit()
+            paper_logger.info(f"Summarized {len(summaries)} knowledge entries in one request")
+
+        finally:
+            db.close()
+
+    def _create_batch_prompt(self, entries: List[KnowledgeEntry]) -> str:
+        """Create prompt summarizing several entries at once."""
+
+        blocks = "\n\n".join(
+            f'Entry "{entry.id}":\n{entry.content[:MAX_ENTRY_CHARS]}' for entry in entries
+        )
+
+        return f"""
+        Summarize each knowledge entry below in 1-2 sentences, focusing on its key points.
+        Make each summary concise but informative.
+
+        {blocks}
+
+        Return a JSON object mapping each entry id to its summary:
+        {{"summaries": {{"<entry id>": "Summary"}}}}
+        """
+
+    @staticmethod
+    def _parse_summaries(response_text: str) -> Dict[str, str]:
+        """Parse summaries keyed by entry id."""
+
+        summaries = json.loads(response_text)["summaries"]
+        return {str(entry_id): str(summary).strip() for entry_id, summary in summaries.items()}
+
+    @staticmethod
+    def _content_hash(content: Optional[str]) -> str:
+        """Hash entry content to detect edits."""
+        return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+# Global entry summary batcher instance
+entry_summarizer = EntrySummaryBatcher()
@@ -10,7 +10,7 @@ from sqlalchemy import and_, or_, desc
 
 from app.db.models import KnowledgeEntry, EntryType
 from app.schemas.knowledge import KnowledgeEntryCreate, KnowledgeEntryUpdate, KnowledgeSearchRequest
-from app.services.ai_service import ai_service
+from app.services.entry_summarizer import entry_summarizer, MIN_SUMMARY_LENGTH
 from app.core.app_logging import paper_logger, log_error
 
 
@@ -84,15 +84,9 @@ class KnowledgeService:
             db.commit()
             db.refresh(entry)
 
-            # Generate AI summary for longer entries
-            if len(entry_data.content) > 500:
-                try:
-                    summary = await self._generate_entry_summary(entry_data.content)
-                    entry.summary = summary
-                    db.commit()
-                    db.refresh(entry)
-                except Exception as e:
-                    paper_logger.warning(f"Failed to generate summary for entry {entry.id}: {e}")
+            # Longer entries are summarized in the background
+            if len(entry_data.content) > MIN_SUMMARY_LENGTH:
+                entry_summarizer.schedule(str(entry.id))
 
             paper_logger.info(f"Created knowledge entry {entry.id} for user {user_id}")
             return entry
@@ -149,17 +143,13 @@ class KnowledgeService:
 
             entry.updated_at = datetime.utcnow()
 
-            # Regenerate summary if content was updated
-            if "content" in update_data and len(entry.content) > 500:
-                try:
-                    summary = await self._generate_entry_summary(entry.content)
-                    entry.summary = summary
-                except Exception as e:
-                    paper_logger.warning(f"Failed to update summary for entry {entry.id}: {e}")
-
             db.commit()
             db.refresh(entry)
 
+            # Regenerate summary in the background if content was updated
+            if "content" in update_data and len(entry.content) > MIN_SUMMARY_LENGTH:
+                entry_summarizer.schedule(str(entry.id))
+
             paper_logger.info(f"Updated knowledge entry {entry_id} for user {user_id}")
             return entry
 
@@ -372,41 +362,6 @@ class KnowledgeService:
             log_error(e, {"entry_id": entry_id, "user_id": user_id})
             return []
 
-    async def _generate_entry_summary(self, content: str) -> str:
-        """Generate AI summary for knowledge entry."""
-
-        try:
-            # Create prompt for summarization
-            prompt = f"""
-            Summarize this knowledge entry in 1-2 sentences, focusing on the key points:
-
-            {content[:2000]}  # Limit content length
-
-            Make the summary concise but informative.
-            """
-
-            # Use AI service to generate summary
-            from openai import AsyncOpenAI
-            from app.core.config import settings
-
-            client = AsyncOpenAI(api_key=settings.openai_api_key)
-
-            response = await client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=100
-            )
-
-            summary = response.choices[0].message.content.strip()
-
-            paper_logger.info("Generated summary for knowledge entry")
-            return summary
-
-        except Exception as e:
-            paper_logger.error(f"Failed to generate entry summary: {e}")
-            return ""
-
 
 # Global knowledge service instance
 knowledge_service = KnowledgeService()
\ No newline at end of file
@@ -0,0 +1,347 @@
+"""
+Persistent cache for LLM responses and embeddings.
+
+Entries are keyed by the SHA-256 of the provider, model, request and
+generation parameters, so any change to the prompt or settings is a miss.
+Redis is used when reachable; otherwise entries go to local disk:
+
+    <root>/<key[:2]>/<key>.json   -> {"created_at": ..., "value": ...}
+
+Both backends expire entries after `llm_cache_ttl` seconds and evict the
+least recently used entries once their size limit is reached.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.app_logging import ai_logger
+from app.utils.files import atomic_write
+
+
+KEY_PREFIX = "llm_cache:"
+INDEX_KEY = "llm_cache:index"  # Sorted set of keys scored by last access time
+
+# Seconds before Redis is tried again after a connection failure
+REDIS_RETRY_SECONDS = 30
+
+# Disk eviction scans the whole directory, so it runs every N writes
+DISK_EVICT_INTERVAL = 50
+
+
+class LLMResponseCache:
+    """Redis-backed LLM response cache with an on-disk fallback."""
+
+    def __init__(self, redis_url: str = None, root: str = None):
+        """Initialize LLM response cache."""
+        self.redis_url = redis_url or settings.redis_url
+        self.root = root or settings.llm_cache_dir
+        self._lock = threading.Lock()
+
+        # redis.asyncio connections are bound to the loop that opened them
+        self._redis_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._redis_retry_at = 0.0
+
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._evictions = 0
+        self._backend_errors = 0
+        self._disk_writes = 0
+
+    @staticmethod
+    def make_key(provider: str, model: str, request: Any, params: Dict[str, Any] = None) -> str:
+        """Build the cache key for one LLM request."""
+
+        payload = json.dumps(
+            {"provider": provider, "model": model, "request": request, "params": params or {}},
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str, operation: str) -> Optional[Any]:
+        """Get a cached value, counting the lookup under `operation`."""
+
+        if not settings.llm_cache_enabled:
+            return None
+
+        value = None
+        client = self._redis()
+
+        if client is not None:
+            try:
+                raw = await client.get(KEY_PREFIX + key)
+                if raw is not None:
+                    await client.zadd(INDEX_KEY, {key: time.time()})
+                    value = json.loads(raw)
+            except (RedisError, OSError) as e:
+                self._redis_failed(e)
+                value = await asyncio.to_thread(self._disk_get, key)
+        else:
+            value = await asyncio.to_thread(self._disk_get, key)
+
+        with self._lock:
+            counter = self._hits if value is not None else self._misses
+            counter[operation] = counter.get(operation, 0) + 1
+
+        return value
+
+    async def get_many(self, keys: List[str], operation: str) -> Dict[str, Any]:
+        """Get cached values for several keys in one round trip, returning only the hits."""
+
+        if not settings.llm_cache_enabled or not keys:
+            return {}
+
+        values = None
+        client = self._redis()
+
+        if client is not None:
+            try:
+                raws = await client.mget([KEY_PREFIX + key for key in keys])
+                values = {key: json.loads(raw) for key, raw in zip(keys, raws) if raw is not None}
+                if values:
+                    now = time.time()
+                    await client.zadd(INDEX_KEY, {key: now for key in values})
+            except (RedisError, OSError) as e:
+                self._redis_failed(e)
+                values = None
+
+        if values is None:
+            values = await asyncio.to_thread(self._disk_get_many, keys)
+
+        with self._lock:
+            self._hits[operation] = self._hits.get(operation, 0) + len(values)
+            self._misses[operation] = self._misses.get(operation, 0) + len(keys) - len(values)
+
+        return values
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value."""
+        await self.set_many({key: value})
+
+    async def set_many(self, items: Dict[str, Any]) -> None:
+        """Store several JSON-serializable values in one round trip."""
+
+        if not settings.llm_cache_enabled or not items:
+            return
+
+        client = self._redis()
+
+        if client is not None:
+            try:
+                await self._redis_set(client, items)
+                return
+            except (RedisError, OSError) as e:
+                self._redis_failed(e)
+
+        await asyncio.to_thread(self._disk_set_many, items)
+
+    async def delete(self, key: str) -> None:
+        """Remove an entry, e.g. one that no longer parses."""
+
+        client = self._redis()
+
+        if client is not None:
+            try:
+                await client.delete(KEY_PREFIX + key)
+                await client.zrem(INDEX_KEY, key)
+                return
+            except (RedisError, OSError) as e:
+                self._redis_failed(e)
+
+        try:
+            os.unlink(self._disk_path(key))
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters per operation for monitoring."""
+
+        with self._lock:
+            hits = sum(self._hits.values())
+            misses = sum(self._misses.values())
+            operations = {}
+
+            for operation in sorted(set(self._hits) | set(self._misses)):
+                op_hits = self._hits.get(operation, 0)
+                op_lookups = op_hits + self._misses.get(operation, 0)
+                operations[operation] = {
+                    "hits": op_hits,
+                    "misses": op_lookups - op_hits,
+                    "hit_rate": round(op_hits / op_lookups, 3) if op_lookups else 0.0
+                }
+
+            return {
+                "enabled": settings.llm_cache_enabled,
+                "backend": "disk" if time.monotonic() < self._redis_retry_at else "redis",
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                "evictions": self._evictions,
+                "backend_errors": self._backend_errors,
+                "operations": operations
+            }
+
+    # Redis backend
+    def _redis(self) -> Optional[aioredis.Redis]:
+        """Get the Redis client for the running loop, or None while Redis is unavailable."""
+
+        if time.monotonic() < self._redis_retry_at:
+            return None
+
+        loop = asyncio.get_running_loop()
+        client = self._redis_clients.get(loop)
+
+        if client is None:
+            client = aioredis.from_url(self.redis_url, socket_connect_timeout=1, socket_timeout=2)
+            self._redis_clients[loop] = client
+
+        return client
+
+    async def _redis_set(self, client: aioredis.Redis, items: Dict[str, Any]) -> None:
+        """Store values in Redis and trim the index to the entry limit."""
+
+        now = time.time()
+        pipe = client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(KEY_PREFIX + key, json.dumps(value), ex=settings.llm_cache_ttl)
+        pipe.zadd(INDEX_KEY, {key: now for key in items})
+        await pipe.execute()
+
+        # Expired entries still sit in the index, so trim by count and drop them too
+        overflow = await client.zcard(INDEX_KEY) - settings.llm_cache_max_entries
+        if overflow > 0:
+            evicted = [member for member, _ in await client.zpopmin(INDEX_KEY, overflow)]
+            await client.delete(*(KEY_PREFIX + member.decode() for member in evicted))
+            with self._lock:
+                self._evictions += len(evicted)
+
+    def _redis_failed(self, error: Exception) -> None:
+        """Switch to the disk backend for a while after a Redis error."""
+
+        ai_logger.warning(f"LLM cache Redis unavailable, using disk for {REDIS_RETRY_SECONDS}s: {error}")
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        self._redis_clients = weakref.WeakKeyDictionary()
+
+        with self._lock:
+            self._backend_errors += 1
+
+    # Disk backend
+    def _disk_path(self, key: str) -> str:
+        """Get path of one disk entry."""
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def _disk_get(self, key: str) -> Optional[Any]:
+        """Read a disk entry, dropping it once expired."""
+
+        path = self._disk_path(key)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if time.time() - entry["created_at"] > settings.llm_cache_ttl:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            return None
+
+        # File mtimes double as LRU access times
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        return entry["value"]
+
+    def _disk_get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Read several disk entries, returning only the hits."""
+
+        values = {}
+        for key in keys:
+            value = self._disk_get(key)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def _disk_set_many(self, items: Dict[str, Any]) -> None:
+        """Write several disk entries."""
+
+        for key, value in items.items():
+            self._disk_set(key, value)
+
+    def _disk_set(self, key: str, value: Any) -> None:
+        """Write a disk entry atomically, evicting periodically."""
+
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        atomic_write(path, json.dumps({"created_at": time.time(), "value": value}).encode("utf-8"))
+
+        with self._lock:
+            self._disk_writes += 1
+            evict = self._disk_writes % DISK_EVICT_INTERVAL == 0
+
+        if evict:
+            self.evict_disk()
+
+    def evict_disk(self) -> int:
+        """Remove expired and least recently used disk entries until the size limit is met."""
+
+        entries = self._scan_disk()
+        total_size = sum(size for _, _, size in entries)
+        expire_before = time.time() - settings.llm_cache_ttl
+        evicted = 0
+
+        for path, accessed, size in sorted(entries, key=lambda entry: entry[1]):
+            if total_size <= settings.llm_cache_max_disk_bytes and accessed >= expire_before:
+                break
+
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            total_size -= size
+            evicted += 1
+
+        if evicted:
+            with self._lock:
+                self._evictions += evicted
+            ai_logger.info(f"Evicted {evicted} entries from LLM disk cache")
+
+        return evicted
+
+    def _scan_disk(self) -> List[Tuple[str, float, int]]:
+        """List disk entries as (path, last access time, size in bytes)."""
+
+        entries = []
+
+        if not os.path.isdir(self.root):
+            return entries
+
+        for prefix in os.scandir(self.root):
+            if not prefix.is_dir():
+                continue
+
+            for entry in os.scandir(prefix.path):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_mtime, stat.st_size))
+
+        return entries
+
+
+# Global LLM response cache instance
+llm_cache = LLMResponseCache()
@@ -0,0 +1,330 @@
+"""
+Chat completion providers behind AIService.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+@dataclass
+class ChatCompletion:
+    """Response text with the provider-reported token counts, when given."""
+    text: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
+def _token_count(value: Any) -> Optional[int]:
+    """Get a reported token count, or None when the provider gave none."""
+    return value if isinstance(value, int) else None
+
+
+class ChatProvider:
+    """Interface for chat completion providers."""
+
+    name = "base"
+
+    async def complete(self, model: str, prompt: str, params: Dict[str, Any]) -> ChatCompletion:
+        """Send a single-prompt chat request and return the response."""
+        raise NotImplementedError
+
+    async def stream(self, model: str, prompt: str, params: Dict[str, Any]) -> AsyncIterator[ChatCompletion]:
+        """Stream the response as text deltas, token counts arriving on whichever delta reports them.
+
+        Providers without streaming send the whole response as one delta.
+        """
+        yield await self.complete(model, prompt, params)
+
+
+class OpenAIChatProvider(ChatProvider):
+    """Chat completions through the OpenAI API."""
+
+    name = "openai"
+
+    def __init__(self, client):
+        """Initialize with an AsyncOpenAI client."""
+        self.client = client
+
+    async def complete(self, model: str, prompt: str, params: Dict[str, Any]) -> ChatCompletion:
+        """Send a chat completion request."""
+
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            **params
+        )
+        usage = getattr(response, "usage", None)
+        return ChatCompletion(
+            response.choices[0].message.content,
+            _token_count(getattr(usage, "prompt_tokens", None)),
+            _token_count(getattr(usage, "completion_tokens", None))
+        )
+
+    async def stream(self, model: str, prompt: str, params: Dict[str, Any]) -> AsyncIterator[ChatCompletion]:
+        """Stream a chat completion, with usage reported on the final chunk."""
+
+        chunks = await self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+            stream_options={"include_usage": True},
+            **params
+        )
+
+        async for chunk in chunks:
+            usage = getattr(chunk, "usage", None)
+            yield ChatCompletion(
+                (chunk.choices[0].delta.content or "") if chunk.choices else "",
+                _token_count(getattr(usage, "prompt_tokens", None)),
+                _token_count(getattr(usage, "completion_tokens", None))
+            )
+
+
+class AnthropicChatProvider(ChatProvider):
+    """Chat completions through the Anthropic messages API."""
+
+    name = "anthropic"
+
+    # OpenAI-only parameters dropped when a request fails over to Anthropic
+    UNSUPPORTED_PARAMS = ("response_format",)
+
+    def __init__(self, client):
+        """Initialize with an AsyncAnthropic client."""
+        self.client = client
+
+    async def complete(self, model: str, prompt: str, params: Dict[str, Any]) -> ChatCompletion:
+        """Send a messages request."""
+
+        if not self.client:
+            raise ValueError("Anthropic client not initialized")
+
+        response = await self.client.messages.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            **{key: value for key, value in params.items() if key not in self.UNSUPPORTED_PARAMS}
+        )
+        usage = getattr(response, "usage", None)
+        return ChatCompletion(
+            response.content[0].text,
+            _token_count(getattr(usage, "input_tokens", None)),
+            _token_count(getattr(usage, "output_tokens", None))
+        )
+
+    async def stream(self, model: str, prompt: str, params: Dict[str, Any]) -> AsyncIterator[ChatCompletion]:
+        """Stream a messages request, with input tokens reported at the start and output tokens at the end."""
+
+        if not self.client:
+            raise ValueError("Anthropic client not initialized")
+
+        events = await self.client.messages.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+            **{key: value for key, value in params.items() if key not in self.UNSUPPORTED_PARAMS}
+        )
+
+        async for event in events:
+            if event.type == "message_start":
+                yield ChatCompletion("", _token_count(getattr(event.message.usage, "input_tokens", None)))
+            elif event.type == "content_block_delta":
+                yield ChatCompletion(getattr(event.delta, "text", ""))
+            elif event.type == "message_delta":
+                yield ChatCompletion("", completion_tokens=_token_count(getattr(event.usage, "output_tokens", None)))
+
+
+class FakeProviderError(Exception):
+    """Simulated provider failure."""
+    pass
+
+
+class FakeChatProvider(ChatProvider):
+    """Offline provider for load tests, answering with schema-valid responses after simulated latency.
+
+    Responses depend only on the prompt, so runs are repeatable; latency and
+    failures are drawn from a generator seeded with `seed`.
+    """
+
+    name = "fake"
+
+    LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+    WORDS = (
+        "model data results method training evaluation baseline dataset accuracy "
+        "analysis approach performance network sample experiment significant"
+    ).split()
+
+    def __init__(
+        self,
+        latency: float = 1.0,
+        latency_spread: float = 0.5,
+        distribution: str = "lognormal",
+        output_tokens: int = 300,
+        failure_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        seed: Optional[int] = 0
+    ):
+        """Initialize fake provider.
+
+        `latency` is the median seconds per call; `latency_spread` is the
+        half-width for "uniform" and sigma for "lognormal".
+        """
+        if distribution not in self.LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Latency distribution must be one of {', '.join(self.LATENCY_DISTRIBUTIONS)}")
+
+        self.latency = latency
+        self.latency_spread = latency_spread
+        self.distribution = distribution
+        self.output_tokens = output_tokens
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self._rng = random.Random(seed)
+
+        self.calls = 0
+        self.failures = 0
+        self.tokens = 0
+
+    async def complete(self, model: str, prompt: str, params: Dict[str, Any]) -> ChatCompletion:
+        """Sleep for a sampled latency, then fail or answer the prompt."""
+
+        self.calls += 1
+        delay = self._sample_latency()
+        failed = self._rng.random() < self.failure_rate
+        malformed = self._rng.random() < self.malformed_rate
+
+        await asyncio.sleep(delay)
+
+        if failed:
+            self.failures += 1
+            raise FakeProviderError(f"Simulated {model} failure after {delay:.2f}s")
+
+        text = self.respond(prompt, params.get("max_tokens") or self.output_tokens)
+        if malformed:
+            text = text[:len(text) // 2]
+
+        self.tokens += len(text) // 4
+        return ChatCompletion(text, len(prompt) // 4, len(text) // 4)
+
+    async def stream(self, model: str, prompt: str, params: Dict[str, Any]) -> AsyncIterator[ChatCompletion]:
+        """Answer the prompt a few words at a time, spreading the sampled latency over the deltas."""
+
+        self.calls += 1
+        delay = self._sample_latency()
+        failed = self._rng.random() < self.failure_rate
+
+        text = self.respond(prompt, params.get("max_tokens") or self.output_tokens)
+        pieces = re.findall(r"\S+\s*|\s+", text)
+        pieces = ["".join(pieces[i:i + 4]) for i in range(0, len(pieces), 4)]
+
+        # Time to first token is a share of the latency like any other delta
+        for number, piece in enumerate(pieces):
+            await asyncio.sleep(delay / (len(pieces) + 1))
+
+            if failed and number == len(pieces) // 2:
+                self.failures += 1
+                raise FakeProviderError(f"Simulated {model} failure mid-stream")
+
+            yield ChatCompletion(piece)
+
+        self.tokens += len(text) // 4
+        yield ChatCompletion("", len(prompt) // 4, len(text) // 4)
+
+    def respond(self, prompt: str, max_tokens: int) -> str:
+        """Build the response a real model would give to one of AIService's prompts."""
+
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+        words = max(20, min(self.output_tokens, max_tokens) * 3 // 4)
+
+        def text(share: float) -> str:
+            return " ".join(rng.choice(self.WORDS) for _ in range(max(3, int(words * share)))).capitalize() + "."
+
+        def score() -> float:
+            return round(rng.uniform(0.5, 1.0), 2)
+
+        def insights(count: int, share: float) -> List[Dict[str, Any]]:
+            return [
+                {"insight": text(share), "relevance_score": score(), "section": "Results", "page_number": i + 1}
+                for i in range(count)
+            ]
+
+        def contributions(count: int, share: float) -> List[Dict[str, Any]]:
+            return [
+                {"contribution": text(share), "type": rng.choice(["theoretical", "empirical", "methodological"]),
+                 "significance": score()}
+                for _ in range(count)
+            ]
+
+        if '"key_insights"' in prompt:
+            return json.dumps({
+                "summary": {
+                    "executive_summary": text(0.1),
+                    "key_findings": [text(0.05) for _ in range(3)],
+                    "methodology_overview": text(0.05),
+                    "limitations": [text(0.03) for _ in range(2)],
+                    "future_work": [text(0.03) for _ in range(2)],
+                    "relevance_score": score(),
+                    "confidence_score": score()
+                },
+                "key_insights": insights(5, 0.03),
+                "methodology": text(0.2),
+                "limitations": text(0.15),
+                "contributions": contributions(3, 0.03)
+            })
+
+        if "## Executive Summary" in prompt:
+            return "\n\n".join([
+                f"## Executive Summary\n{text(0.15)}",
+                "## Key Findings\n" + "\n".join(f"- {text(0.05)}" for _ in range(3)),
+                f"## Methodology\n{text(0.1)}",
+                "## Contributions\n" + "\n".join(
+                    f"- [{rng.choice(['theoretical', 'empirical', 'methodological'])}] {text(0.04)}" for _ in range(2)
+                ),
+                "## Limitations\n" + "\n".join(f"- {text(0.04)}" for _ in range(2)),
+                "## Future Work\n" + "\n".join(f"- {text(0.04)}" for _ in range(2)),
+                f"## Scores\nRelevance: {score()}\nConfidence: {score()}"
+            ])
+
+        if '"summaries"' in prompt:
+            return json.dumps({"summaries": {
+                entry_id: text(0.1) for entry_id in re.findall(r'Entry "([^"]+)":', prompt)
+            }})
+
+        if '"preview"' in prompt:
+            return json.dumps({"preview": text(0.2), "key_findings": [text(0.1) for _ in range(2)]})
+
+        if '"executive_summary"' in prompt:
+            return json.dumps({
+                "executive_summary": text(0.1),
+                "key_findings": [text(0.05) for _ in range(3)],
+                "methodology_overview": text(0.1),
+                "contributions": contributions(2, 0.04),
+                "limitations": [text(0.05) for _ in range(2)],
+                "future_work": [text(0.05) for _ in range(2)],
+                "relevance_score": score(),
+                "confidence_score": score()
+            })
+
+        if '"insight"' in prompt:
+            return json.dumps(insights(5, 0.15))
+
+        if '"contribution"' in prompt:
+            return json.dumps(contributions(3, 0.25))
+
+        return text(1.0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get call counts for benchmark reports."""
+
+        return {"calls": self.calls, "failures": self.failures, "tokens": self.tokens}
+
+    def _sample_latency(self) -> float:
+        """Draw one call's latency in seconds."""
+
+        if self.distribution == "fixed":
+            return self.latency
+        if self.distribution == "uniform":
+            return max(0.0, self._rng.uniform(self.latency - self.latency_spread, self.latency + self.latency_spread))
+        return self._rng.lognormvariate(0, self.latency_spread) * self.latency
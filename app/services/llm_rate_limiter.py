@@ -0,0 +1,217 @@
+"""
+Cluster-wide token-bucket rate limiter for LLM providers.
+
+Every API and Celery worker draws from the same Redis buckets, so the
+provider's requests/min and tokens/min budgets hold across the cluster.
+Each scope ("openai" or "openai:gpt-4-turbo") has a request bucket and a
+token bucket, refilled continuously up to one minute of capacity:
+
+    llm_rate:<scope>:requests   -> {"level": ..., "ts": ...}
+    llm_rate:<scope>:tokens     -> {"level": ..., "ts": ...}
+    llm_rate:<provider>:<model>:blocked -> Redis time in ms until which a 429 holds calls
+
+Checks run as Lua scripts against Redis time, so they are atomic and
+independent of worker clock skew. If Redis is unavailable the limiter
+lets calls through rather than stalling processing.
+"""
+import asyncio
+import random
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.app_logging import ai_logger
+
+
+KEY_PREFIX = "llm_rate:"
+
+# Seconds before Redis is tried again after a connection failure
+REDIS_RETRY_SECONDS = 30
+
+# Longest single sleep while waiting, so freed capacity is noticed promptly
+MAX_SLEEP_SECONDS = 5.0
+
+# KEYS: bucket hashes, then the blocked key
+# ARGV: bucket count, force flag, then capacity, refill per ms and cost per bucket
+# Returns 0 once the cost is deducted, otherwise the wait in ms
+ACQUIRE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local count = tonumber(ARGV[1])
+local force = ARGV[2] == '1'
+local wait = 0
+
+for i = count + 1, #KEYS do
+    local blocked = tonumber(redis.call('GET', KEYS[i]) or '0')
+    if blocked > now then
+        wait = math.max(wait, blocked - now)
+    end
+end
+
+local levels = {}
+for i = 1, count do
+    local capacity = tonumber(ARGV[i * 3])
+    local rate = tonumber(ARGV[i * 3 + 1])
+    local cost = math.min(tonumber(ARGV[i * 3 + 2]), capacity)
+    local state = redis.call('HMGET', KEYS[i], 'level', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+
+    level = math.min(capacity, level + math.max(0, now - ts) * rate)
+    levels[i] = level
+
+    if cost > level then
+        wait = math.max(wait, math.ceil((cost - level) / rate))
+    end
+end
+
+if wait > 0 and not force then
+    return wait
+end
+
+for i = 1, count do
+    local capacity = tonumber(ARGV[i * 3])
+    local rate = tonumber(ARGV[i * 3 + 1])
+    local cost = math.min(tonumber(ARGV[i * 3 + 2]), capacity)
+    redis.call('HSET', KEYS[i], 'level', tostring(levels[i] - cost), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[i], math.ceil(capacity / rate) + 60000)
+end
+
+return 0
+"""
+
+# KEYS: blocked keys; ARGV: block duration in ms
+BLOCK_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local blocked_until = now + tonumber(ARGV[1])
+
+for i = 1, #KEYS do
+    local current = tonumber(redis.call('GET', KEYS[i]) or '0')
+    if blocked_until > current then
+        redis.call('SET', KEYS[i], blocked_until, 'PX', ARGV[1])
+    end
+end
+
+return blocked_until
+"""
+
+
+class LLMRateLimiter:
+    """Redis-backed requests/min and tokens/min budgets per provider and model."""
+
+    def __init__(self, redis_url: str = None):
+        """Initialize LLM rate limiter."""
+        self.redis_url = redis_url or settings.redis_url
+
+        # redis.asyncio connections are bound to the loop that opened them
+        self._redis_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._redis_retry_at = 0.0
+
+    async def acquire(self, provider: str, model: str, tokens: int) -> float:
+        """Wait until one request of `tokens` tokens fits every budget, then take it.
+
+        Returns the seconds spent waiting. After `llm_rate_limit_max_wait`
+        the request is let through anyway and the budget goes into debt.
+        """
+
+        if not settings.llm_rate_limit_enabled:
+            return 0.0
+
+        keys, args = self._bucket_args(provider, model, tokens)
+
+        waited = 0.0
+        while True:
+            force = waited >= settings.llm_rate_limit_max_wait
+            wait_ms = await self._run("acquire", keys, [len(args) // 3, int(force)] + args)
+
+            if not wait_ms:
+                if waited:
+                    ai_logger.info(f"Waited {waited:.1f}s for {provider}:{model} rate limit capacity")
+                return waited
+
+            # Jitter spreads out workers that were waiting on the same refill
+            delay = min(wait_ms / 1000, MAX_SLEEP_SECONDS) * random.uniform(1.0, 1.2)
+            await asyncio.sleep(delay)
+            waited += delay
+
+    async def block(self, provider: str, model: str, retry_after: float) -> None:
+        """Hold all calls to a provider model for `retry_after` seconds after a 429."""
+
+        if not settings.llm_rate_limit_enabled:
+            return
+
+        ai_logger.warning(f"{provider}:{model} rate limited, blocking for {retry_after:.1f}s")
+        # Provider 429s are per model, so only the model is held
+        await self._run("block", [self._blocked_key(provider, model)], [max(1, int(retry_after * 1000))])
+
+    def _scopes(self, provider: str, model: str) -> List[Tuple[str, Optional[Dict[str, int]]]]:
+        """Get the provider and provider:model scopes with their configured limits."""
+
+        return [
+            (provider, settings.llm_rate_limits.get(provider)),
+            (f"{provider}:{model}", settings.llm_rate_limits.get(f"{provider}:{model}"))
+        ]
+
+    def _bucket_args(self, provider: str, model: str, tokens: int) -> Tuple[List[str], List]:
+        """Build script keys and per-bucket arguments for the configured limits."""
+
+        keys = []
+        args = []
+
+        for scope, limits in self._scopes(provider, model):
+            for bucket, cost in (("requests", 1), ("tokens", tokens)):
+                per_minute = (limits or {}).get("rpm" if bucket == "requests" else "tpm")
+                if per_minute:
+                    keys.append(f"{KEY_PREFIX}{scope}:{bucket}")
+                    args.extend([per_minute, per_minute / 60000, cost])
+
+        return keys + [self._blocked_key(provider, model)], args
+
+    def _blocked_key(self, provider: str, model: str) -> str:
+        """Get the key holding a model's 429 block."""
+        return f"{KEY_PREFIX}{provider}:{model}:blocked"
+
+    async def _run(self, script: str, keys: List[str], args: List) -> int:
+        """Run a limiter script, treating an unavailable Redis as no limit."""
+
+        scripts = self._redis()
+        if scripts is None:
+            return 0
+
+        try:
+            return int(await scripts[script](keys=keys, args=args))
+        except (RedisError, OSError) as e:
+            ai_logger.warning(f"LLM rate limiter Redis unavailable, not limiting for {REDIS_RETRY_SECONDS}s: {e}")
+            self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+            self._redis_clients = weakref.WeakKeyDictionary()
+            return 0
+
+    def _redis(self) -> Optional[Dict[str, Any]]:
+        """Get the registered scripts for the running loop, or None while Redis is unavailable."""
+
+        if time.monotonic() < self._redis_retry_at:
+            return None
+
+        loop = asyncio.get_running_loop()
+        scripts = self._redis_clients.get(loop)
+
+        if scripts is None:
+            client = aioredis.from_url(self.redis_url, socket_connect_timeout=1, socket_timeout=2)
+            scripts = {
+                "acquire": client.register_script(ACQUIRE_SCRIPT),
+                "block": client.register_script(BLOCK_SCRIPT)
+            }
+            self._redis_clients[loop] = scripts
+
+        return scripts
+
+
+# Global LLM rate limiter instance
+llm_rate_limiter = LLMRateLimiter()
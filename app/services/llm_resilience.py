@@ -0,0 +1,144 @@
+"""
+Latency tracking and circuit breaking for LLM providers.
+
+`LatencyTracker` keeps recent latencies per provider, model and operation
+so AIService can hedge a request once it runs past a high percentile.
+`CircuitBreaker` opens when a provider's recent error rate or share of
+slow responses crosses its threshold, routing traffic to the alternate
+provider until a trial request after the cooldown succeeds.
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.app_logging import ai_logger
+
+
+# Latencies kept per key, and the minimum before percentiles are trusted
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+class LatencyTracker:
+    """Rolling latency percentiles per key."""
+
+    def __init__(self):
+        """Initialize latency tracker."""
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float) -> None:
+        """Record one successful call's latency."""
+
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+    def percentile(self, key: str, percent: float) -> Optional[float]:
+        """Get a latency percentile, or None until enough calls were recorded."""
+
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+
+        rank = max(0, math.ceil(percent / 100 * len(samples)) - 1)
+        return samples[rank]
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a time window of call outcomes."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str):
+        """Initialize circuit breaker."""
+        self.name = name
+        self.state = self.CLOSED
+        self._outcomes: Deque[Tuple[float, bool, float]] = deque()
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Check whether a call may go to this provider, claiming the trial call when half-open."""
+
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= settings.ai_breaker_cooldown:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self.state == self.OPEN:
+                return False
+
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+
+            return True
+
+    def record(self, ok: bool, latency: float) -> None:
+        """Record a call outcome and open or close the breaker."""
+
+        now = time.monotonic()
+        slow = latency > settings.ai_breaker_slow_seconds
+
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                if ok and not slow:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                    ai_logger.info(f"Circuit for {self.name} closed")
+                else:
+                    self._open(now)
+                return
+
+            self._outcomes.append((now, ok, latency))
+            while self._outcomes and now - self._outcomes[0][0] > settings.ai_breaker_window:
+                self._outcomes.popleft()
+
+            if self.state == self.OPEN or len(self._outcomes) < settings.ai_breaker_min_requests:
+                return
+
+            total = len(self._outcomes)
+            error_rate = sum(1 for _, success, _ in self._outcomes if not success) / total
+            slow_rate = sum(1 for _, _, seconds in self._outcomes if seconds > settings.ai_breaker_slow_seconds) / total
+
+            if error_rate >= settings.ai_breaker_error_rate or slow_rate >= settings.ai_breaker_slow_rate:
+                ai_logger.warning(
+                    f"Circuit for {self.name} opened - error rate {error_rate:.0%}, slow rate {slow_rate:.0%}"
+                )
+                self._open(now)
+
+    def release(self) -> None:
+        """Give back a claimed trial call that was cancelled before finishing."""
+
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get breaker state for monitoring."""
+
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self._outcomes),
+                "times_opened": self._times_opened
+            }
+
+    def _open(self, now: float) -> None:
+        """Open the breaker; caller holds the lock."""
+
+        self.state = self.OPEN
+        self._opened_at = now
+        self._trial_in_flight = False
+        self._outcomes.clear()
+        self._times_opened += 1
@@ -0,0 +1,98 @@
+"""
+Local CPU embedding backend on sentence-transformers.
+
+The model is loaded on first use, so each worker process loads it once
+after forking, and encoding runs on a single background thread so the
+event loop stays responsive while torch uses its own CPU threads.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.core.app_logging import ai_logger
+
+
+class LocalEmbeddingProvider:
+    """Sentence-transformers embedding model loaded once per process."""
+
+    def __init__(self):
+        """Initialize local embedding provider."""
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-embeddings")
+
+    @property
+    def model_name(self) -> str:
+        """Name of the configured model, including the quantization mode."""
+        suffix = "-int8" if settings.local_embedding_quantize else ""
+        return f"{settings.local_embedding_model}{suffix}"
+
+    def encode(self, texts: List[str]) -> List[List[float]]:
+        """Encode texts in CPU batches into unit-length vectors."""
+
+        if not texts:
+            return []
+
+        embeddings = self._get_model().encode(
+            texts,
+            batch_size=settings.local_embedding_batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return embeddings.tolist()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Encode texts without blocking the event loop."""
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.encode, texts)
+
+    def info(self) -> Dict[str, Any]:
+        """Get model settings for monitoring and benchmarks."""
+
+        return {
+            "model": settings.local_embedding_model,
+            "loaded": self._model is not None,
+            "quantized": settings.local_embedding_quantize,
+            "batch_size": settings.local_embedding_batch_size,
+            "threads": settings.local_embedding_threads
+        }
+
+    def _get_model(self):
+        """Get the model, loading it on first use."""
+
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    self._model = self._load()
+
+        return self._model
+
+    def _load(self):
+        """Load the sentence-transformers model for CPU inference."""
+
+        # Imported here so processes that never embed locally don't load torch
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if settings.local_embedding_threads:
+            torch.set_num_threads(settings.local_embedding_threads)
+
+        model = SentenceTransformer(settings.local_embedding_model, device="cpu")
+        model.max_seq_length = min(model.max_seq_length, settings.local_embedding_max_tokens)
+
+        if settings.local_embedding_quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        ai_logger.info(
+            f"Loaded local embedding model {settings.local_embedding_model} "
+            f"(quantized: {settings.local_embedding_quantize}, threads: {torch.get_num_threads()})"
+        )
+        return model
+
+
+# Global local embedding provider instance
+local_embeddings = LocalEmbeddingProvider()
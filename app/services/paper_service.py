@@ -2,8 +2,10 @@
 Paper processing and management service.
 """
 import asyncio
+import time
+import weakref
 from datetime import datetime
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
 from uuid import UUID
 import re
 
@@ -12,14 +14,18 @@ from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.app_logging import paper_logger, log_paper_processed, log_error
-from app.db.models import Paper, UserPaper, ProcessingStatus, PaperSource, ReadingStatus
+from app.db.database import SessionLocal
+from app.db.models import Paper, UserPaper, ProcessingStatus, PaperSource, ReadingStatus, SubscriptionTier, SummaryTier
 from app.db.queries.paper_queries import (
     create_paper, get_paper_by_doi, get_paper_by_arxiv_id, get_paper_by_url,
     update_paper, update_paper_processing_status, create_user_paper,
     get_user_paper, search_papers, get_user_papers
 )
-from app.services.ai_service import ai_service
+from app.services.ai_service import ai_service, CombinedAnalysisError
+from app.services.ai_usage import ai_usage, bind_usage, usage_context
+from app.services.passage_index import passage_index
 from app.services.pdf_processor import pdf_processor
+from app.services.section_index import build_section_index
 from app.schemas.paper import PaperCreate, PaperInDB, PaperSearchRequest
 
 
@@ -30,6 +36,11 @@ class PaperService:
         """Initialize paper service."""
         self.http_client = httpx.AsyncClient(timeout=30.0)
 
+        # Celery tasks may run each paper on a fresh event loop, so the limit is kept per loop
+        self._worker_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
     async def process_paper_from_url(
         self,
         url: str,
@@ -71,7 +82,11 @@ class PaperService:
             # 4. Add to user's library
             await create_user_paper(db, user_id, str(paper.id))
 
-            # 5. Queue for AI processing
+            # 5. Queue a quick preview summary ahead of the full AI processing
+            if settings.ai_preview_enabled and paper.abstract:
+                from app.services.celery_tasks import generate_preview_task
+                generate_preview_task.delay(str(paper.id))
+
             from app.services.celery_app import process_paper_task
             process_paper_task.delay(str(paper.id))
 
@@ -92,6 +107,9 @@ class PaperService:
         paper_logger.info(f"Starting AI processing for paper: {paper_id}")
         start_time = datetime.now()
 
+        # Runs as its own task, so the binding ends with it
+        bind_usage(paper_id=paper_id)
+
         try:
             # Get paper from database
             from app.db.queries.paper_queries import get_paper_by_id
@@ -105,15 +123,23 @@ class PaperService:
                 db, paper_id, ProcessingStatus.PROCESSING
             )
 
-            # Extract full text if needed
-            if not paper.full_text and paper.pdf_url:
-                paper_logger.info(f"Extracting text from PDF: {paper.pdf_url}")
+            # Extract full text if needed, uploads are parsed here rather than in the request
+            if not paper.full_text and (paper.pdf_url or paper.pdf_sha256):
+                updates = await self._extract_pdf_content(paper)
+
+                if updates:
+                    await update_paper(db, paper_id, updates)
+                    for key, value in updates.items():
+                        setattr(paper, key, value)
 
-                full_text = await pdf_processor.extract_text_from_url(paper.pdf_url)
+            # Text stored before section indexes existed is indexed once
+            if paper.full_text and paper.section_index is None:
+                paper.section_index = build_section_index(paper.full_text)
+                await update_paper(db, paper_id, {"section_index": paper.section_index})
 
-                if full_text:
-                    await update_paper(db, paper_id, {"full_text": full_text})
-                    paper.full_text = full_text
+            # Uploads only have an abstract once extracted, so their preview is written here
+            if settings.ai_preview_enabled and paper.summary_tier is None and paper.abstract:
+                await self._write_preview(db, paper)
 
             # Prepare content for AI processing
             content = self._prepare_content_for_ai(paper)
@@ -122,9 +148,16 @@ class PaperService:
                 raise ValueError("No content available for AI processing")
 
             # Generate AI analysis
-            ai_results = await self._generate_ai_analysis(paper, content)
+            from app.db.queries.paper_queries import get_paper_subscription_tiers
+            tiers = await get_paper_subscription_tiers(db, paper_id)
+            bind_usage(subscription_tier=self._top_tier(tiers))
+            ai_results = await self._generate_ai_analysis(
+                paper, content, self._analysis_mode(tiers)
+            )
 
-            # Update paper with AI results
+            # Update paper with AI results, a failed summary stage leaves the preview in place
+            if "summary" in ai_results:
+                ai_results["summary_tier"] = SummaryTier.FULL
             await update_paper(db, paper_id, ai_results)
 
             # Mark as completed
@@ -132,6 +165,10 @@ class PaperService:
                 db, paper_id, ProcessingStatus.COMPLETED
             )
 
+            # Index passages now so the first question does not wait for embeddings
+            if settings.passage_index_on_ingest and paper.full_text:
+                await self._index_passages(paper)
+
             processing_time = (datetime.now() - start_time).total_seconds()
             log_paper_processed(paper_id, processing_time, "completed")
 
@@ -149,6 +186,60 @@ class PaperService:
             log_error(e, {"paper_id": paper_id})
             return False
 
+        finally:
+            # The worker's event loop may close before a timed flush runs
+            await ai_usage.flush()
+
+    async def generate_preview(self, paper_id: str, db: Session) -> bool:
+        """Write a title and abstract preview summary unless the paper already has a summary."""
+
+        from app.db.queries.paper_queries import get_paper_by_id
+        paper = await get_paper_by_id(db, paper_id)
+
+        if not paper or paper.summary_tier is not None or not paper.abstract:
+            return False
+
+        bind_usage(paper_id=paper_id)
+        await self._write_preview(db, paper)
+        await ai_usage.flush()
+        return True
+
+    async def stream_summary(self, paper_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Generate a paper's summary as stream events and store it as its full summary.
+
+        Runs detached from any request, so it uses its own database session.
+        """
+
+        db = SessionLocal()
+        try:
+            from app.db.queries.paper_queries import get_paper_by_id
+            paper = await get_paper_by_id(db, paper_id)
+
+            if not paper:
+                raise ValueError(f"Paper not found: {paper_id}")
+
+            authors = [author.get("name", "") for author in paper.authors or []]
+            section_index = paper.section_index if paper.full_text else None
+            content = paper.full_text if section_index else self._prepare_content_for_ai(paper)
+
+            with usage_context(paper_id=paper_id):
+                async for event in ai_service.stream_summary(
+                    content, paper.title, authors, section_index=section_index
+                ):
+                    if event["event"] == "summary":
+                        # Full analysis may have finished while the summary streamed
+                        db.refresh(paper)
+                        if paper.summary_tier != SummaryTier.FULL:
+                            await update_paper(db, paper_id, {"summary": event["data"], "summary_tier": SummaryTier.FULL})
+                            paper_logger.info(f"Streamed summary written for paper {paper_id}")
+
+                    yield event
+
+            await ai_usage.flush()
+
+        finally:
+            db.close()
+
     async def search_user_papers(
         self,
         user_id: str,
@@ -256,6 +347,34 @@ class PaperService:
             log_error(e, {"user_id": user_id})
             return []
 
+    async def ask_paper(
+        self,
+        paper: Paper,
+        question: str,
+        top_k: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Answer a question from the paper passages most relevant to it."""
+
+        start_time = time.perf_counter()
+
+        with usage_context(paper_id=str(paper.id)):
+            # Papers without full text are answered from their abstract
+            passages = await passage_index.search(
+                str(paper.id), paper.full_text or paper.abstract, question, top_k,
+                paper.section_index if paper.full_text else None
+            )
+            answer = await ai_service.answer_question(question, paper.title, passages)
+
+        paper_logger.info(f"Answered question on paper {paper.id} from {len(passages)} passages")
+
+        return {
+            "paper_id": str(paper.id),
+            "question": question,
+            "answer": answer,
+            "passages": passages,
+            "processing_time": time.perf_counter() - start_time
+        }
+
     async def update_reading_progress(
         self,
         user_id: str,
@@ -468,6 +587,50 @@ class PaperService:
                 "pdf_url": url
             }
 
+    async def _extract_pdf_content(self, paper: Paper) -> Dict[str, Any]:
+        """Extract text and section index, and fill missing metadata, from a paper's PDF.
+
+        Uploads have nothing to analyze besides their PDF, so a failed
+        extraction raises for them. Papers added by URL keep their scraped
+        metadata and go on without full text.
+        """
+
+        if paper.pdf_sha256:
+            paper_logger.info(f"Extracting text from uploaded PDF: {paper.pdf_sha256[:12]}")
+            pdf_data = await pdf_processor.process_stored_pdf(paper.pdf_sha256)
+
+            if not pdf_data or not pdf_data["text"]:
+                raise ValueError(f"No text could be extracted from uploaded PDF {paper.pdf_sha256[:12]}")
+
+        else:
+            try:
+                paper_logger.info(f"Extracting text from PDF: {paper.pdf_url}")
+                pdf_data = await pdf_processor.process_pdf_from_url(paper.pdf_url)
+
+            except Exception as e:
+                paper_logger.error(f"Failed to extract text for paper {paper.id}: {e}")
+                log_error(e, {"paper_id": str(paper.id)})
+                return {}
+
+            if not pdf_data or not pdf_data["text"]:
+                return {}
+
+        metadata = pdf_data["metadata"]
+        updates = {
+            "full_text": pdf_data["text"],
+            "section_index": pdf_data["structure"].get("section_index")
+        }
+
+        # Uploads are titled with their filename until the PDF has been read
+        if metadata.get("title") and paper.title.lower().endswith(".pdf"):
+            updates["title"] = metadata["title"]
+        if metadata.get("authors") and not paper.authors:
+            updates["authors"] = metadata["authors"]
+        if metadata.get("abstract") and not paper.abstract:
+            updates["abstract"] = metadata["abstract"]
+
+        return updates
+
     async def _extract_generic_metadata(self, url: str) -> Dict[str, Any]:
         """Extract metadata from generic URL."""
 
@@ -557,6 +720,29 @@ class PaperService:
 
         return None
 
+    async def _write_preview(self, db: Session, paper: Paper) -> None:
+        """Generate and store a preview summary for a paper."""
+
+        start_time = time.perf_counter()
+        preview = await ai_service.generate_preview_summary(paper.title, paper.abstract)
+
+        # Full analysis may have finished while the preview was generated
+        db.refresh(paper)
+        if paper.summary_tier == SummaryTier.FULL:
+            return
+
+        await update_paper(db, str(paper.id), {"summary": preview.dict(), "summary_tier": SummaryTier.PREVIEW})
+        paper_logger.info(f"Preview summary written for paper {paper.id} in {time.perf_counter() - start_time:.2f}s")
+
+    async def _index_passages(self, paper: Paper) -> None:
+        """Build a paper's passage index, logging rather than raising on failure."""
+
+        try:
+            await passage_index.build(str(paper.id), paper.full_text, paper.section_index)
+        except Exception as e:
+            paper_logger.warning(f"Failed to index passages for paper {paper.id}: {e}")
+            log_error(e, {"paper_id": str(paper.id)})
+
     def _prepare_content_for_ai(self, paper: Paper) -> str:
         """Prepare paper content for AI processing."""
 
@@ -576,48 +762,156 @@ class PaperService:
 
         return "\n\n".join(content_parts)
 
+    def _top_tier(self, tiers: List[str]) -> Optional[str]:
+        """Get the highest subscription tier among a paper's readers."""
+
+        for tier in (SubscriptionTier.INSTITUTION, SubscriptionTier.RESEARCHER, SubscriptionTier.FREE):
+            if tier.value in tiers:
+                return tier.value
+
+        return None
+
+    def _analysis_mode(self, tiers: List[str]) -> str:
+        """Pick the AI analysis mode for the highest subscription tier among a paper's readers."""
+
+        for tier in (SubscriptionTier.INSTITUTION, SubscriptionTier.RESEARCHER, SubscriptionTier.FREE):
+            if tier.value in tiers and tier.value in settings.ai_analysis_mode_by_tier:
+                return settings.ai_analysis_mode_by_tier[tier.value]
+
+        return settings.ai_analysis_mode
+
     async def _generate_ai_analysis(
         self,
         paper: Paper,
-        content: str
+        content: str,
+        mode: str = "staged"
     ) -> Dict[str, Any]:
-        """Generate AI analysis for paper."""
+        """Generate AI analysis for paper, in one combined request or as concurrent stages.
+
+        A combined response that fails validation falls back to the stages. A
+        failed stage is logged and left out of the result so the others are
+        still saved; the analysis only fails when every stage does.
+        """
 
         # Get author names
         authors = [author.get("name", "") for author in paper.authors or []]
 
-        # Generate summary
-        summary = await ai_service.summarize_paper(
-            content, paper.title, authors
-        )
+        # Stages slice the sections they need out of the full text when it is indexed
+        section_index = paper.section_index if paper.full_text else None
+        if section_index:
+            content = paper.full_text
 
-        # Extract insights
-        insights = await ai_service.extract_key_insights(
-            content, paper.title
-        )
+        if mode == "combined":
+            try:
+                async with self._worker_semaphore():
+                    start_time = time.perf_counter()
+                    combined = await ai_service.analyze_paper_combined(
+                        content, paper.title, authors, section_index=section_index
+                    )
+                paper_logger.info(
+                    f"Combined AI analysis completed for paper {paper.id} in "
+                    f"{time.perf_counter() - start_time:.2f}s"
+                )
+                return self._serialize_ai_analysis(combined, {})
+
+            except CombinedAnalysisError as e:
+                paper_logger.warning(f"Combined AI analysis invalid for paper {paper.id}, running stages: {e}")
+
+        stages = {
+            "summary": lambda: ai_service.summarize_paper(
+                content, paper.title, authors, section_index=section_index
+            ),
+            "key_insights": lambda: ai_service.extract_key_insights(
+                content, paper.title, section_index=section_index
+            ),
+            "methodology": lambda: ai_service.analyze_methodology(
+                content, paper.title, section_index=section_index
+            ),
+            "limitations": lambda: ai_service.identify_limitations(
+                content, paper.title, section_index=section_index
+            ),
+            "contributions": lambda: ai_service.extract_contributions(
+                content, paper.title, section_index=section_index
+            ),
+        }
 
-        # Analyze methodology
-        methodology = await ai_service.analyze_methodology(
-            content, paper.title
+        paper_semaphore = asyncio.Semaphore(settings.ai_stage_concurrency)
+        outcomes = await asyncio.gather(
+            *(self._run_ai_stage(paper, name, stage, paper_semaphore) for name, stage in stages.items()),
+            return_exceptions=True
         )
 
-        # Identify limitations
-        limitations = await ai_service.identify_limitations(
-            content, paper.title
+        results = {}
+        errors = {}
+        for name, outcome in zip(stages, outcomes):
+            if isinstance(outcome, Exception):
+                errors[name] = outcome
+            else:
+                results[name] = outcome
+
+        if not results:
+            raise next(iter(errors.values()))
+
+        return self._serialize_ai_analysis(results, errors)
+
+    def _serialize_ai_analysis(self, results: Dict[str, Any], errors: Dict[str, Exception]) -> Dict[str, Any]:
+        """Convert analysis results to paper fields, recording failed stages."""
+
+        analysis = {}
+        if "summary" in results:
+            analysis["summary"] = results["summary"].dict()
+        if "key_insights" in results:
+            analysis["key_insights"] = [insight.dict() for insight in results["key_insights"]]
+        if "methodology" in results:
+            analysis["methodology"] = results["methodology"]
+        if "limitations" in results:
+            analysis["limitations"] = results["limitations"]
+        if "contributions" in results:
+            analysis["contributions"] = [contrib.dict() for contrib in results["contributions"]]
+
+        # Partial results are kept, the failed stages are recorded on the paper
+        analysis["processing_error"] = (
+            "Failed AI stages: " + ", ".join(f"{name} ({error})" for name, error in errors.items())
+            if errors else None
         )
 
-        # Extract contributions
-        contributions = await ai_service.extract_contributions(
-            content, paper.title
-        )
+        return analysis
 
-        return {
-            "summary": summary.dict(),
-            "key_insights": [insight.dict() for insight in insights],
-            "methodology": methodology,
-            "limitations": limitations,
-            "contributions": [contrib.dict() for contrib in contributions]
-        }
+    async def _run_ai_stage(
+        self,
+        paper: Paper,
+        name: str,
+        stage,
+        paper_semaphore: asyncio.Semaphore
+    ) -> Any:
+        """Run one analysis stage within the per-paper and per-worker limits, recording its latency."""
+
+        async with paper_semaphore, self._worker_semaphore():
+            start_time = time.perf_counter()
+
+            try:
+                result = await stage()
+            except Exception as e:
+                latency = time.perf_counter() - start_time
+                paper_logger.error(f"AI stage {name} failed for paper {paper.id} after {latency:.2f}s: {e}")
+                log_error(e, {"paper_id": str(paper.id), "stage": name})
+                raise
+
+        latency = time.perf_counter() - start_time
+        paper_logger.info(f"AI stage {name} completed for paper {paper.id} in {latency:.2f}s")
+        return result
+
+    def _worker_semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore limiting concurrent analysis stages on the running event loop."""
+
+        loop = asyncio.get_running_loop()
+        semaphore = self._worker_semaphores.get(loop)
+
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.ai_worker_concurrency)
+            self._worker_semaphores[loop] = semaphore
+
+        return semaphore
 
     async def _count_search_results(
         self,
@@ -0,0 +1,305 @@
+"""
+Per-paper passage index for answering questions about a paper.
+
+A paper's full text is split into overlapping passages, each passage is
+embedded once, and the vectors are kept on local disk:
+
+    <root>/<paper_id>/passages.json   -> index key, passage text and offsets
+    <root>/<paper_id>/vectors.f32     -> unit-length float32 vectors, one row per passage
+
+The index key covers the text, embedding model and passage settings, so a
+changed paper or configuration rebuilds the index on next use. A question
+embeds only itself and is answered from the top-k passages, whatever the
+length of the paper.
+
+Like the PDF store, index directory mtimes double as LRU access times and
+the least recently used indexes are removed once the directory grows past
+`passage_index_max_bytes`; an evicted index is rebuilt on its next use.
+"""
+import asyncio
+import hashlib
+import heapq
+import json
+import math
+import operator
+import os
+import shutil
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.app_logging import paper_logger
+from app.services.ai_service import ai_service
+from app.utils.files import atomic_write
+
+
+# Bump when passage splitting changes so existing indexes are rebuilt
+INDEX_VERSION = 1
+
+PASSAGES_FILENAME = "passages.json"
+VECTORS_FILENAME = "vectors.f32"
+
+# Loaded indexes kept in memory for repeated questions
+MAX_CACHED_INDEXES = 32
+
+# How long the running size total is trusted before the directory is rescanned,
+# since other processes sharing the directory add indexes too
+RESCAN_INTERVAL_SECONDS = 300
+
+
+class PassageIndex:
+    """Disk-backed passage vectors per paper with brute-force top-k search."""
+
+    def __init__(self, root: str = None, max_bytes: int = None):
+        """Initialize passage index."""
+        self.root = root or settings.passage_index_dir
+        self.max_bytes = max_bytes or settings.passage_index_max_bytes
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Tuple[str, List[Dict[str, Any]], List[array]]]" = OrderedDict()
+
+        # Running size total, resynced from disk on every scan
+        self._size: Optional[int] = None
+        self._scanned_at = 0.0
+
+        self._builds = 0
+        self._searches = 0
+        self._evictions = 0
+
+    async def build(
+        self,
+        paper_id: str,
+        text: str,
+        section_index: Optional[List[Dict[str, Any]]] = None
+    ) -> int:
+        """Index a paper's text unless an up-to-date index exists, returning the passage count."""
+
+        key = self._index_key(text)
+        loaded = await asyncio.to_thread(self._load, paper_id, key)
+        if loaded is not None:
+            return len(loaded[0])
+
+        passages = await ai_service.embed_document(
+            text, settings.passage_tokens, overlap_tokens=settings.passage_overlap_tokens,
+            section_index=section_index
+        )
+
+        await asyncio.to_thread(self._write, paper_id, key, passages)
+        with self._lock:
+            self._builds += 1
+
+        paper_logger.info(f"Indexed {len(passages)} passages for paper {paper_id}")
+        return len(passages)
+
+    async def search(
+        self,
+        paper_id: str,
+        text: str,
+        question: str,
+        top_k: Optional[int] = None,
+        section_index: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get the passages most similar to a question, best first, indexing the paper if needed."""
+
+        key = self._index_key(text)
+        loaded = await asyncio.to_thread(self._load, paper_id, key)
+        if loaded is None:
+            await self.build(paper_id, text, section_index)
+            loaded = await asyncio.to_thread(self._load, paper_id, key)
+
+        passages, rows = loaded
+        query = self._normalize((await ai_service.embed_texts([question]))[0])
+
+        scored = heapq.nlargest(
+            top_k or settings.paper_qa_top_k,
+            ((sum(map(operator.mul, row, query)), number) for number, row in enumerate(rows))
+        )
+
+        with self._lock:
+            self._searches += 1
+
+        return [{**passages[number], "index": number, "score": round(score, 4)} for score, number in scored]
+
+    def stats(self) -> Dict[str, int]:
+        """Get index statistics."""
+
+        with self._lock:
+            return {
+                "builds": self._builds,
+                "searches": self._searches,
+                "cached": len(self._cache),
+                "evictions": self._evictions
+            }
+
+    def evict(self) -> int:
+        """Remove least recently used indexes until the directory fits its size limit."""
+
+        entries = self._scan_entries()
+        total_size = sum(size for _, _, size in entries)
+        evicted = []
+
+        for paper_id, _, size in sorted(entries, key=lambda entry: entry[1]):
+            if total_size <= self.max_bytes:
+                break
+
+            shutil.rmtree(os.path.join(self.root, paper_id), ignore_errors=True)
+            total_size -= size
+            evicted.append(paper_id)
+
+        with self._lock:
+            for paper_id in evicted:
+                self._cache.pop(paper_id, None)
+            self._size = total_size
+            self._scanned_at = time.monotonic()
+            self._evictions += len(evicted)
+
+        if evicted:
+            paper_logger.info(f"Evicted {len(evicted)} passage indexes")
+        return len(evicted)
+
+    def _index_key(self, text: str) -> str:
+        """Key identifying the text and settings an index was built with."""
+
+        digest = hashlib.sha256()
+        digest.update(
+            f"{INDEX_VERSION}:{ai_service.embedding_model()}:"
+            f"{settings.passage_tokens}:{settings.passage_overlap_tokens}\n".encode("utf-8")
+        )
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _load(self, paper_id: str, key: str) -> Optional[Tuple[List[Dict[str, Any]], List[array]]]:
+        """Load a paper's index if it was built with this key."""
+
+        with self._lock:
+            cached = self._cache.get(paper_id)
+            if cached and cached[0] == key:
+                self._cache.move_to_end(paper_id)
+                hit = cached[1], cached[2]
+            else:
+                hit = None
+
+        index_dir = os.path.join(self.root, paper_id)
+
+        if hit is not None:
+            self._touch(index_dir)
+            return hit
+
+        try:
+            with open(os.path.join(index_dir, PASSAGES_FILENAME), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            if meta.get("key") != key:
+                return None
+
+            vectors = array("f")
+            with open(os.path.join(index_dir, VECTORS_FILENAME), "rb") as f:
+                vectors.frombytes(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+        passages = meta["passages"]
+        dimensions = meta["dimensions"]
+        if len(vectors) != len(passages) * dimensions:
+            return None
+
+        rows = [vectors[i * dimensions:(i + 1) * dimensions] for i in range(len(passages))]
+        self._remember(paper_id, key, passages, rows)
+        self._touch(index_dir)
+        return passages, rows
+
+    def _write(self, paper_id: str, key: str, passages: List[Dict[str, Any]]) -> None:
+        """Store passage vectors, then the metadata that makes them visible."""
+
+        index_dir = os.path.join(self.root, paper_id)
+        os.makedirs(index_dir, exist_ok=True)
+
+        rows = [array("f", self._normalize(passage["embedding"])) for passage in passages]
+        meta = {
+            "key": key,
+            "dimensions": len(rows[0]) if rows else 0,
+            "passages": [
+                {"text": passage["text"], "start": passage["start"], "end": passage["end"]}
+                for passage in passages
+            ]
+        }
+
+        vectors = array("f")
+        for row in rows:
+            vectors.extend(row)
+
+        previous_size = self._dir_size(index_dir)
+        atomic_write(os.path.join(index_dir, VECTORS_FILENAME), vectors.tobytes())
+        atomic_write(os.path.join(index_dir, PASSAGES_FILENAME), json.dumps(meta).encode("utf-8"))
+        self._remember(paper_id, key, meta["passages"], rows)
+
+        with self._lock:
+            if self._size is not None:
+                self._size += self._dir_size(index_dir) - previous_size
+
+        if self._needs_eviction():
+            self.evict()
+
+    def _remember(self, paper_id: str, key: str, passages: List[Dict[str, Any]], rows: List[array]) -> None:
+        """Keep a loaded index in memory, evicting the least recently used."""
+
+        with self._lock:
+            self._cache[paper_id] = (key, passages, rows)
+            self._cache.move_to_end(paper_id)
+            while len(self._cache) > MAX_CACHED_INDEXES:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> List[float]:
+        """Scale a vector to unit length, so dot products are cosine similarities."""
+
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def _needs_eviction(self) -> bool:
+        """Check the running size total, asking for a rescan once it is stale."""
+        with self._lock:
+            if self._size is None or time.monotonic() - self._scanned_at > RESCAN_INTERVAL_SECONDS:
+                return True
+            return self._size > self.max_bytes
+
+    @staticmethod
+    def _touch(index_dir: str) -> None:
+        """Mark an index as recently used."""
+        try:
+            os.utime(index_dir)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _dir_size(index_dir: str) -> int:
+        """Get the size in bytes of the files in one index directory."""
+        try:
+            return sum(f.stat().st_size for f in os.scandir(index_dir) if f.is_file())
+        except FileNotFoundError:
+            return 0
+
+    def _scan_entries(self) -> List[Tuple[str, float, int]]:
+        """List indexes as (paper id, last access time, size in bytes)."""
+
+        entries = []
+
+        if not os.path.isdir(self.root):
+            return entries
+
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+
+            try:
+                entries.append((entry.name, entry.stat().st_mtime, self._dir_size(entry.path)))
+            except FileNotFoundError:
+                continue  # Removed by another process meanwhile
+
+        return entries
+
+
+# Global passage index instance
+passage_index = PassageIndex()
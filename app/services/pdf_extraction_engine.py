@@ -0,0 +1,288 @@
+"""
+Process-pool engine for CPU-bound PDF extraction work.
+
+PyMuPDF and PyPDF2 parsing holds the GIL for the whole parse, so running it
+on the event loop stalls every other request served by the same worker.
+Jobs submitted here run in a bounded pool of spawned processes instead.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.app_logging import paper_logger
+from app.services import pdf_workers
+
+# How often a waiting job checks whether its worker is hung
+HUNG_JOB_POLL_SECONDS = 1.0
+
+# Slack on top of the time limit before a worker counts as hung
+HUNG_JOB_GRACE_SECONDS = 5.0
+
+class ExtractionQueueFullError(Exception):
+    """Raised when the extraction queue has no free slots."""
+
+
+class ExtractionTimeoutError(Exception):
+    """Raised when an extraction job exceeds its time budget."""
+
+
+class ExtractionCancelledError(Exception):
+    """Raised when the pool shuts down before a queued job ran."""
+
+
+class PDFExtractionEngine:
+    """Bounded process pool with a work queue, job timeouts and worker recycling."""
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        queue_size: int = None,
+        job_timeout: float = None,
+        max_tasks_per_child: int = None
+    ):
+        """Initialize extraction engine (the pool itself is started lazily)."""
+        self.max_workers = max_workers or settings.pdf_extraction_workers
+        self.queue_size = queue_size if queue_size is not None else settings.pdf_extraction_queue_size
+        self.job_timeout = job_timeout or settings.pdf_extraction_timeout_seconds
+        self.max_tasks_per_child = max_tasks_per_child or settings.pdf_extraction_max_tasks_per_child
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # Counters exposed through stats()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._rejected = 0
+        self._pool_restarts = 0
+        self._cpu_time_total = 0.0
+        self._cpu_time_last = 0.0
+        self._cpu_time_max = 0.0
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        timeout: float = None
+    ) -> Any:
+        """Run a worker function from `pdf_workers` in the pool and return its result."""
+
+        job_name = getattr(func, "__name__", "job")
+        timeout = timeout or self.job_timeout
+
+        self._acquire_slot(job_name)
+
+        try:
+            result, cpu_time = await self._run_in_pool(func, args, timeout, job_name)
+
+        except ExtractionTimeoutError:
+            with self._lock:
+                self._timed_out += 1
+                self._failed += 1
+            raise
+
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        with self._lock:
+            self._completed += 1
+            self._cpu_time_total += cpu_time
+            self._cpu_time_last = cpu_time
+            self._cpu_time_max = max(self._cpu_time_max, cpu_time)
+
+        paper_logger.debug(f"Extraction job {job_name} finished in {cpu_time:.3f}s CPU")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth and CPU time statistics."""
+
+        with self._lock:
+            running = min(self._in_flight, self.max_workers)
+
+            return {
+                "workers": self.max_workers,
+                "running": running,
+                "queue_depth": self._in_flight - running,
+                "queue_capacity": self.queue_size,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "timed_out": self._timed_out,
+                "rejected": self._rejected,
+                "pool_restarts": self._pool_restarts,
+                "cpu_time_total": round(self._cpu_time_total, 3),
+                "cpu_time_last": round(self._cpu_time_last, 3),
+                "cpu_time_max": round(self._cpu_time_max, 3),
+                "cpu_time_avg": round(self._cpu_time_total / max(self._completed, 1), 3)
+            }
+
+    def shutdown(self) -> None:
+        """Stop the pool and its worker processes."""
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            paper_logger.info("PDF extraction pool shut down")
+
+    # Private helper methods
+    def _acquire_slot(self, job_name: str) -> None:
+        """Reserve a running or queued slot, rejecting the job when the queue is full."""
+
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.queue_size:
+                self._rejected += 1
+                raise ExtractionQueueFullError(
+                    f"PDF extraction queue is full ({self.queue_size} jobs waiting)"
+                )
+
+            self._in_flight += 1
+            self._submitted += 1
+
+        paper_logger.debug(f"Queued extraction job {job_name}")
+
+    async def _run_in_pool(
+        self,
+        func: Callable[..., Any],
+        args: tuple,
+        timeout: float,
+        job_name: str
+    ) -> Any:
+        """Submit job to the pool, retrying once if another job broke the pool."""
+
+        loop = asyncio.get_running_loop()
+
+        if multiprocessing.current_process().daemon:
+            # Celery prefork children are daemonic and cannot spawn a pool of
+            # their own, so the job runs on a thread of this process instead.
+            # Threads cannot be interrupted, so a timed out job keeps running
+            # in the background until it finishes on its own.
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(None, pdf_workers.run_timed, func, None, *args),
+                    timeout
+                )
+            except asyncio.TimeoutError:
+                paper_logger.error(f"Extraction job {job_name} timed out after {timeout}s")
+                raise ExtractionTimeoutError(f"PDF extraction timed out after {timeout}s")
+
+        for attempt in range(2):
+            executor = self._get_executor()
+
+            try:
+                future = executor.submit(pdf_workers.run_timed, func, timeout, *args)
+            except (BrokenProcessPool, RuntimeError):
+                self._restart_executor(executor)
+                continue
+
+            try:
+                return await self._await_job(future, executor, timeout, job_name)
+
+            except pdf_workers.JobTimeoutError:
+                # Interrupted inside the worker, which is still healthy
+                paper_logger.error(f"Extraction job {job_name} timed out after {timeout}s")
+                raise ExtractionTimeoutError(f"PDF extraction timed out after {timeout}s")
+
+            except BrokenProcessPool:
+                # Another job crashed or hung its worker and the pool was recycled
+                if attempt:
+                    raise BrokenProcessPool(f"PDF extraction pool broke twice while running {job_name}")
+                paper_logger.warning(f"Extraction pool broke while running {job_name}, retrying")
+                self._restart_executor(executor)
+
+        raise BrokenProcessPool("PDF extraction pool could not be started")
+
+    async def _await_job(
+        self,
+        future: Future,
+        executor: ProcessPoolExecutor,
+        timeout: float,
+        job_name: str
+    ) -> Any:
+        """Wait for a pool job, recycling the pool only if its worker is hung.
+
+        Workers enforce the time limit themselves from the moment the job
+        starts (see `pdf_workers.run_timed`). The pool is only recycled when a
+        worker blew far past that limit, which means it is stuck in native
+        code the alarm cannot interrupt.
+        """
+
+        loop = asyncio.get_running_loop()
+        wrapped = asyncio.wrap_future(future)
+        started_at = None
+
+        while True:
+            try:
+                done, _ = await asyncio.wait({wrapped}, timeout=HUNG_JOB_POLL_SECONDS)
+            except asyncio.CancelledError:
+                wrapped.cancel()
+                raise
+
+            if done:
+                if wrapped.cancelled():
+                    # Cancelled by shutdown() rather than by our caller
+                    raise ExtractionCancelledError(
+                        f"PDF extraction pool shut down before {job_name} ran"
+                    )
+                return wrapped.result()
+
+            # `running()` turns true once the job is handed to the worker call
+            # queue, which holds at most one job beyond the busy workers. That
+            # job waits for at most one time limit before it really starts.
+            if started_at is None and future.running():
+                started_at = loop.time()
+
+            if started_at is not None and loop.time() - started_at > 2 * timeout + HUNG_JOB_GRACE_SECONDS:
+                paper_logger.error(f"Extraction job {job_name} is stuck past its {timeout}s limit")
+                wrapped.cancel()
+                self._restart_executor(executor)
+                raise ExtractionTimeoutError(f"PDF extraction timed out after {timeout}s")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Get the current pool, starting it if needed."""
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=self.max_tasks_per_child
+                )
+                paper_logger.info(f"Started PDF extraction pool with {self.max_workers} workers")
+
+            return self._executor
+
+    def _restart_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Terminate a stuck or broken pool so the next job starts a fresh one."""
+
+        with self._lock:
+            if self._executor is not executor:
+                return  # Already replaced by another job
+            self._executor = None
+            self._pool_restarts += 1
+
+        # Running jobs cannot be cancelled, so their processes are terminated.
+        # Queued jobs are left in place: the pool fails them with
+        # BrokenProcessPool and their callers resubmit them to the new pool.
+        for process in list(getattr(executor, "_processes", {}).values()):
+            if process.is_alive():
+                process.terminate()
+
+        executor.shutdown(wait=False)
+
+
+# Global extraction engine instance
+extraction_engine = PDFExtractionEngine()
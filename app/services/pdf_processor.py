@@ -1,17 +1,111 @@
 """
 PDF processing service for extracting text and metadata from academic papers.
 """
+import asyncio
+import hashlib
 import io
+import os
 import re
+import tempfile
+from collections import deque
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
 import httpx
-import fitz  # PyMuPDF
-from PyPDF2 import PdfReader
 
 from app.core.config import settings
 from app.core.app_logging import paper_logger, log_error
+from app.services import pdf_workers
+from app.services.pdf_extraction_engine import extraction_engine, ExtractionQueueFullError
+from app.services.pdf_store import pdf_store
+from app.services.pdf_range_reader import PDFRangeReader
+from app.services.section_index import build_section_index
+
+
+class PDFTooLargeError(ValueError):
+    """Raised when a PDF exceeds the configured size limit."""
+
+
+class SpooledPDF:
+    """PDF body spooled to memory, rolling over to a temp file once it grows large.
+
+    The SHA-256 of the content is computed as chunks are written, so callers
+    never need to hold the whole document as a single `bytes` object.
+    """
+
+    def __init__(self, max_size: int = None, max_memory_size: int = None):
+        """Initialize an empty spool."""
+        self.max_size = max_size or settings.upload_max_size
+        self.max_memory_size = max_memory_size if max_memory_size is not None else settings.pdf_spool_max_memory
+        self.size = 0
+        self.path: Optional[str] = None
+
+        # Validators of the response the content came from, for revalidating its URL later
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._file = None
+        self._hash = hashlib.sha256()
+
+    def write(self, chunk: bytes) -> None:
+        """Append a chunk, aborting as soon as the size limit is crossed."""
+
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise PDFTooLargeError(f"PDF too large: more than {self.max_size} bytes")
+
+        self._hash.update(chunk)
+
+        if self._file is None and self.size > self.max_memory_size:
+            self._rollover()
+
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer.write(chunk)
+
+    def finish(self) -> None:
+        """Flush spooled content to disk once writing is complete."""
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def sha256(self) -> str:
+        """Hex digest of the content written so far."""
+        return self._hash.hexdigest()
+
+    @property
+    def source(self) -> "pdf_workers.PDFSource":
+        """Source for extraction workers: a file path, or bytes for small documents."""
+        if self.path:
+            return self.path
+        return self._buffer.getvalue()
+
+    def cleanup(self) -> None:
+        """Remove the spooled content."""
+
+        self.finish()
+        self._buffer = None
+
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def _rollover(self) -> None:
+        """Move the in-memory buffer to a named temp file."""
+
+        self._file = tempfile.NamedTemporaryFile(
+            prefix="pdf-", suffix=".pdf", dir=settings.pdf_spool_dir, delete=False
+        )
+        self.path = self._file.name
+        self._file.write(self._buffer.getvalue())
+        self._buffer = None
 
 
 class PDFProcessor:
@@ -30,14 +124,9 @@ class PDFProcessor:
         paper_logger.info(f"Extracting text from PDF: {pdf_url}")
 
         try:
-            # Download PDF
-            pdf_content = await self._download_pdf(pdf_url)
+            result = await self.process_pdf_from_url(pdf_url)
 
-            if not pdf_content:
-                return None
-
-            # Extract text
-            text = await self._extract_text_from_bytes(pdf_content)
+            text = result.get("text") if result else None
 
             if text:
                 paper_logger.info(f"Successfully extracted {len(text)} characters from PDF")
@@ -52,51 +141,67 @@ class PDFProcessor:
             return None
 
     async def extract_metadata_from_url(self, pdf_url: str) -> Dict[str, Any]:
-        """Extract metadata from PDF URL."""
+        """Extract metadata from PDF URL, reading only the first page when the server allows it."""
 
         paper_logger.info(f"Extracting metadata from PDF: {pdf_url}")
 
         try:
-            # Download PDF
-            pdf_content = await self._download_pdf(pdf_url)
+            # Known content already has its metadata stored
+            cached = await self._stored_extraction_for_url(pdf_url)
+            if cached:
+                return cached["metadata"]
 
-            if not pdf_content:
-                return {}
+            if settings.pdf_range_requests_enabled:
+                metadata = await self._extract_metadata_from_ranges(pdf_url)
+                if metadata is not None:
+                    paper_logger.info(f"Successfully extracted metadata from PDF first page")
+                    return metadata
 
-            # Extract metadata
-            metadata = await self._extract_metadata_from_bytes(pdf_content)
+            result = await self.process_pdf_from_url(pdf_url)
+
+            if not result:
+                return {}
 
             paper_logger.info(f"Successfully extracted metadata from PDF")
-            return metadata
+            return result["metadata"]
 
         except Exception as e:
             paper_logger.error(f"Failed to extract metadata from PDF {pdf_url}: {e}")
             log_error(e, {"pdf_url": pdf_url})
             return {}
 
-    async def process_uploaded_pdf(self, pdf_content: bytes) -> Dict[str, Any]:
-        """Process uploaded PDF file."""
+    async def process_pdf_from_url(self, pdf_url: str) -> Optional[Dict[str, Any]]:
+        """Download and process PDF from URL, reusing stored results for known content."""
 
-        paper_logger.info("Processing uploaded PDF file")
+        # A URL still serving known content skips both download and extraction
+        cached = await self._stored_extraction_for_url(pdf_url)
+        if cached:
+            paper_logger.info(f"Using stored extraction for PDF: {pdf_url}")
+            return cached
+
+        download = await self._download_pdf(pdf_url)
+
+        if not download:
+            return None
 
         try:
-            # Extract text
-            text = await self._extract_text_from_bytes(pdf_content)
+            await asyncio.to_thread(
+                pdf_store.record_url, pdf_url, download.sha256, download.etag, download.last_modified
+            )
+            return await self._process_pdf(download.sha256, download.source)
+        finally:
+            download.cleanup()
 
-            # Extract metadata
-            metadata = await self._extract_metadata_from_bytes(pdf_content)
+    async def process_uploaded_pdf(self, pdf_content: bytes) -> Dict[str, Any]:
+        """Process uploaded PDF file."""
 
-            # Analyze paper structure
-            structure = await self._analyze_paper_structure(text)
+        paper_logger.info("Processing uploaded PDF file")
 
-            result = {
-                "text": text,
-                "metadata": metadata,
-                "structure": structure,
-                "length": len(text) if text else 0
-            }
+        try:
+            content_hash = hashlib.sha256(pdf_content).hexdigest()
+            result = await self._process_pdf(content_hash, pdf_content)
 
-            paper_logger.info(f"Successfully processed uploaded PDF: {len(text)} characters")
+            paper_logger.info(f"Successfully processed uploaded PDF: {result['length']} characters")
             return result
 
         except Exception as e:
@@ -104,12 +209,148 @@ class PDFProcessor:
             log_error(e, {"content_length": len(pdf_content)})
             raise
 
-    async def _download_pdf(self, pdf_url: str) -> Optional[bytes]:
-        """Download PDF from URL."""
+    async def spool_upload(self, upload) -> SpooledPDF:
+        """Copy an uploaded file into a spool chunk by chunk, hashing it on the way."""
+
+        spool = SpooledPDF()
+
+        try:
+            while True:
+                chunk = await upload.read(settings.pdf_download_chunk_size)
+                if not chunk:
+                    break
+                spool.write(chunk)
+
+            spool.finish()
+
+        except Exception:
+            spool.cleanup()
+            raise
+
+        paper_logger.info(f"Spooled uploaded PDF: {spool.size} bytes (sha256 {spool.sha256[:12]})")
+        return spool
+
+    async def store_upload(self, spool: SpooledPDF) -> str:
+        """Move a spooled upload into the PDF store, keyed by its content hash."""
 
         try:
-            async with self.http_client as client:
-                response = await client.get(pdf_url)
+            await asyncio.to_thread(pdf_store.put_blob, spool.sha256, spool.source)
+        finally:
+            spool.cleanup()
+
+        return spool.sha256
+
+    async def process_stored_pdf(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Process a PDF kept in the PDF store, e.g. an upload queued for extraction."""
+
+        blob_path = await asyncio.to_thread(pdf_store.blob_path, content_hash)
+
+        if not blob_path:
+            paper_logger.error(f"PDF {content_hash[:12]} is missing from the PDF store")
+            return None
+
+        return await self._process_pdf(content_hash, blob_path)
+
+    async def _process_pdf(self, content_hash: str, source: "pdf_workers.PDFSource") -> Dict[str, Any]:
+        """Extract text, metadata and structure, using the content-addressed store."""
+
+        cached = await asyncio.to_thread(pdf_store.get_extraction, content_hash)
+        if cached:
+            paper_logger.info(f"Using stored extraction for PDF {content_hash[:12]}")
+            return cached
+
+        # Keep the raw PDF and extract from the stored file
+        blob_path = await asyncio.to_thread(pdf_store.put_blob, content_hash, source)
+
+        # Extract metadata first, its page count decides how text is extracted
+        metadata = await self._extract_metadata_from_source(blob_path)
+
+        # Extract text, reusing the extractor chosen for each page on earlier runs
+        page_plan = await asyncio.to_thread(pdf_store.get_page_plan, content_hash)
+        extraction = await self._extract_text_from_source(
+            blob_path, metadata.get("page_count"), page_plan
+        )
+        text = extraction["text"]
+
+        if extraction["page_plan"] != (page_plan or {}):
+            await asyncio.to_thread(pdf_store.put_page_plan, content_hash, extraction["page_plan"])
+
+        # Analyze paper structure
+        structure = await self._analyze_paper_structure(text)
+
+        result = {
+            "text": text,
+            "metadata": metadata,
+            "structure": structure,
+            "length": len(text) if text else 0,
+            "pages_read": extraction["pages_read"],
+            "pages_skipped": extraction["pages_skipped"],
+            "pages_patched": extraction["pages_patched"],
+            "content_hash": content_hash
+        }
+
+        # Failed extractions may be transient (timeouts, full queue), so only successes are kept
+        if text:
+            await asyncio.to_thread(pdf_store.put_extraction, content_hash, result)
+
+        return result
+
+    async def _stored_extraction_for_url(self, pdf_url: str) -> Optional[Dict[str, Any]]:
+        """Get the stored extraction of the content a URL served, if the URL still serves it."""
+
+        entry = await asyncio.to_thread(pdf_store.lookup_url, pdf_url)
+        if not entry:
+            return None
+
+        if not entry["fresh"]:
+            if not await self._url_unchanged(pdf_url, entry):
+                return None
+            await asyncio.to_thread(
+                pdf_store.record_url, pdf_url, entry["content_hash"], entry["etag"], entry["last_modified"]
+            )
+
+        return await asyncio.to_thread(pdf_store.get_extraction, entry["content_hash"])
+
+    async def _url_unchanged(self, pdf_url: str, entry: Dict[str, Any]) -> bool:
+        """Check with a conditional HEAD request whether a URL still serves the stored content."""
+
+        etag = entry.get("etag")
+        last_modified = entry.get("last_modified")
+
+        # Without validators the content can only be compared by downloading it again
+        if not etag and not last_modified:
+            return False
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        try:
+            response = await self.http_client.head(pdf_url, headers=headers)
+        except httpx.HTTPError as e:
+            paper_logger.warning(f"Could not revalidate PDF URL {pdf_url}: {e}")
+            return False
+
+        if response.status_code == 304:
+            return True
+
+        # Some servers ignore conditional headers on HEAD but still report the validators
+        if response.status_code == 200:
+            if etag:
+                return response.headers.get("etag") == etag
+            return response.headers.get("last-modified") == last_modified
+
+        return False
+
+    async def _download_pdf(self, pdf_url: str) -> Optional[SpooledPDF]:
+        """Stream PDF from URL into a spooled temp file, enforcing the size limit mid-stream."""
+
+        spool = SpooledPDF()
+
+        try:
+            async with self.http_client.stream("GET", pdf_url) as response:
                 response.raise_for_status()
 
                 # Check content type
@@ -117,145 +358,251 @@ class PDFProcessor:
                 if "pdf" not in content_type and not pdf_url.endswith('.pdf'):
                     paper_logger.warning(f"URL may not be a PDF: {content_type}")
 
-                # Check file size
-                content_length = len(response.content)
-                if content_length > settings.upload_max_size:
-                    raise ValueError(f"PDF too large: {content_length} bytes")
+                # Reject up front when the server announces an oversized body
+                declared_length = response.headers.get("content-length")
+                if declared_length and declared_length.isdigit():
+                    if int(declared_length) > settings.upload_max_size:
+                        raise PDFTooLargeError(f"PDF too large: {declared_length} bytes")
 
-                paper_logger.info(f"Downloaded PDF: {content_length} bytes")
-                return response.content
+                async for chunk in response.aiter_bytes(settings.pdf_download_chunk_size):
+                    spool.write(chunk)
+
+                spool.etag = response.headers.get("etag")
+                spool.last_modified = response.headers.get("last-modified")
+
+            spool.finish()
+
+            paper_logger.info(f"Downloaded PDF: {spool.size} bytes (sha256 {spool.sha256[:12]})")
+            return spool
 
         except httpx.TimeoutException:
             paper_logger.error(f"Timeout downloading PDF: {pdf_url}")
-            return None
         except httpx.HTTPStatusError as e:
             paper_logger.error(f"HTTP error downloading PDF {pdf_url}: {e.response.status_code}")
-            return None
         except Exception as e:
             paper_logger.error(f"Error downloading PDF {pdf_url}: {e}")
-            return None
-
-    async def _extract_text_from_bytes(self, pdf_content: bytes) -> Optional[str]:
-        """Extract text from PDF bytes using multiple methods."""
 
-        # Try PyMuPDF first (better for academic papers)
-        text = await self._extract_text_pymupdf(pdf_content)
-
-        if not text or len(text.strip()) < 100:
-            # Fallback to PyPDF2
+        spool.cleanup()
+        return None
+
+    async def _extract_text_from_source(
+        self,
+        source: "pdf_workers.PDFSource",
+        page_count: Optional[int] = None,
+        page_plan: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Extract cleaned text from PDF bytes or file, choosing the extractor per page.
+
+        Pages are cleaned as they are extracted and extraction stops once
+        `pdf_max_text_length` characters are collected, so the cost per paper
+        scales with the budget rather than the document length. The budget is
+        well above what one AI prompt takes, so long papers reach the
+        map-reduce stage inputs with their results and conclusions intact.
+        """
+
+        # PyMuPDF reads every page, PyPDF2 only patches pages it reads badly
+        extraction = await self._extract_text_pages(source, page_count, page_plan)
+
+        if not extraction:
+            # Fallback to PyPDF2 when PyMuPDF cannot parse the document at all
             paper_logger.info("PyMuPDF extraction failed, trying PyPDF2")
-            text = await self._extract_text_pypdf2(pdf_content)
+            extraction = await self._extract_text_pypdf2(source)
 
-        if text:
-            # Clean and normalize text
-            text = self._clean_extracted_text(text)
+        if not extraction:
+            return {"text": None, "pages_read": 0, "pages_skipped": 0, "pages_patched": 0, "page_plan": {}}
 
-            # Limit text length
-            if len(text) > settings.max_paper_length:
-                text = text[:settings.max_paper_length]
-                paper_logger.info(f"Text truncated to {settings.max_paper_length} characters")
+        text = extraction["text"]
 
-        return text
+        # Limit text length (the last page may overshoot the budget)
+        if text and len(text) > settings.pdf_max_text_length:
+            text = text[:settings.pdf_max_text_length]
+            paper_logger.info(f"Text truncated to {settings.pdf_max_text_length} characters")
 
-    async def _extract_text_pymupdf(self, pdf_content: bytes) -> Optional[str]:
-        """Extract text using PyMuPDF."""
+        if extraction["pages_skipped"]:
+            paper_logger.info(
+                f"Character budget reached after {extraction['pages_read']} pages, "
+                f"skipped {extraction['pages_skipped']}"
+            )
 
-        try:
-            # Open PDF from bytes
-            pdf_document = fitz.open(stream=pdf_content, filetype="pdf")
+        if extraction.get("pages_patched"):
+            paper_logger.info(f"Patched {extraction['pages_patched']} pages with PyPDF2")
 
-            text_blocks = []
+        return {
+            "text": text,
+            "pages_read": extraction["pages_read"],
+            "pages_skipped": extraction["pages_skipped"],
+            "pages_patched": extraction.get("pages_patched", 0),
+            "page_plan": extraction.get("page_plan", {})
+        }
 
-            for page_num in range(pdf_document.page_count):
-                page = pdf_document.load_page(page_num)
+    async def _extract_text_pages(
+        self,
+        source: "pdf_workers.PDFSource",
+        page_count: Optional[int] = None,
+        page_plan: Optional[Dict[str, str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Extract text page by page, splitting large files across workers."""
 
-                # Extract text with layout preservation
-                text = page.get_text("text")
+        try:
+            # Page-parallel mode needs a file every worker can open on its own
+            if isinstance(source, str) and settings.pdf_parallel_page_threshold > 0:
+                if page_count is None:
+                    page_count = await extraction_engine.run(pdf_workers.count_pages, source)
 
-                if text.strip():
-                    text_blocks.append(f"--- Page {page_num + 1} ---\n{text}")
+                if page_count >= settings.pdf_parallel_page_threshold:
+                    return await self._extract_text_pages_parallel(source, page_count, page_plan)
 
-            pdf_document.close()
-
-            if text_blocks:
-                return "\n\n".join(text_blocks)
-            else:
-                return None
+            return await extraction_engine.run(
+                pdf_workers.extract_text, source, settings.pdf_max_text_length, 0, None, page_plan
+            )
 
+        except ExtractionQueueFullError:
+            raise
         except Exception as e:
             paper_logger.error(f"PyMuPDF extraction failed: {e}")
             return None
 
-    async def _extract_text_pypdf2(self, pdf_content: bytes) -> Optional[str]:
-        """Extract text using PyPDF2."""
+    async def _extract_text_pages_parallel(
+        self,
+        source: str,
+        page_count: int,
+        page_plan: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Extract page ranges in separate workers and merge them back in page order.
+
+        Ranges are submitted as a sliding window of one job per worker and
+        consumed in order, so no further ranges are started once the
+        character budget is reached.
+        """
+
+        budget = settings.pdf_max_text_length
+        pages_per_job = settings.pdf_parallel_pages_per_job
+        ranges = iter([
+            (start, min(start + pages_per_job, page_count))
+            for start in range(0, page_count, pages_per_job)
+        ])
+
+        paper_logger.info(f"Extracting {page_count} pages in parallel jobs of {pages_per_job}")
+
+        in_flight = deque()
+
+        def submit_next() -> None:
+            page_range = next(ranges, None)
+            if page_range:
+                in_flight.append(asyncio.ensure_future(extraction_engine.run(
+                    pdf_workers.extract_text, source, budget, *page_range, page_plan
+                )))
+
+        for _ in range(extraction_engine.max_workers):
+            submit_next()
+
+        text_blocks = []
+        length = 0
+        pages_read = 0
+        pages_patched = 0
+        merged_plan = dict(page_plan or {})
 
         try:
-            pdf_reader = PdfReader(io.BytesIO(pdf_content))
+            while in_flight:
+                result = await in_flight.popleft()
 
-            text_blocks = []
+                pages_read += result["pages_read"]
+                pages_patched += result["pages_patched"]
+                merged_plan.update(result["page_plan"])
 
-            for page_num, page in enumerate(pdf_reader.pages):
-                text = page.extract_text()
+                if result["text"]:
+                    text_blocks.append(result["text"])
+                    length += result["length"]
 
-                if text.strip():
-                    text_blocks.append(f"--- Page {page_num + 1} ---\n{text}")
+                if length >= budget:
+                    break
 
-            if text_blocks:
-                return "\n\n".join(text_blocks)
-            else:
-                return None
+                submit_next()
+
+        finally:
+            for job in in_flight:
+                job.cancel()
 
+        return {
+            "text": "\n\n".join(text_blocks) if text_blocks else None,
+            "length": length,
+            "pages_read": pages_read,
+            "pages_skipped": page_count - pages_read,
+            "pages_patched": pages_patched,
+            "page_plan": merged_plan
+        }
+
+    async def _extract_text_pypdf2(self, source: "pdf_workers.PDFSource") -> Optional[Dict[str, Any]]:
+        """Extract text using PyPDF2."""
+
+        try:
+            return await extraction_engine.run(
+                pdf_workers.extract_text_pypdf2, source, settings.pdf_max_text_length
+            )
+
+        except ExtractionQueueFullError:
+            raise
         except Exception as e:
             paper_logger.error(f"PyPDF2 extraction failed: {e}")
             return None
 
-    def _clean_extracted_text(self, text: str) -> str:
-        """Clean and normalize extracted text."""
+    async def _extract_metadata_from_ranges(self, pdf_url: str) -> Optional[Dict[str, Any]]:
+        """Extract metadata from the first page fetched with range requests.
 
-        if not text:
-            return text
+        Returns None when the server lacks range support or the document
+        structure cannot be followed, so the caller can download the whole file.
+        """
 
-        # Remove excessive whitespace
-        text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
-        text = re.sub(r'[ \t]+', ' ', text)
+        reader = PDFRangeReader(self.http_client, pdf_url)
 
-        # Fix common OCR errors in academic papers
-        text = re.sub(r'(?<=\w)- (?=\w)', '', text)  # Remove hyphenation
-        text = re.sub(r'(\w)\s+([.,;:!?])', r'\1\2', text)  # Fix punctuation spacing
+        try:
+            first_page = await reader.fetch_first_page()
+        except Exception as e:
+            paper_logger.info(f"Range requests not usable for {pdf_url}, downloading full PDF: {e}")
+            return None
 
-        # Remove page numbers and headers/footers (simple approach)
-        lines = text.split('\n')
-        cleaned_lines = []
+        try:
+            raw = await extraction_engine.run(pdf_workers.extract_metadata, first_page.path)
+        except ExtractionQueueFullError:
+            raise
+        except Exception as e:
+            paper_logger.warning(f"Could not read first page fetched from {pdf_url}: {e}")
+            return None
+        finally:
+            os.unlink(first_page.path)
 
-        for line in lines:
-            line = line.strip()
+        if raw["repaired"] or not raw["page_count"]:
+            paper_logger.warning(f"First page fetched from {pdf_url} is incomplete")
+            return None
 
-            # Skip likely page numbers
-            if re.match(r'^\d+$', line):
-                continue
+        # The rebuilt file only holds the first page
+        if first_page.page_count:
+            raw["page_count"] = first_page.page_count
 
-            # Skip short lines that are likely headers/footers
-            if len(line) < 10 and (
-                'page' in line.lower() or
-                'vol' in line.lower() or
-                re.match(r'^[IVX]+$', line)
-            ):
-                continue
+        return self._build_metadata(raw)
 
-            cleaned_lines.append(line)
+    async def _extract_metadata_from_source(self, source: "pdf_workers.PDFSource") -> Dict[str, Any]:
+        """Extract metadata from PDF bytes or file."""
 
-        return '\n'.join(cleaned_lines)
+        try:
+            # Parse document info and first page in an extraction worker
+            raw = await extraction_engine.run(pdf_workers.extract_metadata, source)
 
-    async def _extract_metadata_from_bytes(self, pdf_content: bytes) -> Dict[str, Any]:
-        """Extract metadata from PDF bytes."""
+        except ExtractionQueueFullError:
+            raise
+        except Exception as e:
+            paper_logger.error(f"Metadata extraction failed: {e}")
+            raw = None
 
-        metadata = {}
+        return self._build_metadata(raw)
 
-        try:
-            # Try PyMuPDF for metadata
-            pdf_document = fitz.open(stream=pdf_content, filetype="pdf")
+    def _build_metadata(self, raw: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build metadata from the document info dictionary and first page text."""
+
+        metadata = {}
 
-            pdf_metadata = pdf_document.metadata
+        if raw:
+            pdf_metadata = raw["metadata"]
 
             if pdf_metadata:
                 metadata.update({
@@ -269,21 +616,13 @@ class PDFProcessor:
                 })
 
             # Get page count
-            metadata["page_count"] = pdf_document.page_count
+            metadata["page_count"] = raw["page_count"]
 
             # Try to extract title and authors from first page
-            if pdf_document.page_count > 0:
-                first_page = pdf_document.load_page(0)
-                first_page_text = first_page.get_text("text")
-
-                paper_info = self._extract_paper_info_from_text(first_page_text)
+            if raw["first_page_text"]:
+                paper_info = self._extract_paper_info_from_text(raw["first_page_text"])
                 metadata.update(paper_info)
 
-            pdf_document.close()
-
-        except Exception as e:
-            paper_logger.error(f"Metadata extraction failed: {e}")
-
         # Clean up metadata
         metadata = self._clean_metadata(metadata)
 
@@ -442,13 +781,13 @@ class PDFProcessor:
         return cleaned
 
     async def _analyze_paper_structure(self, text: str) -> Dict[str, Any]:
-        """Analyze paper structure and extract sections."""
+        """Analyze paper structure and index its sections by character offset."""
 
         if not text:
             return {}
 
         structure = {
-            "sections": [],
+            "section_index": [],
             "has_abstract": False,
             "has_introduction": False,
             "has_conclusion": False,
@@ -457,48 +796,17 @@ class PDFProcessor:
         }
 
         try:
-            # Split into lines
-            lines = text.split('\n')
-
             # Estimate page count
-            page_markers = [line for line in lines if line.strip().startswith('---')]
-            structure["estimated_pages"] = len(page_markers)
+            structure["estimated_pages"] = text.count("--- Page ")
 
-            # Find sections
-            sections = []
-            current_section = None
+            section_index = build_section_index(text)
+            kinds = {section["kind"] for section in section_index}
 
-            for line in lines:
-                line = line.strip()
-
-                if self._looks_like_section_header(line):
-                    if current_section:
-                        sections.append(current_section)
-
-                    current_section = {
-                        "title": line,
-                        "content": []
-                    }
-
-                    # Check for specific sections
-                    line_lower = line.lower()
-                    if "abstract" in line_lower:
-                        structure["has_abstract"] = True
-                    elif "introduction" in line_lower:
-                        structure["has_introduction"] = True
-                    elif "conclusion" in line_lower:
-                        structure["has_conclusion"] = True
-                    elif "references" in line_lower or "bibliography" in line_lower:
-                        structure["has_references"] = True
-
-                elif current_section and line:
-                    current_section["content"].append(line)
-
-            # Add last section
-            if current_section:
-                sections.append(current_section)
-
-            structure["sections"] = sections
+            structure["section_index"] = section_index
+            structure["has_abstract"] = "abstract" in kinds
+            structure["has_introduction"] = "introduction" in kinds
+            structure["has_conclusion"] = "conclusion" in kinds
+            structure["has_references"] = "references" in kinds
 
         except Exception as e:
             paper_logger.error(f"Paper structure analysis failed: {e}")
@@ -0,0 +1,780 @@
+"""
+First-page reader for remote PDFs using HTTP range requests.
+
+Only the trailer, the cross-reference data and the objects reachable from
+the document info dictionary and the first page are fetched. They are
+written into a small single-page PDF that keeps the original object
+numbers, so the regular metadata extraction can run on it unchanged.
+"""
+import asyncio
+import bisect
+import os
+import re
+import tempfile
+import zlib
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.app_logging import paper_logger
+
+
+# Largest decoded stream accepted, so a deflate bomb in a remote PDF cannot exhaust memory
+MAX_DECODED_BYTES = 8 * 1024 * 1024
+
+class RangeNotSupportedError(Exception):
+    """Raised when the server does not answer byte range requests."""
+
+
+class UnusableXrefError(Exception):
+    """Raised when the cross-reference data cannot be parsed or followed."""
+
+
+class RangeBudgetExceededError(Exception):
+    """Raised when the first page needs more bytes than a partial fetch is worth."""
+
+
+class _Truncated(Exception):
+    """Raised by the parser when the buffer ends before the object does."""
+
+
+class PDFRef(NamedTuple):
+    """Indirect object reference."""
+    num: int
+    gen: int
+
+
+class PDFString(NamedTuple):
+    """Literal or hex string, kept as its raw token."""
+    raw: bytes
+
+
+class PDFStream(NamedTuple):
+    """Stream object with its still-encoded data."""
+    dict: Dict[str, Any]
+    data: bytes
+
+
+class FirstPage(NamedTuple):
+    """Single-page PDF built from fetched ranges."""
+    path: str
+    page_count: Optional[int]
+    bytes_fetched: int
+    requests: int
+
+
+# Object parsing
+_WHITESPACE = b"\x00\t\n\x0c\r "
+_TOKEN_END = re.compile(rb"[\x00\t\n\x0c\r ()<>\[\]{}/%]")
+_NUMBER = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_REF = re.compile(rb"(\d+)\s+(\d+)\s+R(?![^\x00\t\n\x0c\r ()<>\[\]{}/%])")
+_REF_TAIL = re.compile(rb"[\x00\t\n\x0c\r \d]*")
+_OBJ_HEADER = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj")
+_XREF_ENTRY = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+
+
+def _skip_whitespace(data: bytes, pos: int) -> int:
+    """Skip whitespace and comments."""
+
+    while pos < len(data):
+        char = data[pos]
+        if char in _WHITESPACE:
+            pos += 1
+        elif char == 0x25:  # %
+            while pos < len(data) and data[pos] not in b"\r\n":
+                pos += 1
+        else:
+            return pos
+
+    raise _Truncated()
+
+
+def parse_object(data: bytes, pos: int) -> Tuple[Any, int]:
+    """Parse one direct object, returning it with the position after it."""
+
+    pos = _skip_whitespace(data, pos)
+    char = data[pos:pos + 1]
+
+    if data.startswith(b"<<", pos):
+        result = {}
+        pos += 2
+        while True:
+            pos = _skip_whitespace(data, pos)
+            if data.startswith(b">>", pos):
+                return result, pos + 2
+            key, pos = parse_object(data, pos)
+            if not isinstance(key, str):
+                raise UnusableXrefError(f"Dictionary key is not a name at {pos}")
+            result[key], pos = parse_object(data, pos)
+
+    if char == b"[":
+        result = []
+        pos += 1
+        while True:
+            pos = _skip_whitespace(data, pos)
+            if data[pos:pos + 1] == b"]":
+                return result, pos + 1
+            value, pos = parse_object(data, pos)
+            result.append(value)
+
+    if char == b"<":
+        end = data.find(b">", pos)
+        if end == -1:
+            raise _Truncated()
+        return PDFString(data[pos:end + 1]), end + 1
+
+    if char == b"(":
+        depth = 0
+        end = pos
+        while True:
+            if end >= len(data):
+                raise _Truncated()
+            current = data[end]
+            if current == 0x5C:  # Backslash escapes the next byte
+                end += 2
+                continue
+            if current == 0x28:
+                depth += 1
+            elif current == 0x29:
+                depth -= 1
+                if depth == 0:
+                    return PDFString(data[pos:end + 1]), end + 1
+            end += 1
+
+    if char == b"/":
+        match = _TOKEN_END.search(data, pos + 1)
+        if not match:
+            raise _Truncated()
+        return data[pos + 1:match.start()].decode("latin-1"), match.start()
+
+    if char.isdigit() or char in (b"+", b"-", b"."):
+        ref = _REF.match(data, pos)
+        if ref:
+            return PDFRef(int(ref.group(1)), int(ref.group(2))), ref.end()
+
+        # A number running into the end of the buffer may be a cut-off reference
+        number = _NUMBER.match(data, pos)
+        if not number or _REF_TAIL.match(data, number.end()).end() >= len(data):
+            raise _Truncated()
+        token = number.group()
+        return (float(token) if b"." in token else int(token)), number.end()
+
+    for keyword, value in ((b"true", True), (b"false", False), (b"null", None)):
+        if data.startswith(keyword, pos):
+            return value, pos + len(keyword)
+
+    raise UnusableXrefError(f"Unexpected token {data[pos:pos + 10]!r} at {pos}")
+
+
+def parse_indirect_object(data: bytes, pos: int = 0) -> Tuple[PDFRef, Any]:
+    """Parse `num gen obj ... endobj` at a position, including stream data."""
+
+    header = _OBJ_HEADER.match(data, pos)
+    if not header:
+        if len(data) - pos < 32:
+            raise _Truncated()
+        raise UnusableXrefError(f"No object header at {pos}")
+
+    ref = PDFRef(int(header.group(1)), int(header.group(2)))
+    value, pos = parse_object(data, header.end())
+
+    stream_pos = _skip_whitespace(data, pos)
+    if isinstance(value, dict) and data.startswith(b"stream", stream_pos):
+        start = stream_pos + len(b"stream")
+        start += 2 if data.startswith(b"\r\n", start) else 1
+
+        length = value.get("Length")
+        end = start + length if isinstance(length, int) else -1
+
+        if end > len(data):
+            raise _Truncated()
+        if end == -1 or b"endstream" not in data[end:end + 32]:
+            # Indirect or wrong /Length, the keyword itself marks the end
+            end = data.find(b"endstream", start)
+            if end == -1:
+                raise _Truncated()
+            while end > start and data[end - 1] in b"\r\n":
+                end -= 1
+
+        value = PDFStream(value, data[start:end])
+
+    return ref, value
+
+
+def decode_stream(stream: PDFStream) -> bytes:
+    """Decode a Flate-compressed stream, applying PNG predictors.
+
+    Streams decoding to more than MAX_DECODED_BYTES are rejected as unusable.
+    """
+
+    filters = stream.dict.get("Filter")
+    filters = filters if isinstance(filters, list) else [filters] if filters else []
+    params = stream.dict.get("DecodeParms") or {}
+    params = params[0] if isinstance(params, list) else params
+
+    data = stream.data
+    for name in filters:
+        if name != "FlateDecode":
+            raise UnusableXrefError(f"Unsupported stream filter {name}")
+        decompressor = zlib.decompressobj()
+        try:
+            decoded = decompressor.decompress(data, MAX_DECODED_BYTES)
+        except zlib.error as e:
+            raise UnusableXrefError(f"Corrupt Flate stream: {e}") from e
+
+        if decompressor.unconsumed_tail:
+            raise UnusableXrefError(f"Stream decodes to more than {MAX_DECODED_BYTES} bytes")
+        data = decoded
+
+    predictor = params.get("Predictor", 1) if isinstance(params, dict) else 1
+    if predictor >= 10:
+        data = _undo_png_predictor(data, params.get("Columns", 1))
+    elif predictor != 1:
+        raise UnusableXrefError(f"Unsupported predictor {predictor}")
+
+    return data
+
+
+def _undo_png_predictor(data: bytes, columns: int) -> bytes:
+    """Reverse PNG row filters (one filter byte per row, one byte per sample)."""
+
+    output = bytearray()
+    previous = bytearray(columns)
+
+    for row_start in range(0, len(data), columns + 1):
+        row_filter = data[row_start]
+        row = bytearray(data[row_start + 1:row_start + 1 + columns])
+
+        for i in range(len(row)):
+            left = row[i - 1] if i else 0
+            up = previous[i]
+            if row_filter == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif row_filter == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif row_filter == 3:
+                row[i] = (row[i] + (left + up) // 2) & 0xFF
+            elif row_filter == 4:
+                upper_left = previous[i - 1] if i else 0
+                estimate = left + up - upper_left
+                distances = (abs(estimate - left), abs(estimate - up), abs(estimate - upper_left))
+                row[i] = (row[i] + (left, up, upper_left)[distances.index(min(distances))]) & 0xFF
+
+        output += row
+        previous = row
+
+    return bytes(output)
+
+
+def serialize_object(value: Any) -> bytes:
+    """Serialize a parsed object back to PDF syntax."""
+
+    if isinstance(value, PDFRef):
+        return b"%d %d R" % (value.num, value.gen)
+    if isinstance(value, PDFString):
+        return value.raw
+    if isinstance(value, str):
+        return b"/" + value.encode("latin-1")
+    if isinstance(value, bool):
+        return b"true" if value else b"false"
+    if value is None:
+        return b"null"
+    if isinstance(value, int):
+        return b"%d" % value
+    if isinstance(value, float):
+        return (b"%.6f" % value).rstrip(b"0").rstrip(b".")
+    if isinstance(value, list):
+        return b"[" + b" ".join(serialize_object(item) for item in value) + b"]"
+    if isinstance(value, dict):
+        return b"<<" + b"".join(
+            b"/" + key.encode("latin-1") + b" " + serialize_object(item)
+            for key, item in value.items()
+        ) + b">>"
+    if isinstance(value, PDFStream):
+        stream_dict = dict(value.dict, Length=len(value.data))
+        return serialize_object(stream_dict) + b"\nstream\n" + value.data + b"\nendstream"
+
+    raise ValueError(f"Cannot serialize {type(value).__name__}")
+
+
+def _collect_refs(value: Any, refs: List[PDFRef], skip_keys: Set[str] = frozenset()) -> None:
+    """Collect references nested in an object."""
+
+    if isinstance(value, PDFRef):
+        refs.append(value)
+    elif isinstance(value, PDFStream):
+        _collect_refs(value.dict, refs, skip_keys)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if key not in skip_keys:
+                _collect_refs(item, refs)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_refs(item, refs)
+
+
+class PDFRangeReader:
+    """Fetches the parts of a remote PDF needed to read its metadata and first page."""
+
+    # Page attributes inherited from page tree nodes
+    INHERITED_KEYS = ("Resources", "MediaBox", "CropBox", "Rotate")
+
+    # Page entries that point at other pages or are not needed for text
+    SKIPPED_PAGE_KEYS = frozenset({"Parent", "Annots", "B", "Thumb", "Metadata", "PieceInfo", "AA"})
+
+    # Ranges closer than this are fetched with a single request
+    COALESCE_GAP = 4096
+
+    def __init__(self, http_client: httpx.AsyncClient, url: str, tail_size: int = None, max_bytes: int = None):
+        """Initialize range reader for one URL."""
+        self.http_client = http_client
+        self.url = url
+        self.tail_size = tail_size or settings.pdf_range_tail_size
+        self.max_bytes = max_bytes or settings.pdf_range_max_bytes
+
+        self.file_size: Optional[int] = None
+        self.bytes_fetched = 0
+        self.requests = 0
+
+        self._segments: List[Tuple[int, bytes]] = []  # Sorted, non-overlapping
+        self._xref: Dict[int, Tuple] = {}
+        self._bounds: List[int] = []
+        self._object_streams: Dict[int, Tuple[bytes, Dict[int, int]]] = {}
+
+    async def fetch_first_page(self) -> FirstPage:
+        """Fetch info dictionary and first page and write them to a single-page PDF."""
+
+        tail_start = await self._fetch_tail()
+
+        if tail_start == 0:
+            # Small file, the tail request already returned all of it
+            return FirstPage(self._write_file(self._read_cached(0, self.file_size)), None,
+                             self.bytes_fetched, self.requests)
+
+        startxref = _STARTXREF.findall(self._read_cached(tail_start, self.file_size))
+        if not startxref:
+            raise UnusableXrefError("No startxref in file tail")
+
+        trailer = await self._load_xref(int(startxref[-1]))
+
+        if "Encrypt" in trailer:
+            raise UnusableXrefError("Encrypted document")
+        if not isinstance(trailer.get("Root"), PDFRef):
+            raise UnusableXrefError("Trailer has no document catalog")
+
+        objects, page_ref, page_count = await self._load_first_page(trailer)
+        pdf_bytes = self._build_pdf(trailer, objects, page_ref)
+
+        paper_logger.info(
+            f"Read first page of {self.url} with {self.requests} range requests, "
+            f"{self.bytes_fetched} of {self.file_size} bytes"
+        )
+
+        return FirstPage(self._write_file(pdf_bytes), page_count, self.bytes_fetched, self.requests)
+
+    # Fetching
+    async def _fetch(self, start: int, end: int) -> None:
+        """Fetch bytes [start, end) with a range request."""
+
+        if self.bytes_fetched + (end - start) > self.max_bytes:
+            raise RangeBudgetExceededError(f"First page needs more than {self.max_bytes} bytes")
+
+        await self._request(f"bytes={start}-{end - 1}")
+
+    async def _fetch_tail(self) -> int:
+        """Fetch the end of the file, learning its size. Returns the tail offset."""
+
+        return await self._request(f"bytes=-{self.tail_size}")
+
+    async def _request(self, byte_range: str) -> int:
+        """Send one range request and store the returned bytes. Returns their offset."""
+
+        self.requests += 1
+
+        async with self.http_client.stream("GET", self.url, headers={"Range": byte_range}) as response:
+            # A full 200 response is abandoned unread, the caller falls back to a download
+            if response.status_code != 206:
+                raise RangeNotSupportedError(f"Server answered range request with {response.status_code}")
+
+            content_range = re.match(
+                r"bytes (\d+)-(\d+)/(\d+)", response.headers.get("content-range", "")
+            )
+            if not content_range:
+                raise RangeNotSupportedError("Missing or unsupported Content-Range header")
+
+            data = await response.aread()
+
+        start, total = int(content_range.group(1)), int(content_range.group(3))
+        self.file_size = total
+        self.bytes_fetched += len(data)
+        self._store(start, data)
+        return start
+
+    def _store(self, start: int, data: bytes) -> None:
+        """Add fetched bytes, merging them with overlapping segments."""
+
+        merged_start, merged = start, data
+        kept = []
+
+        for seg_start, seg_data in self._segments:
+            seg_end = seg_start + len(seg_data)
+            if seg_end < merged_start or seg_start > merged_start + len(merged):
+                kept.append((seg_start, seg_data))
+                continue
+
+            # Overlapping or adjacent, new bytes win where both exist
+            new_start = min(seg_start, merged_start)
+            buffer = bytearray(max(seg_end, merged_start + len(merged)) - new_start)
+            buffer[seg_start - new_start:seg_end - new_start] = seg_data
+            buffer[merged_start - new_start:merged_start - new_start + len(merged)] = merged
+            merged_start, merged = new_start, bytes(buffer)
+
+        kept.append((merged_start, merged))
+        self._segments = sorted(kept)
+
+    def _read_cached(self, start: int, end: int) -> Optional[bytes]:
+        """Get bytes [start, end) if already fetched."""
+
+        for seg_start, seg_data in self._segments:
+            if seg_start <= start and seg_start + len(seg_data) >= end:
+                return seg_data[start - seg_start:end - seg_start]
+        return None
+
+    async def _read(self, start: int, end: int) -> bytes:
+        """Get bytes [start, end), fetching only the parts not seen yet."""
+
+        end = min(end, self.file_size)
+        data = self._read_cached(start, end)
+
+        if data is None:
+            gaps = []
+            position = start
+            for seg_start, seg_data in self._segments:
+                seg_end = seg_start + len(seg_data)
+                if seg_end <= position or seg_start >= end:
+                    continue
+                if seg_start > position:
+                    gaps.append((position, seg_start))
+                position = max(position, seg_end)
+            if position < end:
+                gaps.append((position, end))
+
+            for gap_start, gap_end in gaps:
+                await self._fetch(gap_start, gap_end)
+            data = self._read_cached(start, end)
+
+        return data
+
+    async def _parse_at(self, offset: int, parser, end: int = None) -> Any:
+        """Run a parser on bytes from offset, growing the window until it fits."""
+
+        end = end or offset + 4096
+
+        while True:
+            data = await self._read(offset, end)
+            try:
+                return parser(data)
+            except _Truncated:
+                if offset + len(data) >= self.file_size:
+                    raise UnusableXrefError(f"Object at {offset} runs past end of file")
+                end = offset + 2 * (end - offset)
+
+    # Cross-reference data
+    async def _load_xref(self, offset: int) -> Dict[str, Any]:
+        """Load every xref section in the chain. Newer entries win."""
+
+        trailer: Dict[str, Any] = {}
+        pending = [offset]
+        seen = set()
+
+        while pending:
+            offset = pending.pop(0)
+            if offset in seen or not 0 <= offset < self.file_size:
+                raise UnusableXrefError(f"Bad xref offset {offset}")
+            seen.add(offset)
+
+            section_trailer = await self._parse_at(offset, self._parse_xref_section)
+
+            for key, value in section_trailer.items():
+                trailer.setdefault(key, value)
+
+            # Hybrid files keep compressed entries in a separate stream
+            if isinstance(section_trailer.get("XRefStm"), int):
+                pending.insert(0, section_trailer["XRefStm"])
+            if isinstance(section_trailer.get("Prev"), int):
+                pending.append(section_trailer["Prev"])
+
+        # Object bounds: an object ends where the next known one starts
+        self._bounds = sorted(
+            {entry[1] for entry in self._xref.values() if entry[0] == "n"} | seen | {self.file_size}
+        )
+
+        return trailer
+
+    def _parse_xref_section(self, data: bytes) -> Dict[str, Any]:
+        """Parse a classic xref table or an xref stream, returning its trailer."""
+
+        pos = _skip_whitespace(data, 0)
+        if not data.startswith(b"xref", pos):
+            return self._parse_xref_stream(data)
+
+        entries = {}
+        pos += len(b"xref")
+
+        while True:
+            pos = _skip_whitespace(data, pos)
+            if data.startswith(b"trailer", pos):
+                break
+
+            first, pos = parse_object(data, pos)
+            count, pos = parse_object(data, pos)
+            if not isinstance(first, int) or not isinstance(count, int):
+                raise UnusableXrefError("Bad xref subsection header")
+
+            for num in range(first, first + count):
+                pos = _skip_whitespace(data, pos)
+                entry = _XREF_ENTRY.match(data, pos)
+                if not entry:
+                    if len(data) - pos < 20:
+                        raise _Truncated()
+                    raise UnusableXrefError(f"Bad xref entry at {pos}")
+                if entry.group(3) == b"n":
+                    entries[num] = ("n", int(entry.group(1)), int(entry.group(2)))
+                else:
+                    entries[num] = ("f",)
+                pos = entry.end()
+
+        trailer, _ = parse_object(data, pos + len(b"trailer"))
+
+        for num, entry in entries.items():
+            self._xref.setdefault(num, entry)
+
+        return trailer
+
+    def _parse_xref_stream(self, data: bytes) -> Dict[str, Any]:
+        """Parse a cross-reference stream object."""
+
+        _, stream = parse_indirect_object(data)
+        if not isinstance(stream, PDFStream) or stream.dict.get("Type") != "XRef":
+            raise UnusableXrefError("startxref does not point at xref data")
+
+        widths = stream.dict.get("W")
+        size = stream.dict.get("Size")
+        index = stream.dict.get("Index", [0, size])
+        if not isinstance(widths, list) or len(widths) != 3 or not isinstance(size, int):
+            raise UnusableXrefError("Bad xref stream dictionary")
+
+        rows = decode_stream(stream)
+        row_size = sum(widths)
+        pos = 0
+
+        def field(width: int, default: int) -> int:
+            nonlocal pos
+            if not width:
+                return default
+            value = int.from_bytes(rows[pos:pos + width], "big")
+            pos += width
+            return value
+
+        for first, count in zip(index[::2], index[1::2]):
+            for num in range(first, first + count):
+                if pos + row_size > len(rows):
+                    raise UnusableXrefError("Xref stream is shorter than its index")
+
+                entry_type = field(widths[0], 1)
+                second = field(widths[1], 0)
+                third = field(widths[2], 0)
+
+                if entry_type == 1:
+                    self._xref.setdefault(num, ("n", second, third))
+                elif entry_type == 2:
+                    self._xref.setdefault(num, ("c", second, third))
+                else:
+                    self._xref.setdefault(num, ("f",))
+
+        return stream.dict
+
+    # Objects
+    async def _load_first_page(self, trailer: Dict[str, Any]) -> Tuple[Dict[PDFRef, Any], PDFRef, Optional[int]]:
+        """Load the objects behind the info dictionary and the first page."""
+
+        objects: Dict[PDFRef, Any] = {}
+        inherited: Dict[str, Any] = {}
+
+        # Walk catalog -> page tree -> first page
+        catalog = await self._load_object(trailer["Root"])
+        node_ref = catalog.get("Pages") if isinstance(catalog, dict) else None
+        if not isinstance(node_ref, PDFRef):
+            raise UnusableXrefError("Catalog has no page tree")
+
+        page_count = None
+        root_pages = None
+
+        for _ in range(32):  # Page trees are shallow, a deeper chain is malformed
+            node = await self._load_object(node_ref)
+            if not isinstance(node, dict):
+                raise UnusableXrefError("Page tree node is not a dictionary")
+
+            if root_pages is None:
+                root_pages = node
+                count = node.get("Count")
+                page_count = await self._load_object(count) if isinstance(count, PDFRef) else count
+
+            kids = node.get("Kids")
+            if node.get("Type") == "Page" or not kids:
+                break
+
+            for key in self.INHERITED_KEYS:
+                if key in node:
+                    inherited[key] = node[key]
+
+            kids = await self._load_object(kids) if isinstance(kids, PDFRef) else kids
+            node_ref = kids[0] if isinstance(kids, list) and kids else None
+            if not isinstance(node_ref, PDFRef):
+                raise UnusableXrefError("Page tree node has no kids")
+        else:
+            raise UnusableXrefError("Page tree is too deep")
+
+        page = dict(inherited, **node)
+        objects[node_ref] = page
+
+        # Everything the page and info dictionary reference, level by level
+        pending: List[PDFRef] = []
+        _collect_refs(page, pending, self.SKIPPED_PAGE_KEYS)
+        if isinstance(trailer.get("Info"), PDFRef):
+            pending.append(trailer["Info"])
+
+        while pending:
+            level = [ref for ref in dict.fromkeys(pending) if ref not in objects]
+            pending = []
+
+            await self._prefetch(level)
+
+            for ref in level:
+                value = await self._load_object(ref)
+                if value is None:
+                    continue  # Free or missing, PyMuPDF reads it as null too
+                objects[ref] = value
+                _collect_refs(value, pending, {"Parent"})
+
+        return objects, node_ref, page_count if isinstance(page_count, int) else None
+
+    async def _prefetch(self, refs: List[PDFRef]) -> None:
+        """Fetch the byte ranges of several objects concurrently."""
+
+        ranges = []
+        for ref in refs:
+            entry = self._xref.get(ref.num)
+            if entry and entry[0] == "c":
+                entry = self._xref.get(entry[1])
+                if entry and entry[0] == "c":
+                    continue
+            if entry and entry[0] == "n":
+                start = entry[1]
+                end = self._object_end(start)
+                if self._read_cached(start, end) is None:
+                    ranges.append((start, end))
+
+        coalesced = []
+        for start, end in sorted(set(ranges)):
+            if coalesced and start - coalesced[-1][1] <= self.COALESCE_GAP:
+                coalesced[-1] = (coalesced[-1][0], max(end, coalesced[-1][1]))
+            else:
+                coalesced.append((start, end))
+
+        await asyncio.gather(*(self._read(start, end) for start, end in coalesced))
+
+    async def _load_object(self, ref: PDFRef) -> Any:
+        """Load and parse one object, from its offset or its object stream."""
+
+        entry = self._xref.get(ref.num)
+
+        if not entry or entry[0] == "f":
+            return None
+
+        if entry[0] == "c":
+            data, offsets = await self._load_object_stream(entry[1])
+            if ref.num not in offsets:
+                raise UnusableXrefError(f"Object {ref.num} missing from object stream {entry[1]}")
+            value, _ = parse_object(data, offsets[ref.num])
+            return value
+
+        offset = entry[1]
+        _, value = await self._parse_at(offset, parse_indirect_object, self._object_end(offset))
+        return value
+
+    async def _load_object_stream(self, num: int) -> Tuple[bytes, Dict[int, int]]:
+        """Load and decode an object stream, indexing its objects."""
+
+        if num not in self._object_streams:
+            stream = await self._load_object(PDFRef(num, 0))
+            if not isinstance(stream, PDFStream):
+                raise UnusableXrefError(f"Object {num} is not an object stream")
+
+            # Terminate the last object like an indirect one so the parser sees its end
+            data = decode_stream(stream) + b"\nendobj"
+            first = stream.dict.get("First", 0)
+            header = data[:first].split()
+            offsets = {
+                int(header[i]): first + int(header[i + 1])
+                for i in range(0, len(header) - 1, 2)
+            }
+            self._object_streams[num] = (data, offsets)
+
+        return self._object_streams[num]
+
+    def _object_end(self, offset: int) -> int:
+        """Get the offset of the next known object or xref section."""
+
+        index = bisect.bisect_right(self._bounds, offset)
+        return self._bounds[index] if index < len(self._bounds) else self.file_size
+
+    # Output
+    def _build_pdf(self, trailer: Dict[str, Any], objects: Dict[PDFRef, Any], page_ref: PDFRef) -> bytes:
+        """Write the fetched objects as a single-page PDF with the original numbering."""
+
+        catalog_ref = trailer["Root"]
+        pages_ref = PDFRef(max(ref.num for ref in objects) + 1, 0)
+        if catalog_ref.num >= pages_ref.num:
+            pages_ref = PDFRef(catalog_ref.num + 1, 0)
+
+        objects = dict(objects)
+        objects[catalog_ref] = {"Type": "Catalog", "Pages": pages_ref}
+        objects[pages_ref] = {"Type": "Pages", "Kids": [page_ref], "Count": 1}
+        objects[page_ref] = dict(objects[page_ref], Type="Page", Parent=pages_ref)
+        for key in self.SKIPPED_PAGE_KEYS - {"Parent"}:
+            objects[page_ref].pop(key, None)
+
+        output = bytearray(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+        offsets = {}
+
+        for ref in sorted(objects):
+            offsets[ref.num] = (len(output), ref.gen)
+            output += b"%d %d obj\n" % ref + serialize_object(objects[ref]) + b"\nendobj\n"
+
+        size = max(offsets) + 1
+        xref_offset = len(output)
+        output += b"xref\n0 %d\n" % size
+        for num in range(size):
+            if num in offsets:
+                output += b"%010d %05d n\r\n" % offsets[num]
+            else:
+                output += b"0000000000 65535 f\r\n"
+
+        new_trailer = {"Size": size, "Root": catalog_ref}
+        if trailer.get("Info") in objects:
+            new_trailer["Info"] = trailer["Info"]
+
+        output += b"trailer\n" + serialize_object(new_trailer)
+        output += b"\nstartxref\n%d\n%%%%EOF\n" % xref_offset
+        return bytes(output)
+
+    def _write_file(self, data: bytes) -> str:
+        """Write PDF bytes to a temp file for the extraction workers."""
+
+        fd, path = tempfile.mkstemp(suffix=".pdf", dir=settings.pdf_spool_dir)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return path
@@ -0,0 +1,376 @@
+"""
+Content-addressed store for PDF blobs and their extraction results.
+
+Entries are keyed by the SHA-256 of the PDF bytes and kept on local disk:
+
+    <root>/blobs/<sha[:2]>/<sha>/document.pdf
+    <root>/blobs/<sha[:2]>/<sha>/extraction.json
+    <root>/blobs/<sha[:2]>/<sha>/page_plan.json   -> extractor chosen per page
+    <root>/urls/<sha256(url)>                     -> content hash last seen at that URL, with its validators
+
+Entry directory mtimes double as LRU access times, so eviction works across
+every process that shares the directory. Entries without an extraction yet
+(e.g. uploads queued for background extraction) are pinned until they have
+been processed or `pdf_store_pending_ttl_seconds` have passed.
+
+A URL entry is trusted for `pdf_store_url_ttl_seconds` after it was last
+checked; after that callers revalidate it against the server with the stored
+ETag / Last-Modified. URL entries count towards the size limit and are
+removed once the content they point to has been evicted.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.app_logging import paper_logger
+from app.utils.files import atomic_write
+
+
+# Bump when extraction output changes so stale cached results are ignored
+EXTRACTION_VERSION = 5
+
+BLOB_FILENAME = "document.pdf"
+EXTRACTION_FILENAME = "extraction.json"
+PAGE_PLAN_FILENAME = "page_plan.json"
+
+# How long the running size total is trusted before the store is rescanned,
+# since other processes sharing the directory add entries too
+RESCAN_INTERVAL_SECONDS = 300
+
+
+class PDFBlobStore:
+    """Disk-backed PDF store with size-based LRU eviction."""
+
+    def __init__(self, root: str = None, max_bytes: int = None, pending_ttl: float = None, url_ttl: float = None):
+        """Initialize PDF store."""
+        self.root = root or settings.pdf_store_dir
+        self.max_bytes = max_bytes or settings.pdf_store_max_bytes
+        self.pending_ttl = pending_ttl if pending_ttl is not None else settings.pdf_store_pending_ttl_seconds
+        self.url_ttl = url_ttl if url_ttl is not None else settings.pdf_store_url_ttl_seconds
+        self._lock = threading.Lock()
+
+        # Running size total, resynced from disk on every scan
+        self._size: Optional[int] = None
+        self._scanned_at = 0.0
+
+        self._hits = 0
+        self._misses = 0
+        self._url_hits = 0
+        self._evictions = 0
+
+    # Blobs
+    def blob_path(self, content_hash: str) -> Optional[str]:
+        """Get path of a stored PDF, if present."""
+
+        path = os.path.join(self._entry_dir(content_hash), BLOB_FILENAME)
+        if os.path.exists(path):
+            self._touch(content_hash)
+            return path
+        return None
+
+    def put_blob(self, content_hash: str, source: Any) -> str:
+        """Store a PDF from a temp file path (moved into place) or bytes."""
+
+        entry_dir = self._entry_dir(content_hash)
+        os.makedirs(entry_dir, exist_ok=True)
+        path = os.path.join(entry_dir, BLOB_FILENAME)
+
+        if os.path.exists(path):
+            if isinstance(source, str) and source != path:
+                os.unlink(source)
+        else:
+            if isinstance(source, str):
+                shutil.move(source, path)
+            else:
+                atomic_write(path, source)
+            self._add_size(os.path.getsize(path))
+
+        self._touch(content_hash)
+        return path
+
+    # Extraction results
+    def get_extraction(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Get cached text, metadata and structure for a PDF."""
+
+        path = os.path.join(self._entry_dir(content_hash), EXTRACTION_FILENAME)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (FileNotFoundError, ValueError):
+            cached = None
+
+        if not cached or cached.get("version") != EXTRACTION_VERSION:
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+
+        self._touch(content_hash)
+        return cached["result"]
+
+    def put_extraction(self, content_hash: str, result: Dict[str, Any]) -> None:
+        """Cache extraction result for a PDF and enforce the size limit."""
+
+        entry_dir = self._entry_dir(content_hash)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        payload = json.dumps(
+            {"version": EXTRACTION_VERSION, "result": result},
+            default=str
+        ).encode("utf-8")
+        self._replace_file(os.path.join(entry_dir, EXTRACTION_FILENAME), payload)
+
+        self._touch(content_hash)
+
+        if self._needs_eviction():
+            self.evict()
+
+    # Page plans
+    def get_page_plan(self, content_hash: str) -> Optional[Dict[str, str]]:
+        """Get the extractor chosen for each probed page of a PDF."""
+
+        path = os.path.join(self._entry_dir(content_hash), PAGE_PLAN_FILENAME)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put_page_plan(self, content_hash: str, page_plan: Dict[str, str]) -> None:
+        """Remember the extractor chosen for each probed page of a PDF."""
+
+        entry_dir = self._entry_dir(content_hash)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        payload = json.dumps(page_plan, sort_keys=True).encode("utf-8")
+        self._replace_file(os.path.join(entry_dir, PAGE_PLAN_FILENAME), payload)
+
+    # URL index
+    def lookup_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the content last downloaded from a URL.
+
+        Returns the content hash with the response's ETag and Last-Modified
+        validators, and whether it was checked within `url_ttl` ("fresh").
+        """
+
+        entry = self._read_url_entry(self._url_path(url))
+        if entry is None:
+            return None
+
+        with self._lock:
+            self._url_hits += 1
+
+        entry["fresh"] = time.time() - entry["checked_at"] < self.url_ttl
+        return entry
+
+    def record_url(
+        self,
+        url: str,
+        content_hash: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> None:
+        """Remember which content a URL served, and when it was last checked."""
+
+        path = self._url_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        payload = json.dumps({
+            "content_hash": content_hash,
+            "checked_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified
+        }).encode("utf-8")
+        self._replace_file(path, payload)
+
+    # Maintenance
+    def evict(self) -> int:
+        """Remove least recently used entries until the store fits its size limit.
+
+        Entries still waiting for their first extraction are skipped unless
+        they have not been touched for `pending_ttl` seconds. URL entries
+        pointing to content that is no longer stored are removed as well.
+        """
+
+        entries = self._scan_entries()
+        url_entries = self._scan_url_entries()
+        total_size = sum(size for _, _, size, _ in entries) + sum(size for _, _, size in url_entries)
+        pending_cutoff = time.time() - self.pending_ttl
+        evicted = 0
+
+        for entry_dir, mtime, size, extracted in sorted(entries, key=lambda entry: entry[1]):
+            if total_size <= self.max_bytes:
+                break
+            if not extracted and mtime > pending_cutoff:
+                continue  # Still waiting for extraction
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+            evicted += 1
+
+        for path, content_hash, size in url_entries:
+            if content_hash is None or not os.path.isdir(self._entry_dir(content_hash)):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total_size -= size
+
+        with self._lock:
+            self._size = total_size
+            self._scanned_at = time.monotonic()
+            self._evictions += evicted
+
+        if not evicted:
+            return 0
+
+        paper_logger.info(f"Evicted {evicted} entries from PDF store")
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for monitoring."""
+
+        with self._lock:
+            lookups = self._hits + self._misses
+
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "url_hits": self._url_hits,
+                "evictions": self._evictions,
+                "max_bytes": self.max_bytes
+            }
+
+    # Private helper methods
+    def _entry_dir(self, content_hash: str) -> str:
+        """Get directory holding one content-addressed entry."""
+        return os.path.join(self.root, "blobs", content_hash[:2], content_hash)
+
+    def _url_path(self, url: str) -> str:
+        """Get path of the URL index file for a URL."""
+        url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, "urls", url_hash[:2], url_hash)
+
+    def _touch(self, content_hash: str) -> None:
+        """Mark entry as recently used."""
+        try:
+            os.utime(self._entry_dir(content_hash))
+        except FileNotFoundError:
+            pass
+
+    def _add_size(self, delta: int) -> None:
+        """Update the running size total after a write."""
+        with self._lock:
+            if self._size is not None:
+                self._size += delta
+
+    def _needs_eviction(self) -> bool:
+        """Check the running size total, asking for a rescan once it is stale."""
+        with self._lock:
+            if self._size is None or time.monotonic() - self._scanned_at > RESCAN_INTERVAL_SECONDS:
+                return True
+            return self._size > self.max_bytes
+
+    def _replace_file(self, path: str, data: bytes) -> None:
+        """Atomically write a file and count the size change."""
+
+        try:
+            previous_size = os.path.getsize(path)
+        except FileNotFoundError:
+            previous_size = 0
+
+        atomic_write(path, data)
+        self._add_size(len(data) - previous_size)
+
+    def _read_url_entry(self, path: str) -> Optional[Dict[str, Any]]:
+        """Read a URL index entry, or None if it is missing or unreadable."""
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = f.read().strip()
+        except FileNotFoundError:
+            return None
+
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            # Entries from before validators were kept hold a bare content hash
+            entry = {"content_hash": raw, "checked_at": 0.0} if raw else None
+
+        if not isinstance(entry, dict) or not entry.get("content_hash"):
+            return None
+
+        return {
+            "content_hash": entry["content_hash"],
+            "checked_at": entry.get("checked_at") or 0.0,
+            "etag": entry.get("etag"),
+            "last_modified": entry.get("last_modified")
+        }
+
+    def _scan_entries(self) -> List[Tuple[str, float, int, bool]]:
+        """List entries as (directory, last access time, size in bytes, has an extraction)."""
+
+        entries = []
+        blobs_root = os.path.join(self.root, "blobs")
+
+        if not os.path.isdir(blobs_root):
+            return entries
+
+        for prefix in os.scandir(blobs_root):
+            if not prefix.is_dir():
+                continue
+
+            for entry in os.scandir(prefix.path):
+                if not entry.is_dir():
+                    continue
+
+                try:
+                    files = [f for f in os.scandir(entry.path) if f.is_file()]
+                    size = sum(f.stat().st_size for f in files)
+                    extracted = any(f.name == EXTRACTION_FILENAME for f in files)
+                    entries.append((entry.path, entry.stat().st_mtime, size, extracted))
+                except FileNotFoundError:
+                    continue  # Removed by another process meanwhile
+
+        return entries
+
+    def _scan_url_entries(self) -> List[Tuple[str, Optional[str], int]]:
+        """List URL index entries as (path, content hash, size in bytes)."""
+
+        entries = []
+        urls_root = os.path.join(self.root, "urls")
+
+        if not os.path.isdir(urls_root):
+            return entries
+
+        for prefix in os.scandir(urls_root):
+            if not prefix.is_dir():
+                continue
+
+            for entry in os.scandir(prefix.path):
+                if not entry.is_file() or entry.name.startswith(".tmp-"):
+                    continue
+
+                try:
+                    size = entry.stat().st_size
+                except FileNotFoundError:
+                    continue  # Removed by another process meanwhile
+
+                url_entry = self._read_url_entry(entry.path)
+                entries.append((entry.path, url_entry["content_hash"] if url_entry else None, size))
+
+        return entries
+
+
+# Global PDF store instance
+pdf_store = PDFBlobStore()
@@ -0,0 +1,282 @@
+"""
+CPU-bound PDF parsing functions executed inside extraction worker processes.
+
+Everything in this module must stay picklable and importable without the
+application settings, since it is loaded fresh by every pool worker.
+"""
+import io
+import mmap
+import re
+import signal
+import threading
+import time
+from contextlib import contextmanager, ExitStack
+from typing import Dict, Any, Iterator, Optional, Tuple, Union
+
+import fitz  # PyMuPDF
+from PyPDF2 import PdfReader
+
+from app.services.text_normalizer import normalize_text
+
+
+# A PDF source is either the raw bytes or a path to a file on disk
+PDFSource = Union[bytes, str]
+
+# Extractor names used in page plans
+PYMUPDF = "pymupdf"
+PYPDF2 = "pypdf2"
+
+# Page quality probe: replacement characters, control codes and private-use glyphs
+# are what broken font encodings usually decode to
+GARBAGE_PATTERN = re.compile(r'[\ufffd\x00-\x08\x0e-\x1f\ue000-\uf8ff]')
+WHITESPACE_PATTERN = re.compile(r'\s')
+MIN_PAGE_CHARS = 200
+MAX_GARBAGE_RATIO = 0.05
+WHITESPACE_DENSITY_RANGE = (0.05, 0.5)
+PAGE_QUALITY_THRESHOLD = 0.8
+
+
+class JobTimeoutError(Exception):
+    """Raised inside a worker when a job runs past its time limit."""
+
+
+def _raise_job_timeout(signum, frame) -> None:
+    """SIGALRM handler interrupting the running job."""
+
+    raise JobTimeoutError("Extraction job exceeded its time limit")
+
+
+def run_timed(func, timeout: Optional[float], *args, **kwargs) -> Tuple[Any, float]:
+    """Run a worker function and return its result with the CPU time spent.
+
+    The time limit is armed here, when the job actually starts, so time spent
+    waiting for a free worker never counts against it. The job is interrupted
+    with `JobTimeoutError` and the worker process stays usable for the next
+    job. Off the main thread (or without SIGALRM) no limit is armed and the
+    caller has to enforce it.
+    """
+
+    armed = (
+        timeout is not None
+        and hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+
+    if armed:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_job_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    try:
+        start_cpu = time.process_time()
+        result = func(*args, **kwargs)
+        return result, time.process_time() - start_cpu
+
+    finally:
+        if armed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _open_fitz(source: PDFSource) -> "fitz.Document":
+    """Open a PyMuPDF document from bytes or a file path."""
+
+    if isinstance(source, str):
+        # MuPDF reads the file itself, so the document is never copied into Python
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+@contextmanager
+def _open_pypdf2(source: PDFSource) -> Iterator[PdfReader]:
+    """Open a PyPDF2 reader from bytes or a memory-mapped file."""
+
+    if isinstance(source, str):
+        with open(source, "rb") as pdf_file:
+            with mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield PdfReader(mapped)
+    else:
+        yield PdfReader(io.BytesIO(source))
+
+
+def count_pages(source: PDFSource) -> int:
+    """Get the number of pages in a document."""
+
+    pdf_document = _open_fitz(source)
+
+    try:
+        return pdf_document.page_count
+    finally:
+        pdf_document.close()
+
+
+def collect_pages(
+    pages: Iterator[Tuple[int, str]],
+    page_count: int,
+    char_budget: int
+) -> Dict[str, Any]:
+    """Join cleaned pages with page markers until the character budget is reached.
+
+    `pages` is consumed lazily, so pages past the budget are never opened.
+    """
+
+    text_blocks = []
+    length = 0
+    pages_read = 0
+
+    for page_num, raw_text in pages:
+        pages_read += 1
+        text = normalize_text(raw_text or "")
+
+        if not text.strip():
+            continue
+
+        text_blocks.append(f"--- Page {page_num} ---\n{text}")
+        length += len(text_blocks[-1]) + 2
+
+        if length >= char_budget:
+            break
+
+    return {
+        "text": "\n\n".join(text_blocks) if text_blocks else None,
+        "length": length,
+        "pages_read": pages_read,
+        "pages_skipped": page_count - pages_read
+    }
+
+
+def page_quality(text: str) -> float:
+    """Score raw page text from 0 (unusable) to 1 by length, garbage glyphs and whitespace density."""
+
+    if not text:
+        return 0.0
+
+    length = len(text)
+    whitespace = len(WHITESPACE_PATTERN.findall(text))
+    garbage = len(GARBAGE_PATTERN.findall(text))
+
+    # Too little text usually means a scanned page or an unreadable font
+    score = min(1.0, (length - whitespace) / MIN_PAGE_CHARS)
+
+    # Each garbage glyph costs more the rarer they are in good text
+    score *= max(0.0, 1.0 - garbage / length / (2 * MAX_GARBAGE_RATIO))
+
+    # Words glued together or spread out one glyph per line
+    density = whitespace / length
+    low, high = WHITESPACE_DENSITY_RANGE
+    if density < low:
+        score *= density / low
+    elif density > high:
+        score *= (1.0 - density) / (1.0 - high)
+
+    return score
+
+
+def extract_text(
+    source: PDFSource,
+    char_budget: int,
+    start: int = 0,
+    end: Optional[int] = None,
+    page_plan: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """Extract cleaned text of pages [start, end), choosing the extractor page by page.
+
+    Pages are read with PyMuPDF and probed with `page_quality`; pages that
+    fail the probe are re-read with PyPDF2 and the better text is kept. The
+    choice for probed pages is returned as `page_plan` so later runs on the
+    same document go straight to the right extractor. In page-parallel mode
+    each worker opens the document itself, so only the file path crosses the
+    process boundary.
+    """
+
+    page_plan = dict(page_plan or {})
+    pdf_document = _open_fitz(source)
+
+    with ExitStack() as stack:
+        stack.callback(pdf_document.close)
+        pypdf2_reader = None
+        pages_patched = 0
+
+        def read_pypdf2(page_num: int) -> str:
+            nonlocal pypdf2_reader
+            if pypdf2_reader is None:
+                # Opened only for documents that need patching
+                pypdf2_reader = stack.enter_context(_open_pypdf2(source))
+            return pypdf2_reader.pages[page_num].extract_text() or ""
+
+        def read_pages() -> Iterator[Tuple[int, str]]:
+            nonlocal pages_patched
+
+            for page_num in range(start, end):
+                planned = page_plan.get(str(page_num + 1))
+
+                if planned == PYPDF2:
+                    try:
+                        text = read_pypdf2(page_num)
+                    except Exception:
+                        planned = None  # Probe the page again below
+                    else:
+                        pages_patched += 1
+                        yield page_num + 1, text
+                        continue
+
+                # Extract text with layout preservation
+                text = pdf_document.load_page(page_num).get_text("text")
+
+                if planned or page_quality(text) >= PAGE_QUALITY_THRESHOLD:
+                    yield page_num + 1, text
+                    continue
+
+                try:
+                    fallback_text = read_pypdf2(page_num)
+                except Exception:
+                    fallback_text = ""
+
+                if page_quality(fallback_text) > page_quality(text):
+                    page_plan[str(page_num + 1)] = PYPDF2
+                    pages_patched += 1
+                    text = fallback_text
+                else:
+                    page_plan[str(page_num + 1)] = PYMUPDF
+
+                yield page_num + 1, text
+
+        end = pdf_document.page_count if end is None else min(end, pdf_document.page_count)
+
+        result = collect_pages(read_pages(), end - start, char_budget)
+        result["pages_patched"] = pages_patched
+        result["page_plan"] = page_plan
+        return result
+
+
+def extract_text_pypdf2(source: PDFSource, char_budget: int) -> Dict[str, Any]:
+    """Extract cleaned text using PyPDF2 only, for documents PyMuPDF cannot open."""
+
+    with _open_pypdf2(source) as pdf_reader:
+        pages = (
+            (page_num + 1, page.extract_text())
+            for page_num, page in enumerate(pdf_reader.pages)
+        )
+        return collect_pages(pages, len(pdf_reader.pages), char_budget)
+
+
+def extract_metadata(source: PDFSource) -> Dict[str, Any]:
+    """Read the document info dictionary, page count and first page text."""
+
+    pdf_document = _open_fitz(source)
+
+    try:
+        result = {
+            "metadata": pdf_document.metadata or {},
+            "page_count": pdf_document.page_count,
+            "first_page_text": "",
+            "repaired": pdf_document.is_repaired
+        }
+
+        if pdf_document.page_count > 0:
+            first_page = pdf_document.load_page(0)
+            result["first_page_text"] = first_page.get_text("text")
+
+    finally:
+        pdf_document.close()
+
+    return result
@@ -0,0 +1,152 @@
+"""
+Section index for extracted paper text.
+
+The index records where each section of a paper's `full_text` starts and
+ends, so AI stages can slice out the sections they need instead of sending
+the first N characters of the paper. Entries look like:
+
+    {"name": "3.1 Data Collection", "kind": "methods", "level": 2,
+     "start": 10412, "end": 13877, "page_start": 4, "page_end": 5}
+
+Offsets index into the exact text the index was built from.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+
+# Section kinds and the header words that identify them, checked in order
+SECTION_KINDS = (
+    ("abstract", ("abstract",)),
+    ("introduction", ("introduction",)),
+    ("background", ("background", "related work", "preliminaries", "literature review")),
+    ("limitations", ("limitation", "threats to validity")),
+    ("methods", ("method", "approach", "experimental setup", "materials", "study design", "model")),
+    ("results", ("result", "experiment", "evaluation", "findings")),
+    ("discussion", ("discussion", "analysis")),
+    ("conclusion", ("conclusion", "future work", "summary")),
+    ("acknowledgments", ("acknowledgment", "acknowledgement")),
+    ("references", ("references", "bibliography")),
+    ("appendix", ("appendix", "supplementary")),
+)
+
+# Text before the first header and numbered sections with no recognised name
+FRONT_MATTER = "front_matter"
+BODY = "body"
+
+PAGE_MARKER_PATTERN = re.compile(r'^--- Page (\d+) ---$')
+NUMBERED_HEADER_PATTERN = re.compile(r'^((?:\d+|[IVX]+)(?:\.\d+)*)\.?\s+([A-Z][^.!?]{1,78})$')
+ABSTRACT_PATTERN = re.compile(r'^abstract\b', re.IGNORECASE)
+MAX_HEADER_LENGTH = 80
+
+
+def classify_section(name: str) -> Optional[str]:
+    """Get the section kind for a header, or None when it is not recognised."""
+
+    name = name.lower()
+    for kind, words in SECTION_KINDS:
+        if any(word in name for word in words):
+            return kind
+    return None
+
+
+def _parse_header(line: str) -> Optional[Dict[str, Any]]:
+    """Parse a section header line into its name, kind and nesting level."""
+
+    if not line or len(line) > MAX_HEADER_LENGTH:
+        return None
+
+    numbered = NUMBERED_HEADER_PATTERN.match(line)
+    if numbered:
+        return {
+            "name": line,
+            "kind": classify_section(numbered.group(2)),
+            "level": numbered.group(1).count(".") + 1
+        }
+
+    # Unnumbered headers must be a short, capitalised section name on their own line
+    name = line.rstrip(":").strip()
+    kind = classify_section(name)
+    if kind and name[:1].isupper() and len(name.split()) <= 3:
+        return {"name": name, "kind": kind, "level": 1}
+
+    # "Abstract— We propose ..." runs the heading into the first sentence
+    if ABSTRACT_PATTERN.match(line):
+        return {"name": "Abstract", "kind": "abstract", "level": 1}
+
+    return None
+
+
+def build_section_index(text: str) -> List[Dict[str, Any]]:
+    """Build the section index of extracted paper text in one pass over its lines."""
+
+    if not text:
+        return []
+
+    sections = []
+    parents: Dict[int, Optional[str]] = {}
+    page = 1
+    content_page = 1  # Page of the last line that was not a page marker
+    offset = 0
+
+    current = {"name": "Front matter", "kind": FRONT_MATTER, "level": 1, "start": 0, "page_start": 1}
+
+    for line in text.split("\n"):
+        stripped = line.strip()
+        marker = PAGE_MARKER_PATTERN.match(stripped)
+
+        if marker:
+            page = int(marker.group(1))
+        else:
+            header = _parse_header(stripped)
+            if header:
+                # Subsections without a recognised name belong to their parent's kind
+                if header["kind"] is None:
+                    header["kind"] = parents.get(header["level"] - 1) or BODY
+                parents[header["level"]] = header["kind"]
+
+                current.update(end=offset, page_end=content_page)
+                sections.append(current)
+                current = dict(header, start=offset, page_start=page)
+
+            if stripped:
+                content_page = page
+
+        offset += len(line) + 1
+
+    current.update(end=len(text), page_end=content_page)
+    sections.append(current)
+
+    # Front matter is dropped when a header opens the text
+    return [section for section in sections if section["end"] > section["start"]]
+
+
+def select_sections(
+    text: str,
+    section_index: List[Dict[str, Any]],
+    kinds: Iterable[str],
+    max_chars: int
+) -> Optional[str]:
+    """Join the sections of the given kinds, in document order, up to `max_chars`.
+
+    Returns None when the index has no section of those kinds.
+    """
+
+    kinds = set(kinds)
+    parts = []
+    length = 0
+
+    for section in section_index or []:
+        if section["kind"] not in kinds:
+            continue
+
+        part = text[section["start"]:section["end"]].strip()
+        if not part:
+            continue
+
+        parts.append(part[:max_chars - length])
+        length += len(parts[-1]) + 2
+
+        if length >= max_chars:
+            break
+
+    return "\n\n".join(parts) if parts else None
@@ -0,0 +1,327 @@
+"""
+Shared streaming generations for Server-Sent Events.
+
+The first viewer of a key starts its generation; viewers arriving while it
+runs attach to it, replay the events sent so far and then follow along.
+Generations run as their own tasks, so they finish and store their result
+even if every viewer disconnects.
+
+Within a process viewers share the generation directly. Across API workers
+they coordinate through Redis:
+
+    summary_stream:<key>:owner   -> token of the worker running the generation (leased)
+    summary_stream:<key>:events  -> Redis stream of the events sent so far
+
+The worker that claims the owner key runs the generation and appends every
+event to the stream; the other workers replay and follow the stream instead
+of starting their own. If Redis is unavailable each worker generates on its
+own rather than leaving viewers waiting.
+"""
+import asyncio
+import contextvars
+import json
+import time
+import uuid
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.app_logging import ai_logger, log_error
+
+
+KEY_PREFIX = "summary_stream:"
+
+# Seconds the owner key lives without a heartbeat, so a crashed worker's
+# generation is given up on by its followers
+OWNER_LEASE_SECONDS = 30
+
+# Seconds finished events stay readable for viewers that just missed the end
+EVENTS_TTL_SECONDS = 60
+
+# Longest single wait for new events before the owner lease is checked,
+# kept below the client's socket timeout
+FOLLOW_BLOCK_MS = 1000
+
+# Seconds before Redis is tried again after a connection failure
+REDIS_RETRY_SECONDS = 30
+
+# KEYS: owner key, events key; ARGV: owner token, lease in seconds
+# Returns 1 if the generation was claimed, clearing events of an earlier one
+CLAIM_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'EX', ARGV[2]) then
+    redis.call('DEL', KEYS[2])
+    return 1
+end
+return 0
+"""
+
+# KEYS: owner key; ARGV: owner token
+# Deletes the owner key only while it still belongs to this generation
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class _Generation:
+    """Events of one running generation and the viewers waiting for more."""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.done = False
+        self.changed = asyncio.Condition()
+        self.task = None
+
+
+class StreamHub:
+    """Runs one generation per key for all of its concurrent viewers, across workers."""
+
+    def __init__(self, redis_url: str = None):
+        """Initialize stream hub."""
+        self.redis_url = redis_url or settings.redis_url
+
+        # Generations per event loop, each one can only be awaited on its own loop
+        self._generations: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _Generation]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        # redis.asyncio connections are bound to the loop that opened them
+        self._redis_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._redis_retry_at = 0.0
+
+        self._started = 0
+        self._attached = 0
+        self._followed = 0
+        self._failed = 0
+
+    async def subscribe(
+        self,
+        key: str,
+        generate: Callable[[], AsyncIterator[Dict[str, Any]]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the events of the generation for `key`, starting it with `generate` if none is running.
+
+        Ends with a "done" event, or an "error" event if the generation failed.
+        """
+
+        loop = asyncio.get_running_loop()
+        generations = self._generations.setdefault(loop, {})
+
+        generation = generations.get(key)
+        if generation is None:
+            generation = _Generation()
+            generations[key] = generation
+            # Started without the viewer's context, so its AI calls are not attributed to that request
+            generation.task = loop.create_task(
+                self._run(key, generation, generate, generations), context=contextvars.Context()
+            )
+        else:
+            self._attached += 1
+
+        position = 0
+        while True:
+            async with generation.changed:
+                await generation.changed.wait_for(lambda: position < len(generation.events) or generation.done)
+                events = generation.events[position:]
+
+            for event in events:
+                yield event
+            position += len(events)
+
+            if generation.done and position == len(generation.events):
+                return
+
+    def stats(self) -> Dict[str, int]:
+        """Get hub statistics."""
+
+        return {
+            "active": sum(len(generations) for generations in list(self._generations.values())),
+            "started": self._started,
+            "attached": self._attached,
+            "followed": self._followed,
+            "failed": self._failed
+        }
+
+    async def _run(
+        self,
+        key: str,
+        generation: _Generation,
+        generate: Callable[[], AsyncIterator[Dict[str, Any]]],
+        generations: Dict[str, _Generation]
+    ) -> None:
+        """Run or follow a generation, publishing each event to its viewers."""
+
+        client = self._redis()
+        token = None
+        heartbeat = None
+
+        if client is not None:
+            try:
+                token = await self._claim(client, key)
+            except (RedisError, OSError) as e:
+                self._redis_unavailable(e)
+                client = None
+
+        following = client is not None and token is None
+
+        try:
+            if following:
+                self._followed += 1
+                events = self._follow(client, key)
+            else:
+                self._started += 1
+                events = generate()
+                if token is not None:
+                    heartbeat = asyncio.create_task(self._hold_lease(client, key))
+
+            async for event in events:
+                await self._publish(generation, event)
+                if token is not None:
+                    await self._mirror(client, key, event)
+
+            await self._publish(generation, {"event": "done", "data": {}})
+            if token is not None:
+                await self._mirror(client, key, {"event": "done", "data": {}})
+
+        except Exception as e:
+            self._failed += 1
+            ai_logger.error(f"Streaming generation failed for {key}: {e}")
+            log_error(e, {"stream_key": key})
+            await self._publish(generation, {"event": "error", "data": {"detail": "Generation failed"}})
+            if token is not None:
+                await self._mirror(client, key, {"event": "error", "data": {"detail": "Generation failed"}})
+
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            if token is not None:
+                await self._release(client, key, token)
+
+            # Later viewers start afresh, e.g. after a failure
+            if generations.get(key) is generation:
+                del generations[key]
+
+            async with generation.changed:
+                generation.done = True
+                generation.changed.notify_all()
+
+    @staticmethod
+    async def _publish(generation: _Generation, event: Dict[str, Any]) -> None:
+        """Add an event and wake the viewers."""
+
+        async with generation.changed:
+            generation.events.append(event)
+            generation.changed.notify_all()
+
+    # Cross-worker coordination
+    async def _claim(self, client: Any, key: str) -> Optional[str]:
+        """Become the worker running the generation for `key`.
+
+        Returns the owner token, or None if another worker already runs it.
+        """
+
+        token = uuid.uuid4().hex
+        claimed = await client.eval(
+            CLAIM_SCRIPT, 2, self._owner_key(key), self._events_key(key), token, OWNER_LEASE_SECONDS
+        )
+        return token if claimed else None
+
+    async def _follow(self, client: Any, key: str) -> AsyncIterator[Dict[str, Any]]:
+        """Replay and follow the events another worker writes for `key`, until it is done."""
+
+        events_key = self._events_key(key)
+        last_id = "0-0"
+
+        while True:
+            response = await client.xread({events_key: last_id}, count=100, block=FOLLOW_BLOCK_MS)
+
+            if not response:
+                # The owner renews its lease while it runs, so a missing key means it died
+                if not await client.exists(self._owner_key(key)):
+                    raise RuntimeError("Worker running the generation stopped without finishing it")
+                continue
+
+            for entry_id, fields in response[0][1]:
+                last_id = entry_id
+                event = json.loads(fields["event"])
+
+                if event["event"] == "done":
+                    return
+                if event["event"] == "error":
+                    raise RuntimeError("Generation failed in another worker")
+                yield event
+
+    async def _mirror(self, client: Any, key: str, event: Dict[str, Any]) -> None:
+        """Append an event to the stream read by other workers' viewers."""
+
+        events_key = self._events_key(key)
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.xadd(events_key, {"event": json.dumps(event, default=str)})
+            pipe.expire(events_key, OWNER_LEASE_SECONDS + EVENTS_TTL_SECONDS)
+            await pipe.execute()
+        except (RedisError, OSError) as e:
+            # Local viewers keep streaming; followers elsewhere time out on the lease
+            ai_logger.warning(f"Could not share stream events for {key}: {e}")
+
+    async def _hold_lease(self, client: Any, key: str) -> None:
+        """Renew the owner key while the generation runs."""
+
+        while True:
+            await asyncio.sleep(OWNER_LEASE_SECONDS / 3)
+            try:
+                await client.expire(self._owner_key(key), OWNER_LEASE_SECONDS)
+            except (RedisError, OSError) as e:
+                ai_logger.warning(f"Could not renew stream owner lease for {key}: {e}")
+
+    async def _release(self, client: Any, key: str, token: str) -> None:
+        """Give up ownership and let the finished events expire."""
+
+        try:
+            await client.expire(self._events_key(key), EVENTS_TTL_SECONDS)
+            await client.eval(RELEASE_SCRIPT, 1, self._owner_key(key), token)
+        except (RedisError, OSError) as e:
+            ai_logger.warning(f"Could not release stream owner for {key}: {e}")
+
+    def _owner_key(self, key: str) -> str:
+        """Get the key naming the worker that runs a generation."""
+        return f"{KEY_PREFIX}{key}:owner"
+
+    def _events_key(self, key: str) -> str:
+        """Get the Redis stream holding a generation's events."""
+        return f"{KEY_PREFIX}{key}:events"
+
+    def _redis_unavailable(self, error: Exception) -> None:
+        """Generate locally for a while after a Redis failure."""
+
+        ai_logger.warning(f"Stream hub Redis unavailable, not sharing across workers for {REDIS_RETRY_SECONDS}s: {error}")
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        self._redis_clients = weakref.WeakKeyDictionary()
+
+    def _redis(self) -> Optional[Any]:
+        """Get the Redis client for the running loop, or None when generations are not shared."""
+
+        if not settings.stream_sharing_enabled or time.monotonic() < self._redis_retry_at:
+            return None
+
+        loop = asyncio.get_running_loop()
+        client = self._redis_clients.get(loop)
+
+        if client is None:
+            client = aioredis.from_url(
+                self.redis_url, socket_connect_timeout=1, socket_timeout=2, decode_responses=True
+            )
+            self._redis_clients[loop] = client
+
+        return client
+
+
+# Global summary stream hub instance
+summary_streams = StreamHub()
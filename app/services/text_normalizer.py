@@ -0,0 +1,105 @@
+"""
+Single-pass normalizer for text extracted from PDFs.
+
+`normalize_text` produces exactly the same output as `legacy_clean_text`,
+the original multi-pass cleaner, which is kept as the reference for the
+golden corpus tests and the benchmark in `scripts/benchmark_text_normalizer.py`.
+
+Instead of four full-string substitutions followed by a split/strip/join
+loop over every line, all whitespace rules are applied in one scan by a
+single precompiled pattern, and header/footer lines are removed by a second
+pattern. Every alternative starts by consuming one whitespace character or
+hyphen, so the regex engine can skip ordinary characters without trying
+the alternatives, and a single space between two words is rejected before
+any of them is tried.
+"""
+import re
+
+
+# Alternatives, in priority order (replacement built from groups 1-4):
+#   whitespace between a word and punctuation  -> removed
+#   three or more line breaks                  -> one blank line
+#   whitespace after a line break              -> removed
+#   whitespace before a line break or the end  -> removed
+#   hyphen and spaces between two words        -> removed
+#   run of spaces                              -> one space
+_WHITESPACE_PATTERN = re.compile(
+    r'[\s-](?![^\s.,;:!?])(?:'
+    r'(?<=\w\s)\s*(?=[.,;:!?])'
+    r'|(?<=(\n))\s*\n\s*(\n)[^\S\n]*'
+    r'|(?<=(\n))[^\S\n]+'
+    r'|(?<=[^\S\n])[^\S\n]*(?=\n|\Z)'
+    r'|(?<=\w-) +(?=\w)'
+    r'|(?<=( )) +'
+    r')'
+)
+_WHITESPACE_REPLACEMENT = r'\1\2\3\4'
+
+_LEADING_SPACE_PATTERN = re.compile(r'[^\S\n]+')
+
+# Page numbers and short header/footer lines, removed with one line break
+_NOISE_LINE = r'(?:\d+|(?=[^\n]{0,9}(?:\n|\Z))(?:[^\n]*(?i:page|vol)[^\n]*|[IVX]+))'
+_NOISE_LINE_PATTERN = re.compile(rf'\n{_NOISE_LINE}(?=\n|\Z)')
+_LEADING_NOISE_PATTERN = re.compile(rf'(?:{_NOISE_LINE}(?:\n|\Z))+')
+
+
+def normalize_text(text: str) -> str:
+    """Clean and normalize extracted text."""
+
+    if not text:
+        return text
+
+    # Tabs and spaces are treated alike by every rule
+    text = text.replace('\t', ' ')
+
+    # Leading whitespace of the first line has no line break before it
+    leading = _LEADING_SPACE_PATTERN.match(text)
+    if leading:
+        text = text[leading.end():]
+
+    text = _WHITESPACE_PATTERN.sub(_WHITESPACE_REPLACEMENT, text)
+
+    # Noise lines at the very start take the following line break with them
+    leading = _LEADING_NOISE_PATTERN.match(text)
+    if leading:
+        text = text[leading.end():]
+
+    return _NOISE_LINE_PATTERN.sub('', text)
+
+
+def legacy_clean_text(text: str) -> str:
+    """Clean and normalize extracted text (original multi-pass implementation)."""
+
+    if not text:
+        return text
+
+    # Remove excessive whitespace
+    text = re.sub(r'\n\s*\n\s*\n', '\n\n', text)
+    text = re.sub(r'[ \t]+', ' ', text)
+
+    # Fix common OCR errors in academic papers
+    text = re.sub(r'(?<=\w)- (?=\w)', '', text)  # Remove hyphenation
+    text = re.sub(r'(\w)\s+([.,;:!?])', r'\1\2', text)  # Fix punctuation spacing
+
+    # Remove page numbers and headers/footers (simple approach)
+    lines = text.split('\n')
+    cleaned_lines = []
+
+    for line in lines:
+        line = line.strip()
+
+        # Skip likely page numbers
+        if re.match(r'^\d+$', line):
+            continue
+
+        # Skip short lines that are likely headers/footers
+        if len(line) < 10 and (
+            'page' in line.lower() or
+            'vol' in line.lower() or
+            re.match(r'^[IVX]+$', line)
+        ):
+            continue
+
+        cleaned_lines.append(line)
+
+    return '\n'.join(cleaned_lines)
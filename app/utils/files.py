@@ -0,0 +1,19 @@
+"""
+File helpers shared by the on-disk stores.
+"""
+import os
+import tempfile
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Write file via a temp file so readers never see partial content."""
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
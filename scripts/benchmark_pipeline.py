@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for paper processing.
+
+Generates synthetic PDFs, stores them as uploads and runs every paper
+through PaperService.process_paper_content - extraction, section indexing,
+AI analysis and database writes - with chat requests answered by the
+offline FakeChatProvider. Reports papers per second, p50/p99 latency per
+stage and peak RSS.
+
+Uses a throwaway SQLite database unless --database-url is given; the
+rows it creates there are removed afterwards.
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from uuid import UUID
+
+import fitz  # PyMuPDF
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.db.database import Base
+from app.db.models import Paper, PaperSource, ProcessingStatus
+from app.services.ai_service import ai_service
+from app.services.llm_providers import FakeChatProvider
+from app.services.paper_service import paper_service
+from app.services.pdf_extraction_engine import extraction_engine
+from app.services.pdf_processor import pdf_processor
+from app.services.pdf_store import pdf_store
+import app.services.paper_service as paper_service_module
+
+
+WORDS = (
+    "the of model learning data results we propose in network training analysis "
+    "method show table figure using based approach neural performance evaluation"
+).split()
+
+SECTIONS = ["Abstract", "Introduction", "Related Work", "Methods", "Results", "Discussion", "Conclusion"]
+
+
+def build_pdf(number: int, pages: int, rng: random.Random) -> bytes:
+    """Build a PDF laid out like a paper, with section headings and body text."""
+
+    doc = fitz.open()
+    sections = iter(SECTIONS)
+
+    for page_number in range(pages):
+        page = doc.new_page()
+        lines = [f"Synthetic Paper {number}"] if page_number == 0 else []
+
+        heading = next(sections, None)
+        if heading:
+            lines.extend(["", heading.upper() if page_number == 0 else f"{page_number}. {heading}"])
+
+        for _ in range(40):
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 12))))
+
+        page.insert_textbox(fitz.Rect(50, 50, 560, 790), "\n".join(lines), fontsize=9)
+
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def percentile(samples: list, percent: float) -> float:
+    """Get a nearest-rank percentile."""
+
+    ordered = sorted(samples)
+    return ordered[max(0, int(round(percent / 100 * len(ordered))) - 1)]
+
+
+class StageTimer:
+    """Wraps pipeline steps to record their latencies."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def wrap(self, owner, attr: str, stage):
+        """Replace an async callable with one that records its latency under `stage`."""
+
+        original = getattr(owner, attr)
+
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                name = stage(*args, **kwargs) if callable(stage) else stage
+                self.samples[name].append(time.perf_counter() - start)
+
+        setattr(owner, attr, timed)
+
+
+async def run_benchmark(args, session_factory) -> dict:
+    """Create the papers, process them and collect timings."""
+
+    rng = random.Random(args.seed)
+    paper_ids = []
+
+    db = session_factory()
+    try:
+        for number in range(args.papers):
+            data = build_pdf(number, args.pages, rng)
+            content_hash = hashlib.sha256(data).hexdigest()
+            pdf_store.put_blob(content_hash, data)
+
+            paper = Paper(
+                title=f"Synthetic Paper {number}",
+                pdf_sha256=content_hash,
+                source=PaperSource.PDF_UPLOAD,
+                processing_status=ProcessingStatus.PENDING
+            )
+            db.add(paper)
+            db.commit()
+            paper_ids.append(str(paper.id))
+    finally:
+        db.close()
+
+    # Start the extraction worker processes outside the timed run
+    await asyncio.gather(*(
+        pdf_processor.process_uploaded_pdf(build_pdf(-1 - slot, 1, rng)) for slot in range(args.concurrency)
+    ))
+
+    timer = StageTimer()
+    timer.wrap(paper_service, "_extract_pdf_content", "extraction")
+    timer.wrap(paper_service, "_run_ai_stage", lambda paper, name, *rest: f"ai_{name}")
+    timer.wrap(ai_service, "analyze_paper_combined", "ai_combined")
+    timer.wrap(paper_service_module, "update_paper", "db_write")
+
+    worker_slots = asyncio.Semaphore(args.concurrency)
+    totals = []
+
+    async def process(paper_id: str) -> bool:
+        async with worker_slots:
+            db = session_factory()
+            start = time.perf_counter()
+            try:
+                return await paper_service.process_paper_content(paper_id, db)
+            finally:
+                totals.append(time.perf_counter() - start)
+                db.close()
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(process(paper_id) for paper_id in paper_ids))
+    elapsed = time.perf_counter() - start
+
+    db = session_factory()
+    try:
+        db.query(Paper).filter(Paper.id.in_([UUID(paper_id) for paper_id in paper_ids])).delete(
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    return {"elapsed": elapsed, "succeeded": sum(outcomes), "stages": {**timer.samples, "paper_total": totals}}
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end paper processing")
+    parser.add_argument("--papers", type=int, default=50, help="Number of synthetic papers")
+    parser.add_argument("--pages", type=int, default=8, help="Pages per synthetic paper")
+    parser.add_argument("--concurrency", type=int, default=8, help="Papers processed at once")
+    parser.add_argument("--mode", choices=["staged", "combined"], default=settings.ai_analysis_mode, help="AI analysis mode")
+    parser.add_argument("--latency", type=float, default=1.0, help="Median fake LLM latency in seconds")
+    parser.add_argument("--latency-spread", type=float, default=0.5, help="Latency spread (uniform half-width or lognormal sigma)")
+    parser.add_argument("--distribution", choices=FakeChatProvider.LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of fake LLM calls that fail")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of fake LLM responses that are truncated")
+    parser.add_argument("--database-url", help="Database to write to (default: throwaway SQLite)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory(prefix="aira-benchmark-")
+    settings.llm_cache_enabled = False
+    settings.llm_rate_limit_enabled = False
+    settings.ai_usage_enabled = False
+    settings.passage_index_on_ingest = False
+    settings.ai_analysis_mode = args.mode
+    settings.ai_analysis_mode_by_tier = {}
+    pdf_store.root = workdir.name
+
+    fake = FakeChatProvider(
+        latency=args.latency, latency_spread=args.latency_spread, distribution=args.distribution,
+        failure_rate=args.failure_rate, malformed_rate=args.malformed_rate, seed=args.seed
+    )
+    ai_service.register_provider("openai", fake)
+    ai_service.register_provider("anthropic", fake)
+
+    engine = create_engine(args.database_url or f"sqlite:///{workdir.name}/benchmark.db")
+    Base.metadata.create_all(bind=engine)
+
+    print(f"📄 Input: {args.papers} papers x {args.pages} pages, concurrency {args.concurrency}, {args.mode} analysis")
+    print(f"🤖 Fake LLM: {args.distribution} latency {args.latency}s ±{args.latency_spread}, "
+          f"failure rate {args.failure_rate}, malformed rate {args.malformed_rate}\n")
+
+    try:
+        result = asyncio.run(run_benchmark(args, sessionmaker(bind=engine)))
+    finally:
+        extraction_engine.shutdown()
+        engine.dispose()
+        workdir.cleanup()
+
+    print(f"{'stage':<22}{'count':>8}{'p50 (s)':>12}{'p99 (s)':>12}")
+    for stage, samples in sorted(result["stages"].items()):
+        if samples:
+            print(f"{stage:<22}{len(samples):>8}{statistics.median(samples):>12.3f}{percentile(samples, 99):>12.3f}")
+
+    usage = fake.stats()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    peak_child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+    print(f"\n✅ {result['succeeded']}/{args.papers} papers in {result['elapsed']:.2f}s "
+          f"({args.papers / result['elapsed']:.2f} papers/s)")
+    print(f"🤖 LLM calls: {usage['calls']} ({usage['failures']} failed), ~{usage['tokens']} output tokens")
+    print(f"💾 Peak RSS: {peak_rss:.1f} MB (largest extraction worker {peak_child_rss:.1f} MB)")
+
+    return 0 if result["succeeded"] == args.papers else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the extracted text normalizer.
+
+Compares the single-pass normalizer against the legacy multi-pass cleaner
+on a synthetic paper (or a text file) and reports throughput and memory
+allocations for both.
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add app to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.text_normalizer import normalize_text, legacy_clean_text
+
+
+WORDS = (
+    "the of model learning data results we propose in network training analysis "
+    "method show table figure using based approach neural performance evaluation"
+).split()
+
+
+def build_sample_text(length: int, seed: int = 42) -> str:
+    """Build text shaped like raw PDF extraction output."""
+
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    page = 1
+
+    while size < length:
+        for _ in range(45):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(3, 12))]
+            if rng.random() < 0.1:
+                words[-1] += "-"  # Hyphenated line break
+            line = " ".join(words)
+            if rng.random() < 0.1:
+                line += " ."
+            if rng.random() < 0.2:
+                line = "  " + line.replace(" ", "\t", 1)
+            lines.append(line)
+            size += len(line) + 1
+
+        lines.extend(["", str(page), f"Page {page}", "", ""])
+        page += 1
+
+    return "\n".join(lines)[:length]
+
+
+def measure(func, text: str, iterations: int) -> dict:
+    """Measure throughput and allocations of one normalizer."""
+
+    func(text)  # Warm up regex caches
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(text)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ms": elapsed * 1000,
+        "mb_per_s": len(text.encode("utf-8")) / elapsed / 1024 / 1024,
+        "peak_kb": peak / 1024,
+        "copies": peak / sys.getsizeof(text)  # Peak allocation in multiples of the input
+    }
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the extracted text normalizer")
+    parser.add_argument("--file", help="Text file to normalize (synthetic paper if omitted)")
+    parser.add_argument("--length", type=int, default=50000, help="Synthetic text length in characters")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed iterations per implementation")
+    args = parser.parse_args()
+
+    if args.file:
+        text = Path(args.file).read_text(encoding="utf-8")
+    else:
+        text = build_sample_text(args.length)
+
+    if normalize_text(text) != legacy_clean_text(text):
+        print("❌ Outputs differ, benchmark aborted")
+        return 1
+
+    print(f"📄 Input: {len(text)} characters, {args.iterations} iterations\n")
+    print(f"{'implementation':<16}{'ms/call':>10}{'MB/s':>10}{'peak KB':>10}{'copies':>10}")
+
+    results = {}
+    for name, func in (("legacy", legacy_clean_text), ("single-pass", normalize_text)):
+        results[name] = measure(func, text, args.iterations)
+        stats = results[name]
+        print(
+            f"{name:<16}{stats['ms']:>10.3f}{stats['mb_per_s']:>10.2f}"
+            f"{stats['peak_kb']:>10.1f}{stats['copies']:>10.1f}"
+        )
+
+    speedup = results["legacy"]["ms"] / results["single-pass"]["ms"]
+    print(f"\n✅ Single-pass normalizer is {speedup:.2f}x faster")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
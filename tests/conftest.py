@@ -205,6 +205,30 @@ def mock_redis():
     redis.from_url = original_from_url
 
 
+@pytest.fixture(autouse=True)
+def disable_llm_cache(monkeypatch):
+    """Keep cached LLM responses from leaking between tests."""
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+
+
+@pytest.fixture(autouse=True)
+def disable_llm_rate_limit(monkeypatch):
+    """Keep unit tests from waiting on the shared Redis rate limiter."""
+    monkeypatch.setattr(settings, "llm_rate_limit_enabled", False)
+
+
+@pytest.fixture(autouse=True)
+def disable_stream_sharing(monkeypatch):
+    """Keep unit tests from coordinating summary streams through Redis."""
+    monkeypatch.setattr(settings, "stream_sharing_enabled", False)
+
+
+@pytest.fixture(autouse=True)
+def disable_ai_usage(monkeypatch):
+    """Keep unit tests from writing AI usage records to the database."""
+    monkeypatch.setattr(settings, "ai_usage_enabled", False)
+
+
 @pytest.fixture
 def sample_paper_data():
     """Sample paper data for testing."""
@@ -245,6 +269,25 @@ def sample_user_data():
     }
 
 
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Build small PDF files with one block of text per page."""
+    import fitz
+
+    def factory(pages, name: str = "paper.pdf") -> str:
+        document = fitz.open()
+        for text in pages:
+            page = document.new_page()
+            page.insert_textbox(fitz.Rect(50, 50, 550, 800), text, fontsize=8)
+
+        path = str(tmp_path / name)
+        document.save(path)
+        document.close()
+        return path
+
+    return factory
+
+
 # Test utilities
 class TestUtils:
     """Utility functions for testing."""
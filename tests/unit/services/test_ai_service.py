@@ -1,12 +1,24 @@
 """
 Unit tests for AI service.
 """
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, Mock, patch
 import json
 
-from app.services.ai_service import AIService
-from app.schemas.paper import PaperSummary, KeyInsight
+from app.services.ai_service import AIService, CombinedAnalysisError
+from app.schemas.paper import PaperSummary, KeyInsight, PaperContribution
+from app.services.section_index import build_section_index
+
+
+def embeddings_response(model, input):
+    """Embeddings response with one vector per input, tagged with the input length."""
+    response = Mock()
+    response.data = [
+        Mock(index=index, embedding=[float(len(text)), 1.0]) for index, text in enumerate(input)
+    ]
+    return response
 
 
 class TestAIService:
@@ -44,22 +56,25 @@ class TestAIService:
         mock_response = Mock()
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = json.dumps({
-            "research_question": "How can ML improve academic research?",
-            "methodology": "Systematic literature review",
+            "executive_summary": "ML can improve academic research.",
             "key_findings": [
                 "ML can automate literature reviews",
                 "ML improves data analysis efficiency",
                 "ML enables new research methodologies"
             ],
+            "methodology_overview": "Systematic literature review",
+            "contributions": [
+                {"contribution": "Survey of ML in research", "type": "empirical", "significance": 0.7}
+            ],
             "limitations": [
                 "Limited to English language papers",
                 "Focused on computer science domain"
             ],
-            "significance": "Demonstrates the transformative potential of ML in research",
             "future_work": [
                 "Expand to other academic domains",
                 "Develop domain-specific ML tools"
             ],
+            "relevance_score": 0.8,
             "confidence_score": 0.85
         })
 
@@ -73,7 +88,8 @@ class TestAIService:
             )
 
             assert isinstance(result, PaperSummary)
-            assert result.research_question == "How can ML improve academic research?"
+            assert result.executive_summary == "ML can improve academic research."
+            assert result.contributions[0].type == "empirical"
             assert len(result.key_findings) == 3
             assert len(result.limitations) == 2
             assert result.confidence_score == 0.85
@@ -141,24 +157,19 @@ class TestAIService:
             assert all(isinstance(val, float) for val in embeddings)
 
     @pytest.mark.asyncio
-    async def test_generate_embeddings_text_truncation(self, ai_service):
-        """Test embeddings generation with text truncation."""
-        # Create very long text
-        long_text = "This is a test sentence. " * 1000  # Much longer than 8000 chars
-
-        mock_response = Mock()
-        mock_response.data = [Mock()]
-        mock_response.data[0].embedding = [0.1] * 1536
+    async def test_generate_embeddings_long_text_is_chunked(self, ai_service):
+        """Test text over the input limit is embedded in chunks instead of truncated."""
+        long_text = "This is a test sentence. " * 2000  # Over 8191 tokens
 
         with patch.object(ai_service.openai_client.embeddings, 'create',
-                         new_callable=AsyncMock, return_value=mock_response) as mock_create:
+                         new_callable=AsyncMock, side_effect=embeddings_response) as mock_create:
 
-            await ai_service.generate_embeddings(long_text)
+            embeddings = await ai_service.generate_embeddings(long_text)
 
-            # Check that the text was truncated
-            call_args = mock_create.call_args
-            input_text = call_args.kwargs['input']
-            assert len(input_text) <= 8000
+            inputs = mock_create.call_args.kwargs['input']
+            assert len(inputs) > 1
+            assert "".join(inputs) == long_text
+            assert sum(value * value for value in embeddings) == pytest.approx(1.0)
 
     @pytest.mark.asyncio
     async def test_analyze_methodology_success(self, ai_service, sample_paper_content):
@@ -288,37 +299,179 @@ class TestAIService:
         assert "Authors: Author 1, Author 2" in content
         assert "This is the paper content." in content
 
+    @pytest.mark.asyncio
+    async def test_analyze_methodology_uses_section_index(self, ai_service):
+        """Test methodology analysis only sends the methods sections."""
+        content = "1 Introduction\nWhy it matters.\n2 Methods\nWe ran a survey.\n3 Results\nIt worked."
+        section_index = build_section_index(content)
+
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = "Survey based methodology."
+
+        with patch.object(ai_service.openai_client.chat.completions, 'create',
+                         new_callable=AsyncMock, return_value=mock_response) as mock_create:
+
+            await ai_service.analyze_methodology(content, "Test Paper", section_index=section_index)
+
+            prompt = mock_create.call_args.kwargs['messages'][0]['content']
+            assert "We ran a survey." in prompt
+            assert "Why it matters." not in prompt
+            assert "It worked." not in prompt
+
+    def test_select_content_falls_back_without_sections(self, ai_service):
+        """Test stages without matching sections get the start of the paper."""
+        content = "1 Introduction\nWhy it matters."
+        section_index = build_section_index(content)
+
+        assert ai_service._select_content(content, section_index, "methodology") == content
+        assert ai_service._select_content(content, None, "methodology") == content
+
+    @pytest.mark.asyncio
+    async def test_analyze_paper_combined_success(self, ai_service, sample_paper_content):
+        """Test one structured request validates into every stage schema."""
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = json.dumps({
+            "summary": {
+                "executive_summary": "ML helps research.",
+                "key_findings": ["Automation works"],
+                "methodology_overview": "Literature review",
+                "limitations": ["English only"],
+                "future_work": ["Other domains"],
+                "relevance_score": 0.7,
+                "confidence_score": 0.8
+            },
+            "key_insights": [
+                {"insight": "Minor", "relevance_score": 0.4},
+                {"insight": "Major", "relevance_score": 0.9, "section": "Results"}
+            ],
+            "methodology": "Systematic review of literature.",
+            "limitations": "Only English-language papers.",
+            "contributions": [
+                {"contribution": "Survey of ML use", "type": "empirical", "significance": 0.6}
+            ]
+        })
+
+        with patch.object(ai_service.openai_client.chat.completions, 'create',
+                         new_callable=AsyncMock, return_value=mock_response) as mock_create:
+
+            analysis = await ai_service.analyze_paper_combined(sample_paper_content, "Test Paper")
+
+            assert mock_create.call_count == 1
+            assert mock_create.call_args.kwargs['response_format'] == {"type": "json_object"}
+            assert isinstance(analysis["summary"], PaperSummary)
+            assert analysis["summary"].contributions == analysis["contributions"]
+            assert all(isinstance(item, PaperContribution) for item in analysis["contributions"])
+            assert [insight.insight for insight in analysis["key_insights"]] == ["Major", "Minor"]
+            assert analysis["methodology"] == "Systematic review of literature."
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("response_text", [
+        "not json",
+        json.dumps({"summary": {}, "key_insights": [], "methodology": "", "limitations": "", "contributions": []}),
+        json.dumps({"summary": {"executive_summary": "x"}}),
+    ])
+    async def test_analyze_paper_combined_invalid(self, ai_service, response_text):
+        """Test responses that do not validate raise CombinedAnalysisError."""
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = response_text
+
+        with patch.object(ai_service.openai_client.chat.completions, 'create',
+                         new_callable=AsyncMock, return_value=mock_response):
+
+            with pytest.raises(CombinedAnalysisError):
+                await ai_service.analyze_paper_combined("content", "Test Paper")
+
     def test_create_summarization_prompt(self, ai_service):
         """Test summarization prompt creation."""
         content = "Sample paper content for testing."
         prompt = ai_service._create_summarization_prompt(content)
 
         assert "JSON object" in prompt
-        assert "research_question" in prompt
-        assert "methodology" in prompt
+        assert "executive_summary" in prompt
+        assert "methodology_overview" in prompt
         assert "key_findings" in prompt
         assert content in prompt
 
     def test_parse_summary_response(self, ai_service):
         """Test summary response parsing."""
         summary_data = {
-            "research_question": "Test question?",
-            "methodology": "Test methodology",
+            "executive_summary": "Test overview.",
             "key_findings": ["Finding 1", "Finding 2"],
+            "methodology_overview": "Test methodology",
+            "contributions": [{"contribution": "Test contribution", "type": "theoretical"}],
             "limitations": ["Limitation 1"],
-            "significance": "Test significance",
             "future_work": ["Future work 1"],
+            "relevance_score": 0.7,
             "confidence_score": 0.85
         }
 
         summary = ai_service._parse_summary_response(summary_data)
 
         assert isinstance(summary, PaperSummary)
-        assert summary.research_question == "Test question?"
+        assert summary.executive_summary == "Test overview."
+        assert summary.contributions[0].significance == 0.5
         assert len(summary.key_findings) == 2
+        assert summary.relevance_score == 0.7
         assert summary.confidence_score == 0.85
 
 
+class TestEmbedTexts:
+    """Test batched embeddings."""
+
+    @pytest.fixture
+    def ai_service(self):
+        return AIService()
+
+    @pytest.mark.asyncio
+    async def test_dedups_and_keeps_input_order(self, ai_service):
+        """Test identical texts are embedded once and vectors follow input order."""
+        with patch.object(ai_service.openai_client.embeddings, 'create',
+                         new_callable=AsyncMock, side_effect=embeddings_response) as mock_create:
+
+            vectors = await ai_service.embed_texts(["aa", "b", "aa", "cccc"])
+
+            assert mock_create.call_args.kwargs['input'] == ["aa", "b", "cccc"]
+            assert [vector[0] for vector in vectors] == [2.0, 1.0, 2.0, 4.0]
+
+    @pytest.mark.asyncio
+    async def test_packs_batches(self, ai_service, monkeypatch):
+        """Test batches respect the input count and token limits."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "ai_embedding_batch_size", 2)
+
+        with patch.object(ai_service.openai_client.embeddings, 'create',
+                         new_callable=AsyncMock, side_effect=embeddings_response) as mock_create:
+
+            vectors = await ai_service.embed_texts([f"text {i}" for i in range(5)])
+
+            assert [len(call.kwargs['input']) for call in mock_create.call_args_list] == [2, 2, 1]
+            assert len(vectors) == 5
+
+        monkeypatch.setattr(settings, "ai_embedding_batch_size", 100)
+        monkeypatch.setattr(settings, "ai_embedding_batch_tokens", 3)
+        assert ai_service._embedding_batches(["aaaa", "bbbb", "cccccccc"], "text-embedding-3-large") == [
+            ["aaaa", "bbbb"], ["cccccccc"]
+        ]
+
+    @pytest.mark.asyncio
+    async def test_embed_document_returns_chunk_offsets(self, ai_service):
+        """Test chunk-level embeddings cover the whole text."""
+        text = "First paragraph here.\n\nSecond paragraph here.\n\nThird one."
+
+        with patch.object(ai_service.openai_client.embeddings, 'create',
+                         new_callable=AsyncMock, side_effect=embeddings_response):
+
+            chunks = await ai_service.embed_document(text, chunk_tokens=8)
+
+            assert len(chunks) > 1
+            assert chunks[0]["start"] == 0 and chunks[-1]["end"] == len(text)
+            assert all(text[chunk["start"]:chunk["end"]] == chunk["text"] for chunk in chunks)
+            assert all(chunk["embedding"][0] == len(chunk["text"]) for chunk in chunks)
+
+
 class TestAIServiceEdgeCases:
     """Test edge cases and error conditions."""
 
@@ -344,12 +497,13 @@ class TestAIServiceEdgeCases:
         mock_response = Mock()
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = json.dumps({
-            "research_question": "Test",
-            "methodology": "Test",
+            "executive_summary": "Test",
             "key_findings": ["Test"],
+            "methodology_overview": "Test",
+            "contributions": [],
             "limitations": ["Test"],
-            "significance": "Test",
             "future_work": ["Test"],
+            "relevance_score": 0.5,
             "confidence_score": 0.5
         })
 
@@ -374,4 +528,66 @@ class TestAIServiceEdgeCases:
                          new_callable=AsyncMock, return_value=mock_response):
 
             with pytest.raises(Exception):
-                await ai_service.summarize_paper("Test content", "Test Paper")
\ No newline at end of file
+                await ai_service.summarize_paper("Test content", "Test Paper")
+
+class TestIterProcessPapers:
+    """Test sliding-window batch processing."""
+
+    @pytest.fixture
+    def ai_service(self):
+        return AIService()
+
+    @staticmethod
+    def papers(count):
+        return [{"id": f"paper{i}", "title": f"Paper {i}", "content": "Content"} for i in range(count)]
+
+    @pytest.mark.asyncio
+    async def test_keeps_window_full_and_yields_in_completion_order(self, ai_service):
+        """Test a slow paper does not hold back the rest of the batch."""
+        in_flight = 0
+        peak = 0
+        started = []
+
+        async def process(paper_data):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            started.append(paper_data["id"])
+            await asyncio.sleep(0.2 if paper_data["id"] == "paper0" else 0.01)
+            in_flight -= 1
+            return {"paper_id": paper_data["id"], "processing_status": "completed"}
+
+        with patch.object(ai_service, '_process_single_paper', side_effect=process):
+            results = [result async for result in ai_service.iter_process_papers(self.papers(6), window=2)]
+
+        assert peak == 2
+        assert len(started) == 6
+        assert [result["paper_id"] for result in results][-1] == "paper0"
+        assert results[0]["paper_index"] == 1
+
+    @pytest.mark.asyncio
+    async def test_resumes_from_checkpoint(self, ai_service, tmp_path):
+        """Test completed papers are not reprocessed after an interruption, but failures are."""
+        checkpoint = str(tmp_path / "batch.jsonl")
+
+        async def process(paper_data):
+            if paper_data["id"] == "paper1":
+                raise Exception("Processing failed")
+            return {"paper_id": paper_data["id"], "processing_status": "completed"}
+
+        with patch.object(ai_service, '_process_single_paper', side_effect=process):
+            first = await ai_service.batch_process_papers(self.papers(3), checkpoint_path=checkpoint)
+
+        assert [result["processing_status"] for result in first] == ["completed", "failed", "completed"]
+
+        with open(checkpoint, "a") as f:
+            f.write('{"key": "paper9", "res')  # Torn by an interruption
+
+        with patch.object(ai_service, '_process_single_paper', new_callable=AsyncMock,
+                          return_value={"paper_id": "paper1", "processing_status": "completed"}) as mock_process:
+            second = await ai_service.batch_process_papers(self.papers(3), checkpoint_path=checkpoint)
+
+        assert mock_process.call_count == 1
+        assert [result["paper_id"] for result in second] == ["paper0", "paper1", "paper2"]
+        assert all(result["processing_status"] == "completed" for result in second)
+        assert len(ai_service._load_checkpoint(checkpoint)) == 3
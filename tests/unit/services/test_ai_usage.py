@@ -0,0 +1,99 @@
+"""
+Unit tests for AI usage accounting.
+"""
+import asyncio
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.ai_usage import AIUsageRecorder, UsageTotals, usage_context
+from app.services.llm_providers import ChatCompletion, ChatProvider
+
+
+class ReportingProvider(ChatProvider):
+    """Provider reporting fixed token counts."""
+
+    async def complete(self, model, prompt, params):
+        return ChatCompletion("answer", prompt_tokens=120, completion_tokens=30)
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    """Enabled recorder whose batches are captured instead of written."""
+    monkeypatch.setattr(settings, "ai_usage_enabled", True)
+    monkeypatch.setattr(settings, "ai_usage_flush_interval", 0.05)
+    recorder = AIUsageRecorder()
+    batches = []
+    recorder._write = batches.append
+    return recorder, batches
+
+
+class TestAIUsageRecorder:
+    """Test attribution, batching and request totals."""
+
+    @pytest.mark.asyncio
+    async def test_records_provider_tokens_with_attribution(self, recorder):
+        """Test provider-reported tokens are recorded against the user and paper of the call."""
+        recorder, batches = recorder
+        service = AIService()
+        service.register_provider("openai", ReportingProvider())
+        user_id, paper_id = str(uuid4()), str(uuid4())
+
+        with patch("app.services.ai_service.ai_usage", recorder), \
+             usage_context(user_id=user_id, paper_id=paper_id, subscription_tier="researcher"):
+            await service.complete_chat("methodology", "gpt-4-turbo", "prompt")
+
+        await recorder.flush()
+
+        [record] = batches[0]
+        assert record["operation"] == "methodology"
+        assert (record["prompt_tokens"], record["completion_tokens"]) == (120, 30)
+        assert str(record["user_id"]) == user_id and str(record["paper_id"]) == paper_id
+        assert record["subscription_tier"] == "researcher"
+        assert record["cost"] > 0
+
+    @pytest.mark.asyncio
+    async def test_writes_in_batches(self, recorder, monkeypatch):
+        """Test records are written once per interval, or as soon as a batch is full."""
+        recorder, batches = recorder
+        monkeypatch.setattr(settings, "ai_usage_batch_size", 3)
+
+        for _ in range(2):
+            recorder.record("summarization", "openai", "gpt-4-turbo", 100, 10, 0.5)
+        assert batches == []
+
+        recorder.record("summarization", "openai", "gpt-4-turbo", 100, 10, 0.5)
+        await asyncio.sleep(0.01)
+        assert [len(batch) for batch in batches] == [3]
+
+        recorder.record("summarization", "openai", "gpt-4-turbo", 100, 10, 0.5)
+        await asyncio.sleep(0.1)
+        assert [len(batch) for batch in batches] == [3, 1]
+
+    @pytest.mark.asyncio
+    async def test_accumulates_request_totals(self, recorder):
+        """Test calls add their tokens and cost to the enclosing request's totals."""
+        recorder, _ = recorder
+        totals = UsageTotals()
+
+        with usage_context(request_id="request-1", totals=totals):
+            first = recorder.record("summarization", "openai", "gpt-4-turbo", 1000, 100, 1.0)
+            second = recorder.record("insight_extraction", "openai", "gpt-4-turbo", 500, 50, 1.0)
+
+        assert totals.tokens == 1650
+        assert totals.cost == pytest.approx(first + second)
+        assert recorder.stats()["models"]["gpt-4-turbo"]["calls"] == 2
+
+    @pytest.mark.asyncio
+    async def test_non_uuid_ids_are_unattributed(self, recorder):
+        """Test ids that are not UUIDs are stored as empty rather than failing the write."""
+        recorder, batches = recorder
+
+        with usage_context(user_id="not-a-uuid"):
+            recorder.record("summarization", "openai", "gpt-4-turbo", 10, 1, 0.1)
+        await recorder.flush()
+
+        assert batches[0][0]["user_id"] is None
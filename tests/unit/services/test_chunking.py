@@ -0,0 +1,141 @@
+"""
+Unit tests for token counting, chunking and map-reduce summarization.
+"""
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.chunking import chunk_text, count_tokens, estimate_cost
+from app.services.section_index import build_section_index
+
+
+def long_paper(paragraphs: int = 40) -> str:
+    """Paper text with numbered sections and a conclusion at the end."""
+    body = "\n\n".join(
+        f"Paragraph {i} describes experiment {i} in detail with several words." for i in range(paragraphs)
+    )
+    return f"1 Introduction\nWe study things.\n2 Methods\n{body}\n3 Conclusion\nThe final result is 42."
+
+
+class TestChunking:
+    """Test token-budgeted chunking."""
+
+    def test_chunks_respect_budget_and_keep_all_text(self):
+        """Test every chunk fits and no text is lost."""
+        text = long_paper()
+
+        chunks = chunk_text(text, 60)
+
+        assert len(chunks) > 1
+        assert all(count_tokens(chunk) <= 60 for chunk in chunks)
+        assert "".join(chunks) == text
+
+    def test_prefers_section_boundaries(self):
+        """Test a new chunk starts at a section that would overflow."""
+        text = long_paper(4)
+        section_index = build_section_index(text)
+
+        chunks = chunk_text(text, 60, section_index=section_index)
+
+        assert chunks[0] == "1 Introduction\nWe study things.\n"
+        assert chunks[1].startswith("2 Methods")
+        assert chunks[-1].endswith("3 Conclusion\nThe final result is 42.")
+
+    def test_splits_text_without_separators(self):
+        """Test unbroken text is cut hard at the budget."""
+        chunks = chunk_text("A" * 1000, 50)
+
+        assert all(count_tokens(chunk) <= 50 for chunk in chunks)
+        assert "".join(chunks) == "A" * 1000
+
+    def test_short_text_is_one_chunk(self):
+        """Test text under the budget is returned whole."""
+        assert chunk_text("Short text.", 100) == ["Short text."]
+        assert chunk_text("", 100) == []
+
+    def test_estimates_cost(self):
+        """Test costs use per-1K input and output prices."""
+        assert estimate_cost("gpt-4-turbo", 1000, 1000) == pytest.approx(0.04)
+        assert estimate_cost("unknown-model", 1000, 1000) == 0.0
+
+
+class TestMapReduceSummary:
+    """Test long papers are summarized chunk by chunk."""
+
+    @pytest.fixture
+    def ai_service(self, monkeypatch):
+        """AI service with a small token budget."""
+        monkeypatch.setattr(settings, "ai_max_input_tokens", 100)
+        monkeypatch.setattr(settings, "ai_chunk_tokens", 60)
+        monkeypatch.setattr(settings, "ai_chunk_concurrency", 2)
+        return AIService()
+
+    @staticmethod
+    def responder(state):
+        """Chat completion mock answering chunk and stage prompts."""
+
+        async def create(**kwargs):
+            prompt = kwargs["messages"][0]["content"]
+            response = Mock()
+            response.choices = [Mock()]
+
+            if "Summarize part" in prompt:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+                await asyncio.sleep(0.01)
+                state["running"] -= 1
+                state["chunks"] += 1
+                response.choices[0].message.content = "Result 42." if "final result" in prompt else "Setup."
+            else:
+                state["prompts"].append(prompt)
+                response.choices[0].message.content = json.dumps([{"insight": "Answer is 42"}])
+
+            return response
+
+        return AsyncMock(side_effect=create)
+
+    @pytest.mark.asyncio
+    async def test_long_paper_reduces_chunk_summaries(self, ai_service):
+        """Test the stage sees every chunk summary, including the paper's end."""
+        state = {"running": 0, "peak": 0, "chunks": 0, "prompts": []}
+
+        with patch.object(ai_service.openai_client.chat.completions, 'create', self.responder(state)):
+            insights = await ai_service.extract_key_insights(long_paper(), "Long Paper")
+
+        assert state["chunks"] > 2
+        assert state["peak"] == 2
+        assert "Result 42." in state["prompts"][0]
+        assert f"[Part {state['chunks']} of {state['chunks']}]" in state["prompts"][0]
+        assert insights[0].insight == "Answer is 42"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_stages_share_chunk_summaries(self, ai_service):
+        """Test stages running together summarize the chunks once."""
+        state = {"running": 0, "peak": 0, "chunks": 0, "prompts": []}
+        content = long_paper()
+
+        with patch.object(ai_service.openai_client.chat.completions, 'create', self.responder(state)):
+            await asyncio.gather(
+                ai_service.extract_key_insights(content, "Long Paper"),
+                ai_service.extract_key_insights(content, "Long Paper")
+            )
+
+        assert state["chunks"] == len(chunk_text(content, 60))
+        assert len(state["prompts"]) == 2
+
+    @pytest.mark.asyncio
+    async def test_fitting_sections_skip_chunking(self, ai_service):
+        """Test a stage whose sections fit the budget reads them directly."""
+        state = {"running": 0, "peak": 0, "chunks": 0, "prompts": []}
+        content = long_paper()
+        section_index = build_section_index(content)
+
+        with patch.object(ai_service.openai_client.chat.completions, 'create', self.responder(state)):
+            await ai_service.extract_key_insights(content, "Long Paper", section_index=section_index)
+
+        assert state["chunks"] == 0
+        assert "The final result is 42." in state["prompts"][0]
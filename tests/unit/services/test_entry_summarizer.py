@@ -0,0 +1,97 @@
+"""
+Unit tests for background knowledge entry summarization.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.core.config import settings
+from app.services.entry_summarizer import EntrySummaryBatcher
+
+
+@pytest.fixture
+def batcher(monkeypatch):
+    """Batcher with a short debounce whose batches are recorded instead of run."""
+    monkeypatch.setattr(settings, "knowledge_summary_debounce", 0.05)
+    batcher = EntrySummaryBatcher()
+    batches = []
+
+    async def summarize(entry_ids):
+        batches.append(sorted(entry_ids))
+
+    batcher._summarize_batch = summarize
+    return batcher, batches
+
+
+def make_entry(content="word " * 200):
+    """Knowledge entry stand-in."""
+    return SimpleNamespace(id=uuid4(), content=content, summary=None)
+
+
+class TestEntrySummaryBatcher:
+    """Test debouncing, batching and stale summary handling."""
+
+    @pytest.mark.asyncio
+    async def test_debounces_rapid_edits(self, batcher):
+        """Test repeated saves of one entry produce one summary after the last edit."""
+        batcher, batches = batcher
+
+        for _ in range(3):
+            batcher.schedule("entry-1")
+            await asyncio.sleep(0.02)
+
+        assert batches == []
+        await asyncio.sleep(0.1)
+
+        assert batches == [["entry-1"]]
+
+    @pytest.mark.asyncio
+    async def test_coalesces_entries_into_batches(self, batcher, monkeypatch):
+        """Test due entries are summarized in batches of the configured size."""
+        batcher, batches = batcher
+        monkeypatch.setattr(settings, "knowledge_summary_batch_size", 2)
+
+        for number in range(5):
+            batcher.schedule(f"entry-{number}")
+        await asyncio.sleep(0.15)
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert batcher.stats()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_runs_queued_entries_now(self, batcher):
+        """Test flushing does not wait for the debounce."""
+        batcher, batches = batcher
+        batcher.schedule("entry-1")
+
+        await batcher.flush()
+
+        assert batches == [["entry-1"]]
+
+    @pytest.mark.asyncio
+    async def test_one_request_per_batch_skipping_edited_entries(self):
+        """Test a batch is one LLM request and entries edited meanwhile keep their summary unset."""
+        batcher = EntrySummaryBatcher()
+        entries = [make_entry(), make_entry(), make_entry()]
+        edited = entries[2]
+
+        db = Mock()
+        db.query.return_value.filter.return_value.all.return_value = entries
+        db.refresh.side_effect = lambda entry: setattr(entry, "content", "edited " * 100) if entry is edited else None
+
+        response = json.dumps({"summaries": {str(entry.id): f"Summary of {entry.id}" for entry in entries}})
+
+        with patch("app.services.entry_summarizer.SessionLocal", return_value=db), \
+             patch("app.services.entry_summarizer.ai_service.complete_chat", new_callable=AsyncMock,
+                   side_effect=lambda *args, parse, **kwargs: parse(response)) as complete:
+            await batcher._summarize_batch([str(entry.id) for entry in entries])
+
+        assert complete.call_count == 1
+        assert entries[0].summary == f"Summary of {entries[0].id}"
+        assert edited.summary is None
+        assert batcher.stats()["stale"] == 1
+        db.commit.assert_called_once()
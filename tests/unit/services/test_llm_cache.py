@@ -0,0 +1,179 @@
+"""
+Unit tests for the LLM response cache.
+"""
+import os
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Cache with Redis unreachable, so entries go to disk."""
+    monkeypatch.setattr(settings, "llm_cache_enabled", True)
+    return LLMResponseCache(redis_url="redis://127.0.0.1:1/0", root=str(tmp_path))
+
+
+def chat_response(text):
+    """OpenAI chat completion stand-in."""
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = text
+    return response
+
+
+class TestLLMResponseCache:
+    """Test keys, disk fallback, expiry and eviction."""
+
+    def test_key_covers_model_prompt_and_params(self):
+        """Test any change to the request changes the key."""
+        key = LLMResponseCache.make_key("openai", "gpt-4-turbo", "prompt", {"temperature": 0.2})
+
+        assert key == LLMResponseCache.make_key("openai", "gpt-4-turbo", "prompt", {"temperature": 0.2})
+        assert key != LLMResponseCache.make_key("anthropic", "gpt-4-turbo", "prompt", {"temperature": 0.2})
+        assert key != LLMResponseCache.make_key("openai", "gpt-3.5-turbo", "prompt", {"temperature": 0.2})
+        assert key != LLMResponseCache.make_key("openai", "gpt-4-turbo", "prompt!", {"temperature": 0.2})
+        assert key != LLMResponseCache.make_key("openai", "gpt-4-turbo", "prompt", {"temperature": 0.3})
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_disk(self, cache):
+        """Test values round-trip through disk when Redis is down."""
+        key = cache.make_key("openai", "text-embedding-3-large", "text")
+
+        assert await cache.get(key, "embeddings") is None
+        await cache.set(key, [0.1, 0.2])
+        assert await cache.get(key, "embeddings") == [0.1, 0.2]
+
+        stats = cache.stats()
+        assert stats["backend"] == "disk"
+        assert stats["backend_errors"] >= 1
+        assert stats["operations"]["embeddings"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    @pytest.mark.asyncio
+    async def test_expires_entries(self, cache, monkeypatch):
+        """Test entries older than the TTL are misses."""
+        key = cache.make_key("openai", "gpt-4-turbo", "prompt")
+        await cache.set(key, "response")
+
+        monkeypatch.setattr(settings, "llm_cache_ttl", 0)
+        time.sleep(0.01)
+
+        assert await cache.get(key, "methodology") is None
+        assert not os.path.exists(cache._disk_path(key))
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self, cache, monkeypatch):
+        """Test disk eviction keeps the cache under its size limit."""
+        keys = [cache.make_key("openai", "gpt-4-turbo", f"prompt {i}") for i in range(3)]
+        for age, key in zip((300, 200, 100), keys):
+            await cache.set(key, "x" * 100)
+            os.utime(cache._disk_path(key), (time.time() - age, time.time() - age))
+
+        # Reading the oldest entry makes it the most recently used
+        await cache.get(keys[0], "methodology")
+        total_size = sum(os.path.getsize(cache._disk_path(key)) for key in keys)
+        monkeypatch.setattr(settings, "llm_cache_max_disk_bytes", total_size - 1)
+
+        assert cache.evict_disk() == 1
+        assert not os.path.exists(cache._disk_path(keys[1]))
+        assert os.path.exists(cache._disk_path(keys[0]))
+        assert cache.stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache_stores_nothing(self, cache, monkeypatch):
+        """Test the cache is bypassed when disabled."""
+        monkeypatch.setattr(settings, "llm_cache_enabled", False)
+        key = cache.make_key("openai", "gpt-4-turbo", "prompt")
+
+        await cache.set(key, "response")
+
+        assert await cache.get(key, "methodology") is None
+        assert cache.stats()["hits"] == cache.stats()["misses"] == 0
+
+
+class TestBatchedLookups:
+    """Test several entries are read and written in one round trip."""
+
+    @pytest.mark.asyncio
+    async def test_many_round_trip_through_disk(self, cache):
+        """Test batched writes are read back and only hits are returned."""
+        keys = [cache.make_key("openai", "text-embedding-3-large", f"piece {n}") for n in range(3)]
+
+        await cache.set_many({keys[0]: [0.1], keys[1]: [0.2]})
+        values = await cache.get_many(keys, "embeddings")
+
+        assert values == {keys[0]: [0.1], keys[1]: [0.2]}
+        assert cache.stats()["operations"]["embeddings"] == {"hits": 2, "misses": 1, "hit_rate": 0.667}
+
+    @pytest.mark.asyncio
+    async def test_redis_uses_one_mget_and_one_pipeline(self, cache):
+        """Test batches cost one Redis round trip each way rather than one per key."""
+        pipeline = Mock()
+        pipeline.execute = AsyncMock()
+        client = Mock()
+        client.mget = AsyncMock(return_value=[b"[0.1]", None])
+        client.zadd = AsyncMock()
+        client.zcard = AsyncMock(return_value=0)
+        client.pipeline = Mock(return_value=pipeline)
+
+        with patch.object(cache, "_redis", return_value=client):
+            values = await cache.get_many(["a", "b"], "embeddings")
+            await cache.set_many({"b": [0.2], "c": [0.3]})
+
+        assert values == {"a": [0.1]}
+        client.mget.assert_awaited_once()
+        assert pipeline.set.call_count == 2
+        pipeline.execute.assert_awaited_once()
+
+
+class TestAIServiceCaching:
+    """Test AI service calls go through the cache."""
+
+    @pytest.fixture
+    def ai_service(self, cache):
+        """AI service backed by the disk cache."""
+        with patch("app.services.ai_service.llm_cache", cache):
+            yield AIService()
+
+    @pytest.mark.asyncio
+    async def test_repeated_request_is_served_from_cache(self, ai_service, cache):
+        """Test an identical request does not call the provider again."""
+        with patch.object(ai_service.openai_client.chat.completions, 'create',
+                          new_callable=AsyncMock, return_value=chat_response("Survey.")) as mock_create:
+
+            first = await ai_service.analyze_methodology("content", "Test Paper")
+            second = await ai_service.analyze_methodology("content", "Test Paper")
+
+            assert first == second == "Survey."
+            assert mock_create.call_count == 1
+            assert cache.stats()["operations"]["methodology"]["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_unparseable_response_is_not_cached(self, ai_service):
+        """Test a response that fails to parse is requested again."""
+        with patch.object(ai_service.openai_client.chat.completions, 'create',
+                          new_callable=AsyncMock, return_value=chat_response("not json")) as mock_create:
+
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    await ai_service.extract_key_insights("content", "Test Paper")
+
+            assert mock_create.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_embeddings_are_cached(self, ai_service):
+        """Test embeddings for the same text are generated once."""
+        response = Mock()
+        response.data = [Mock(embedding=[0.1, 0.2])]
+
+        with patch.object(ai_service.openai_client.embeddings, 'create',
+                          new_callable=AsyncMock, return_value=response) as mock_create:
+
+            assert await ai_service.generate_embeddings("text") == [0.1, 0.2]
+            assert await ai_service.generate_embeddings("text") == [0.1, 0.2]
+            assert mock_create.call_count == 1
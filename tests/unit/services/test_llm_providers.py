@@ -0,0 +1,62 @@
+"""
+Unit tests for the fake LLM provider.
+"""
+import pytest
+
+from app.services.ai_service import AIService
+from app.services.llm_providers import FakeChatProvider, FakeProviderError
+
+
+@pytest.fixture
+def ai_service():
+    """AIService answering from a fast fake provider."""
+    service = AIService()
+    service.register_provider("openai", FakeChatProvider(latency=0.0, distribution="fixed"))
+    return service
+
+
+class TestFakeChatProvider:
+    """Test fake responses, latency and failures."""
+
+    @pytest.mark.asyncio
+    async def test_responses_pass_stage_parsers(self, ai_service):
+        """Test each stage accepts the fake provider's responses."""
+        summary = await ai_service.summarize_paper("content", "Test Paper", ["Author"])
+        insights = await ai_service.extract_key_insights("content", "Test Paper")
+        contributions = await ai_service.extract_contributions("content", "Test Paper")
+        methodology = await ai_service.analyze_methodology("content", "Test Paper")
+        combined = await ai_service.analyze_paper_combined("content", "Test Paper", ["Author"])
+
+        assert summary.executive_summary and summary.contributions
+        assert insights and contributions
+        assert isinstance(methodology, str)
+        assert combined["summary"].confidence_score <= 1.0
+
+    def test_responses_depend_only_on_prompt(self):
+        """Test the same prompt always gets the same response."""
+        first = FakeChatProvider(seed=1).respond("prompt", 200)
+        second = FakeChatProvider(seed=2).respond("prompt", 200)
+
+        assert first == second
+        assert first != FakeChatProvider().respond("other prompt", 200)
+
+    @pytest.mark.asyncio
+    async def test_failure_rate(self):
+        """Test failures are injected and counted."""
+        provider = FakeChatProvider(latency=0.0, distribution="fixed", failure_rate=1.0)
+
+        with pytest.raises(FakeProviderError):
+            await provider.complete("gpt-4-turbo", "prompt", {})
+
+        assert provider.stats()["failures"] == 1
+
+    def test_latency_distributions(self):
+        """Test sampled latencies follow the configured distribution."""
+        uniform = FakeChatProvider(latency=1.0, latency_spread=0.5, distribution="uniform")
+        samples = [uniform._sample_latency() for _ in range(200)]
+
+        assert all(0.5 <= sample <= 1.5 for sample in samples)
+        assert FakeChatProvider(latency=2.0, distribution="fixed")._sample_latency() == 2.0
+
+        with pytest.raises(ValueError):
+            FakeChatProvider(distribution="normal")
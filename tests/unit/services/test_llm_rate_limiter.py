@@ -0,0 +1,128 @@
+"""
+Unit tests for the shared LLM rate limiter.
+"""
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import openai
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.llm_rate_limiter import LLMRateLimiter
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """Limiter with two configured scopes and no sleeping."""
+    monkeypatch.setattr(settings, "llm_rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "llm_rate_limits", {
+        "openai": {"rpm": 600, "tpm": 60000},
+        "openai:gpt-4-turbo": {"tpm": 6000},
+    })
+    with patch("app.services.llm_rate_limiter.asyncio.sleep", new_callable=AsyncMock) as sleep:
+        yield LLMRateLimiter(redis_url="redis://127.0.0.1:1/0"), sleep
+
+
+def rate_limit_error(headers):
+    """OpenAI 429 error carrying response headers."""
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://api.openai.com"))
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+class TestLLMRateLimiter:
+    """Test bucket arguments, waiting and Redis failure handling."""
+
+    def test_builds_buckets_for_configured_limits(self, limiter):
+        """Test provider and model scopes each get their configured buckets."""
+        limiter, sleep = limiter
+
+        keys, args = limiter._bucket_args("openai", "gpt-4-turbo", 1500)
+
+        assert keys == [
+            "llm_rate:openai:requests", "llm_rate:openai:tokens",
+            "llm_rate:openai:gpt-4-turbo:tokens", "llm_rate:openai:gpt-4-turbo:blocked"
+        ]
+        assert args == [600, 0.01, 1, 60000, 1.0, 1500, 6000, 0.1, 1500]
+
+    @pytest.mark.asyncio
+    async def test_waits_for_capacity(self, limiter):
+        """Test acquire sleeps for the wait the script reports."""
+        limiter, sleep = limiter
+        limiter._run = AsyncMock(side_effect=[1500, 0])
+
+        waited = await limiter.acquire("openai", "gpt-4-turbo", 100)
+
+        assert 1.5 <= sleep.call_args.args[0] <= 1.8
+        assert waited == sleep.call_args.args[0]
+        assert limiter._run.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_sends_anyway_after_max_wait(self, limiter, monkeypatch):
+        """Test capacity is forced once the maximum wait has passed."""
+        limiter, sleep = limiter
+        monkeypatch.setattr(settings, "llm_rate_limit_max_wait", 10)
+
+        async def run(script, keys, args):
+            return 0 if args[1] else 60000
+
+        limiter._run = AsyncMock(side_effect=run)
+
+        await limiter.acquire("openai", "gpt-4-turbo", 100)
+
+        assert limiter._run.call_args.args[2][1] == 1
+        assert sleep.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_unavailable_redis_does_not_limit(self, limiter):
+        """Test calls go through when Redis cannot be reached."""
+        limiter, sleep = limiter
+
+        assert await limiter.acquire("openai", "gpt-4-turbo", 100) == 0.0
+        await limiter.block("openai", "gpt-4-turbo", 5)
+        assert sleep.call_count == 0
+
+
+class TestAIServiceRateLimiting:
+    """Test AIService waits out 429 responses."""
+
+    @pytest.fixture
+    def ai_service(self, monkeypatch):
+        monkeypatch.setattr(settings, "llm_rate_limit_enabled", True)
+        return AIService()
+
+    @pytest.mark.asyncio
+    async def test_retry_after_feeds_the_limiter(self, ai_service):
+        """Test a 429 blocks the model for its retry-after and the call is retried."""
+        response = Mock()
+        response.choices = [Mock()]
+        response.choices[0].message.content = "Survey."
+
+        with patch("app.services.ai_service.llm_rate_limiter") as limiter, \
+             patch.object(ai_service.openai_client.chat.completions, 'create', new_callable=AsyncMock,
+                          side_effect=[rate_limit_error({"retry-after": "2"}), response]) as mock_create:
+            limiter.acquire = AsyncMock(return_value=0.0)
+            limiter.block = AsyncMock()
+
+            assert await ai_service.analyze_methodology("content", "Test Paper") == "Survey."
+
+            assert mock_create.call_count == 2
+            assert limiter.acquire.call_count == 2
+            limiter.block.assert_awaited_once_with("openai", "gpt-4-turbo", 2.0)
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_retries(self, ai_service, monkeypatch):
+        """Test repeated 429s surface once the retries are used up."""
+        monkeypatch.setattr(settings, "llm_rate_limit_retries", 1)
+
+        with patch("app.services.ai_service.llm_rate_limiter") as limiter, \
+             patch.object(ai_service.openai_client.chat.completions, 'create', new_callable=AsyncMock,
+                          side_effect=rate_limit_error({"retry-after-ms": "500"})) as mock_create:
+            limiter.acquire = AsyncMock(return_value=0.0)
+            limiter.block = AsyncMock()
+
+            with pytest.raises(openai.RateLimitError):
+                await ai_service.analyze_methodology("content", "Test Paper")
+
+            assert mock_create.call_count == 2
+            limiter.block.assert_awaited_once_with("openai", "gpt-4-turbo", 0.5)
@@ -0,0 +1,233 @@
+"""
+Unit tests for LLM provider hedging and circuit breaking.
+"""
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import openai
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.llm_cache import llm_cache
+from app.services.llm_providers import ChatCompletion, ChatProvider
+from app.services.llm_rate_limiter import llm_rate_limiter
+from app.services.llm_resilience import CircuitBreaker, LatencyTracker, MIN_LATENCY_SAMPLES
+
+
+class StubProvider(ChatProvider):
+    """Provider answering after a fixed delay, or failing."""
+
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = []
+
+    async def complete(self, model, prompt, params):
+        self.calls.append(model)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return ChatCompletion(f"{self.name} answer")
+
+
+@pytest.fixture
+def ai_service(monkeypatch):
+    """AIService with stub OpenAI and Anthropic providers."""
+    monkeypatch.setattr(settings, "ai_hedge_initial_delay", 0.05)
+    monkeypatch.setattr(settings, "ai_hedge_min_delay", 0.01)
+    monkeypatch.setattr(settings, "ai_breaker_min_requests", 4)
+    service = AIService()
+    service.register_provider("openai", StubProvider("openai"))
+    service.register_provider("anthropic", StubProvider("anthropic"))
+    return service
+
+
+class TestLatencyTracker:
+    """Test rolling latency percentiles."""
+
+    def test_needs_enough_samples(self):
+        """Test no percentile is reported until enough calls are recorded."""
+        tracker = LatencyTracker()
+        tracker.record("openai:gpt-4-turbo:methodology", 1.0)
+
+        assert tracker.percentile("openai:gpt-4-turbo:methodology", 95) is None
+
+    def test_reports_percentile(self):
+        """Test the percentile is taken over recorded latencies."""
+        tracker = LatencyTracker()
+        for seconds in range(1, 101):
+            tracker.record("key", float(seconds))
+
+        assert tracker.percentile("key", 95) == 95.0
+        assert tracker.percentile("key", 50) == 50.0
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions."""
+
+    def test_opens_on_error_rate(self, monkeypatch):
+        """Test the breaker opens once errors cross the threshold."""
+        monkeypatch.setattr(settings, "ai_breaker_min_requests", 4)
+        breaker = CircuitBreaker("openai")
+
+        for ok in (True, False, True, False):
+            breaker.record(ok, 0.1)
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+    def test_opens_on_slow_calls(self, monkeypatch):
+        """Test successful but slow calls also open the breaker."""
+        monkeypatch.setattr(settings, "ai_breaker_min_requests", 2)
+        monkeypatch.setattr(settings, "ai_breaker_slow_seconds", 1.0)
+        breaker = CircuitBreaker("openai")
+
+        breaker.record(True, 5.0)
+        breaker.record(True, 5.0)
+
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_half_open_trial_closes(self, monkeypatch):
+        """Test one trial call is allowed after the cooldown and closes the breaker."""
+        monkeypatch.setattr(settings, "ai_breaker_min_requests", 1)
+        monkeypatch.setattr(settings, "ai_breaker_cooldown", 0)
+        breaker = CircuitBreaker("openai")
+        breaker.record(False, 0.1)
+
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow()
+
+        breaker.record(True, 0.1)
+
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow()
+
+
+class TestHedgedChat:
+    """Test AIService hedging and failover."""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self, ai_service):
+        """Test a prompt answer is taken without a second request."""
+        result = await ai_service.complete_chat("methodology", "gpt-4-turbo", "prompt")
+
+        assert result == "openai answer"
+        assert ai_service.providers["anthropic"].calls == []
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_on_alternate(self, ai_service):
+        """Test a request past the hedge delay is duplicated on the alternate provider."""
+        ai_service.providers["openai"].delay = 1.0
+
+        result = await ai_service.complete_chat("methodology", "gpt-4-turbo", "prompt")
+
+        assert result == "anthropic answer"
+        assert ai_service.providers["anthropic"].calls == [settings.ai_failover_models["openai"]]
+        assert ai_service.provider_stats()["hedges_won"] == 1
+
+    @pytest.mark.asyncio
+    async def test_hedge_delay_follows_recorded_latency(self, ai_service):
+        """Test the hedge waits for the latency percentile once enough calls are seen."""
+        for _ in range(MIN_LATENCY_SAMPLES):
+            ai_service.latencies.record("openai:gpt-4-turbo:methodology", 0.3)
+
+        assert ai_service._hedge_delay("methodology", "openai", "gpt-4-turbo") == 0.3
+        assert ai_service._hedge_delay("methodology", "anthropic", "claude-3-sonnet-20240229") == 0.05
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_routes_to_alternate(self, ai_service):
+        """Test repeated failures open the primary circuit and traffic moves over."""
+        ai_service.providers["openai"].error = RuntimeError("provider down")
+
+        for _ in range(4):
+            assert await ai_service.complete_chat("methodology", "gpt-4-turbo", f"prompt {_}") == "anthropic answer"
+
+        assert ai_service.breakers["openai"].state == CircuitBreaker.OPEN
+
+        result = await ai_service.complete_chat("methodology", "gpt-4-turbo", "prompt")
+
+        assert result == "anthropic answer"
+        assert len(ai_service.providers["openai"].calls) == 4
+
+    @pytest.mark.asyncio
+    async def test_fast_failure_fails_over(self, ai_service):
+        """Test a primary failing before the hedge delay is retried once on the alternate."""
+        ai_service.providers["openai"].error = RuntimeError("bad gateway")
+
+        result = await ai_service.complete_chat("methodology", "gpt-4-turbo", "prompt")
+
+        assert result == "anthropic answer"
+        assert ai_service.providers["anthropic"].calls == [settings.ai_failover_models["openai"]]
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_primary_does_not_fail_over(self, ai_service, monkeypatch):
+        """Test a 429 is raised rather than moved to the other provider."""
+        monkeypatch.setattr(settings, "llm_rate_limit_retries", 0)
+        request = httpx.Request("POST", "https://api.openai.com")
+        ai_service.providers["openai"].error = openai.RateLimitError(
+            "rate limited", response=httpx.Response(429, request=request), body=None
+        )
+
+        with pytest.raises(openai.RateLimitError):
+            await ai_service.complete_chat("methodology", "gpt-4-turbo", "prompt")
+
+        assert ai_service.providers["anthropic"].calls == []
+
+    @pytest.mark.asyncio
+    async def test_alternate_answer_is_cached_under_its_model(self, ai_service, monkeypatch):
+        """Test a failover answer is never replayed as the requested model's answer."""
+        stored = []
+
+        async def cache_set(key, value, *args, **kwargs):
+            stored.append(key)
+
+        monkeypatch.setattr(llm_cache, "set", cache_set)
+        ai_service.providers["openai"].error = RuntimeError("provider down")
+
+        await ai_service.complete_chat("methodology", "gpt-4-turbo", "prompt")
+
+        alternate_model = settings.ai_failover_models["openai"]
+        assert stored == [llm_cache.make_key("anthropic", alternate_model, "prompt", {})]
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_wait_is_not_provider_latency(self, ai_service, monkeypatch):
+        """Test queueing on our own rate limiter neither hedges nor counts as latency."""
+        async def acquire(provider, model, tokens):
+            if provider == "openai":
+                await asyncio.sleep(0.2)
+            return 0.0
+
+        monkeypatch.setattr(llm_rate_limiter, "acquire", acquire)
+
+        result = await ai_service.complete_chat("methodology", "gpt-4-turbo", "prompt")
+
+        assert result == "openai answer"
+        assert ai_service.providers["anthropic"].calls == []
+        recorded = ai_service.breakers["openai"]._outcomes[-1][2]
+        assert recorded < 0.1
+
+    @pytest.mark.asyncio
+    async def test_both_failing_raises_original_error(self, ai_service):
+        """Test the primary's error surfaces when the hedge also fails."""
+        ai_service.providers["openai"].delay = 0.1
+        ai_service.providers["openai"].error = RuntimeError("primary")
+        ai_service.providers["anthropic"].error = RuntimeError("hedge")
+
+        with pytest.raises(RuntimeError, match="primary"):
+            await ai_service.complete_chat("methodology", "gpt-4-turbo", "prompt")
+
+    @pytest.mark.asyncio
+    async def test_hedging_disabled(self, ai_service, monkeypatch):
+        """Test a slow request is awaited when hedging is off."""
+        monkeypatch.setattr(settings, "ai_hedging_enabled", False)
+        ai_service.providers["openai"].delay = 0.1
+
+        with patch.object(ai_service, "_hedge_delay") as hedge_delay:
+            assert await ai_service.complete_chat("methodology", "gpt-4-turbo", "prompt") == "openai answer"
+
+        assert hedge_delay.call_count == 0
+        assert ai_service.providers["anthropic"].calls == []
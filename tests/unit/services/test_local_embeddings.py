@@ -0,0 +1,88 @@
+"""
+Unit tests for the local embedding backend.
+"""
+from unittest.mock import AsyncMock, Mock, patch
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.local_embeddings import LocalEmbeddingProvider
+
+
+class FakeModel:
+    """Sentence-transformers stand-in returning the text length as the vector."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size, normalize_embeddings, convert_to_numpy, show_progress_bar):
+        self.calls.append({"texts": list(texts), "batch_size": batch_size})
+        return np.array([[float(len(text)), 0.0] for text in texts])
+
+
+@pytest.fixture
+def provider():
+    """Provider whose model load is replaced by a fake model."""
+    provider = LocalEmbeddingProvider()
+    model = FakeModel()
+    with patch.object(provider, "_load", Mock(return_value=model)) as load:
+        yield provider, model, load
+
+
+class TestLocalEmbeddingProvider:
+    """Test model loading and CPU batching."""
+
+    @pytest.mark.asyncio
+    async def test_loads_model_once(self, provider):
+        """Test the model is loaded on first use and reused."""
+        provider, model, load = provider
+
+        assert load.call_count == 0
+        await provider.embed(["a"])
+        await provider.embed(["bb", "ccc"])
+
+        assert load.call_count == 1
+        assert len(model.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_encodes_with_configured_batch_size(self, provider, monkeypatch):
+        """Test texts are encoded in configured CPU batches."""
+        provider, model, load = provider
+        monkeypatch.setattr(settings, "local_embedding_batch_size", 16)
+
+        vectors = await provider.embed(["a", "bb"])
+
+        assert vectors == [[1.0, 0.0], [2.0, 0.0]]
+        assert model.calls[0]["batch_size"] == 16
+        assert await provider.embed([]) == []
+
+    def test_model_name_reflects_quantization(self, monkeypatch):
+        """Test quantized vectors are cached apart from float ones."""
+        provider = LocalEmbeddingProvider()
+        monkeypatch.setattr(settings, "local_embedding_quantize", True)
+
+        assert provider.model_name == f"{settings.local_embedding_model}-int8"
+
+
+class TestAIServiceLocalProvider:
+    """Test AIService routes embeddings to the local backend."""
+
+    @pytest.mark.asyncio
+    async def test_local_provider_skips_remote_api(self, provider, monkeypatch):
+        """Test local embeddings never call OpenAI and chunk at the local input limit."""
+        provider, model, load = provider
+        monkeypatch.setattr(settings, "embedding_provider", "local")
+        monkeypatch.setattr(settings, "local_embedding_max_tokens", 8)
+        ai_service = AIService()
+
+        with patch("app.services.ai_service.local_embeddings", provider), \
+             patch.object(ai_service.openai_client.embeddings, 'create', new_callable=AsyncMock) as mock_create:
+
+            short, long = await ai_service.embed_texts(["short", " ".join(f"word{i}" for i in range(40))])
+
+            assert mock_create.call_count == 0
+            assert short == [5.0, 0.0]
+            assert len(model.calls[0]["texts"]) > 2
+            assert long == pytest.approx([1.0, 0.0])
@@ -0,0 +1,262 @@
+"""
+Unit tests for paper service AI analysis.
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.db.models import ProcessingStatus, SummaryTier
+from app.services.ai_service import AIService, CombinedAnalysisError
+from app.services.paper_service import PaperService
+
+
+STAGE_METHODS = (
+    "summarize_paper", "extract_key_insights", "analyze_methodology",
+    "identify_limitations", "extract_contributions"
+)
+
+
+def make_paper():
+    """Paper stand-in with the attributes the analysis reads."""
+    return SimpleNamespace(
+        id="paper-1", title="Test Paper", authors=[{"name": "Jane Doe"}],
+        full_text=None, section_index=None
+    )
+
+
+class TestGenerateAIAnalysis:
+    """Test AI analysis modes, concurrency and partial failures."""
+
+    @pytest.fixture
+    def stage_mocks(self):
+        """Patch the AI stages with slow mocks that track concurrency."""
+        state = {"running": 0, "peak": 0}
+
+        def slow(result):
+            async def stage(*args, **kwargs):
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+                await asyncio.sleep(0.05)
+                state["running"] -= 1
+                if isinstance(result, Exception):
+                    raise result
+                return result
+            return AsyncMock(side_effect=stage)
+
+        summary = Mock()
+        summary.dict.return_value = {"executive_summary": "Short"}
+
+        mocks = {
+            "summarize_paper": slow(summary),
+            "extract_key_insights": slow([]),
+            "analyze_methodology": slow("Survey"),
+            "identify_limitations": slow("Small sample"),
+            "extract_contributions": slow([]),
+        }
+
+        with patch.multiple("app.services.paper_service.ai_service", **mocks):
+            yield mocks, state
+
+    @pytest.mark.asyncio
+    async def test_runs_stages_concurrently(self, stage_mocks):
+        """Test all stages overlap and their results are combined."""
+        mocks, state = stage_mocks
+
+        analysis = await PaperService()._generate_ai_analysis(make_paper(), "content")
+
+        assert state["peak"] == len(STAGE_METHODS)
+        assert analysis == {
+            "summary": {"executive_summary": "Short"},
+            "key_insights": [],
+            "methodology": "Survey",
+            "limitations": "Small sample",
+            "contributions": [],
+            "processing_error": None
+        }
+
+    @pytest.mark.asyncio
+    async def test_respects_stage_concurrency(self, stage_mocks, monkeypatch):
+        """Test the per-paper limit bounds concurrent stages."""
+        mocks, state = stage_mocks
+        monkeypatch.setattr(settings, "ai_stage_concurrency", 2)
+
+        await PaperService()._generate_ai_analysis(make_paper(), "content")
+
+        assert state["peak"] == 2
+
+    @pytest.mark.asyncio
+    async def test_respects_worker_concurrency(self, stage_mocks, monkeypatch):
+        """Test the per-worker limit is shared across papers."""
+        mocks, state = stage_mocks
+        monkeypatch.setattr(settings, "ai_worker_concurrency", 3)
+        service = PaperService()
+
+        await asyncio.gather(
+            service._generate_ai_analysis(make_paper(), "content"),
+            service._generate_ai_analysis(make_paper(), "content")
+        )
+
+        assert state["peak"] == 3
+
+    @pytest.mark.asyncio
+    async def test_keeps_partial_results(self, stage_mocks):
+        """Test a failed stage does not discard the others."""
+        mocks, state = stage_mocks
+        mocks["analyze_methodology"].side_effect = RuntimeError("rate limited")
+
+        analysis = await PaperService()._generate_ai_analysis(make_paper(), "content")
+
+        assert "methodology" not in analysis
+        assert analysis["limitations"] == "Small sample"
+        assert "methodology (rate limited)" in analysis["processing_error"]
+
+    @pytest.mark.asyncio
+    async def test_fails_when_every_stage_fails(self, stage_mocks):
+        """Test the analysis fails if no stage succeeds."""
+        mocks, state = stage_mocks
+        for name in STAGE_METHODS:
+            mocks[name].side_effect = RuntimeError("provider down")
+
+        with pytest.raises(RuntimeError, match="provider down"):
+            await PaperService()._generate_ai_analysis(make_paper(), "content")
+
+    @pytest.mark.asyncio
+    async def test_combined_mode_sends_one_request(self, stage_mocks):
+        """Test combined mode replaces the stage calls."""
+        mocks, state = stage_mocks
+        summary = Mock()
+        summary.dict.return_value = {"executive_summary": "Combined"}
+        combined = AsyncMock(return_value={
+            "summary": summary, "key_insights": [], "methodology": "M",
+            "limitations": "L", "contributions": []
+        })
+
+        with patch("app.services.paper_service.ai_service.analyze_paper_combined", combined):
+            analysis = await PaperService()._generate_ai_analysis(make_paper(), "content", "combined")
+
+        assert combined.call_count == 1
+        assert all(mocks[name].call_count == 0 for name in STAGE_METHODS)
+        assert analysis["summary"] == {"executive_summary": "Combined"}
+        assert analysis["processing_error"] is None
+
+    @pytest.mark.asyncio
+    async def test_combined_mode_falls_back_to_stages(self, stage_mocks):
+        """Test an invalid combined response falls back to per-stage calls."""
+        mocks, state = stage_mocks
+        combined = AsyncMock(side_effect=CombinedAnalysisError("missing summary"))
+
+        with patch("app.services.paper_service.ai_service.analyze_paper_combined", combined):
+            analysis = await PaperService()._generate_ai_analysis(make_paper(), "content", "combined")
+
+        assert all(mocks[name].call_count == 1 for name in STAGE_METHODS)
+        assert analysis["methodology"] == "Survey"
+
+
+class TestAnalysisMode:
+    """Test AI analysis mode selection per deployment and tier."""
+
+    @pytest.mark.parametrize("tiers,mode", [
+        ([], "staged"),
+        (["free"], "combined"),
+        (["free", "institution"], "staged"),
+        (["researcher"], "staged"),
+    ])
+    def test_mode_for_highest_tier(self, monkeypatch, tiers, mode):
+        """Test the highest tier with an override decides the mode."""
+        monkeypatch.setattr(settings, "ai_analysis_mode", "staged")
+        monkeypatch.setattr(settings, "ai_analysis_mode_by_tier", {"free": "combined", "institution": "staged"})
+
+        assert PaperService()._analysis_mode(tiers) == mode
+
+
+class TestPreviewSummary:
+    """Test preview summaries written ahead of full analysis."""
+
+    ABSTRACT = (
+        "We study retrieval for long documents. Existing methods lose context. "
+        "We propose a sliding index. Our results show a 12% gain in recall."
+    )
+
+    @pytest.mark.asyncio
+    async def test_extractive_preview_without_model(self, monkeypatch):
+        """Test the abstract is summarized without an LLM call when no preview model is set."""
+        monkeypatch.setattr(settings, "ai_preview_model", "")
+        ai_service = AIService()
+
+        with patch.object(ai_service, "complete_chat", new_callable=AsyncMock) as complete:
+            preview = await ai_service.generate_preview_summary("Long Retrieval", self.ABSTRACT)
+
+        assert complete.call_count == 0
+        assert preview.executive_summary == "We study retrieval for long documents. Existing methods lose context."
+        assert preview.key_findings == ["Our results show a 12% gain in recall."]
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_model_fails(self):
+        """Test a failing preview model still produces an extractive preview."""
+        ai_service = AIService()
+
+        with patch.object(ai_service, "complete_chat", new_callable=AsyncMock, side_effect=Exception("API Error")):
+            preview = await ai_service.generate_preview_summary("Long Retrieval", self.ABSTRACT, model="gpt-3.5-turbo")
+
+        assert preview.confidence_score == 0.3
+        assert preview.executive_summary.startswith("We study retrieval")
+
+    @pytest.mark.asyncio
+    async def test_preview_does_not_overwrite_full_summary(self):
+        """Test a preview finishing after full analysis is dropped."""
+        paper = SimpleNamespace(id="paper-1", title="Test Paper", abstract=self.ABSTRACT, summary_tier=None)
+        db = Mock()
+        db.refresh.side_effect = lambda paper: setattr(paper, "summary_tier", SummaryTier.FULL)
+
+        with patch("app.services.paper_service.update_paper", new_callable=AsyncMock) as update, \
+             patch("app.services.paper_service.ai_service.generate_preview_summary", new_callable=AsyncMock):
+            await PaperService()._write_preview(db, paper)
+
+        assert update.call_count == 0
+
+    @pytest.mark.asyncio
+    async def test_preview_is_marked_as_preview_tier(self):
+        """Test the stored preview is tagged with the preview tier."""
+        paper = SimpleNamespace(id="paper-1", title="Test Paper", abstract=self.ABSTRACT, summary_tier=None)
+        preview = Mock()
+        preview.dict.return_value = {"executive_summary": "Short"}
+
+        with patch("app.services.paper_service.update_paper", new_callable=AsyncMock) as update, \
+             patch("app.services.paper_service.ai_service.generate_preview_summary",
+                   new_callable=AsyncMock, return_value=preview):
+            await PaperService()._write_preview(Mock(), paper)
+
+        update.assert_awaited_once_with(
+            update.call_args.args[0], "paper-1",
+            {"summary": {"executive_summary": "Short"}, "summary_tier": SummaryTier.PREVIEW}
+        )
+
+
+class TestUploadExtraction:
+    """Test uploads whose PDF cannot be read fail instead of completing."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("pdf_data", [None, {"text": None, "metadata": {}, "structure": {}}])
+    async def test_upload_without_text_is_marked_failed(self, pdf_data):
+        """Test a missing blob or empty extraction marks the paper failed without AI analysis."""
+        paper = SimpleNamespace(
+            id="paper-1", title="upload.pdf", authors=[], abstract=None, full_text=None,
+            section_index=None, pdf_url=None, pdf_sha256="ab" * 32, summary_tier=None
+        )
+        service = PaperService()
+        service._generate_ai_analysis = AsyncMock()
+        status = AsyncMock()
+
+        with patch("app.db.queries.paper_queries.get_paper_by_id", AsyncMock(return_value=paper)), \
+                patch("app.services.paper_service.update_paper_processing_status", status), \
+                patch("app.services.paper_service.update_paper", AsyncMock()), \
+                patch("app.services.paper_service.pdf_processor.process_stored_pdf", AsyncMock(return_value=pdf_data)):
+            assert await service.process_paper_content("paper-1", Mock()) is False
+
+        service._generate_ai_analysis.assert_not_called()
+        _, paper_id, final_status, error = status.call_args.args
+        assert final_status == ProcessingStatus.FAILED
+        assert "No text could be extracted" in error
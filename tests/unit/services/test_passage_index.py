@@ -0,0 +1,125 @@
+"""
+Unit tests for the passage index and paper questions.
+"""
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import ai_service
+from app.services.chunking import chunk_spans, count_tokens
+from app.services.paper_service import PaperService
+from app.services.passage_index import PassageIndex
+
+
+TOPICS = ("protein", "galaxy", "climate", "retrieval")
+
+
+def paper_text() -> str:
+    """Paper text with one topic per paragraph."""
+    return "\n\n".join(
+        f"This paragraph {i} is about {topic}. " + f"More {topic} details follow here. " * 8
+        for i, topic in enumerate(TOPICS * 3)
+    )
+
+
+async def topic_embeddings(texts, provider=None):
+    """Embed texts as counts of each topic word."""
+    return [[text.lower().count(topic) + 0.01 for topic in TOPICS] for text in texts]
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    """Passage index in a temp directory with small passages."""
+    monkeypatch.setattr(settings, "passage_tokens", 60)
+    monkeypatch.setattr(settings, "passage_overlap_tokens", 10)
+    return PassageIndex(root=str(tmp_path))
+
+
+class TestChunkSpans:
+    """Test overlapping passage spans."""
+
+    def test_spans_overlap_and_cover_text(self):
+        """Test each span repeats the end of the previous one and together they cover the text."""
+        text = paper_text()
+
+        spans = chunk_spans(text, 60, overlap_tokens=10)
+
+        assert spans[0][0] == 0 and spans[-1][1] == len(text)
+        assert all(start < previous_end for (_, previous_end), (start, _) in zip(spans, spans[1:]))
+        assert all(count_tokens(text[start:end]) <= 70 for start, end in spans)
+
+    def test_no_overlap_matches_chunks(self):
+        """Test spans without overlap are contiguous."""
+        spans = chunk_spans(paper_text(), 60)
+
+        assert all(previous_end == start for (_, previous_end), (start, _) in zip(spans, spans[1:]))
+
+
+class TestPassageIndex:
+    """Test building, reusing and searching passage indexes."""
+
+    @pytest.mark.asyncio
+    async def test_search_returns_relevant_passages(self, index):
+        """Test the top passages are the ones about the question's topic."""
+        with patch.object(ai_service, "embed_texts", side_effect=topic_embeddings):
+            passages = await index.search("paper-1", paper_text(), "What about the galaxy?", top_k=3)
+
+        assert len(passages) == 3
+        assert all("galaxy" in passage["text"] for passage in passages)
+        assert passages[0]["score"] >= passages[-1]["score"]
+
+    @pytest.mark.asyncio
+    async def test_index_is_reused_from_disk(self, index, tmp_path):
+        """Test passages are embedded once per text, and again only when the text changes."""
+        text = paper_text()
+
+        with patch.object(ai_service, "embed_texts", side_effect=topic_embeddings) as embed:
+            await index.build("paper-1", text)
+            await PassageIndex(root=str(tmp_path)).build("paper-1", text)
+            assert embed.call_count == 1
+
+            await index.build("paper-1", text + "\n\nAn appendix about climate.")
+            assert embed.call_count == 2
+
+        assert index.stats()["builds"] == 2
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_indexes_are_evicted(self, index, tmp_path):
+        """Test the directory stays within its size limit by dropping the oldest indexes."""
+        text = paper_text()
+
+        with patch.object(ai_service, "embed_texts", side_effect=topic_embeddings):
+            await index.build("paper-1", text)
+            index.max_bytes = index._dir_size(str(tmp_path / "paper-1")) * 2 + 100
+
+            past = time.time() - 100
+            os.utime(tmp_path / "paper-1", (past, past))
+            await index.build("paper-2", text)
+            await index.build("paper-3", text)
+
+        assert not (tmp_path / "paper-1").exists()
+        assert (tmp_path / "paper-2").exists() and (tmp_path / "paper-3").exists()
+        assert index.stats()["evictions"] == 1
+        assert index.stats()["cached"] == 2
+
+    @pytest.mark.asyncio
+    async def test_question_sends_only_retrieved_passages(self, index):
+        """Test the answer prompt holds the top-k passages, not the full text."""
+        paper = SimpleNamespace(
+            id="paper-1", title="Test Paper", full_text=paper_text(), abstract=None, section_index=None
+        )
+
+        with patch("app.services.paper_service.passage_index", index), \
+             patch.object(ai_service, "embed_texts", side_effect=topic_embeddings), \
+             patch.object(ai_service, "complete_chat", new_callable=AsyncMock, return_value=" Answer [1] ") as complete:
+            result = await PaperService().ask_paper(paper, "How is protein studied?", top_k=2)
+
+        prompt = complete.call_args.args[2]
+        assert result["answer"] == "Answer [1]"
+        assert len(result["passages"]) == 2
+        assert "protein" in prompt and "galaxy" not in prompt
+        assert count_tokens(prompt) < count_tokens(paper.full_text) / 3
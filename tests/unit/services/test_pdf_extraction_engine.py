@@ -0,0 +1,111 @@
+"""
+Unit tests for the PDF extraction process pool.
+
+Jobs use stdlib callables (`time.sleep`, `os._exit`) because spawned workers
+cannot import functions defined in test modules.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import pdf_extraction_engine as engine_module
+from app.services.pdf_extraction_engine import (
+    PDFExtractionEngine,
+    ExtractionQueueFullError,
+    ExtractionTimeoutError,
+)
+
+
+@pytest.fixture
+def make_engine():
+    """Build engines that are shut down after the test."""
+    engines = []
+
+    def factory(**kwargs):
+        engine = PDFExtractionEngine(**kwargs)
+        engines.append(engine)
+        return engine
+
+    yield factory
+
+    for engine in engines:
+        engine.shutdown()
+
+
+class TestPDFExtractionEngine:
+    """Test queueing, time limits and pool recycling."""
+
+    @pytest.mark.asyncio
+    async def test_rejects_jobs_when_queue_is_full(self, make_engine):
+        """Test jobs beyond the workers and queue slots are refused."""
+        engine = make_engine(max_workers=1, queue_size=0, job_timeout=30)
+
+        running = asyncio.ensure_future(engine.run(time.sleep, 0.5))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ExtractionQueueFullError):
+            await engine.run(time.sleep, 0)
+
+        await running
+        stats = engine.stats()
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_does_not_count_against_time_limit(self, make_engine):
+        """Test a job waiting for the only worker still gets its full time limit."""
+        engine = make_engine(max_workers=1, queue_size=4, job_timeout=1.5)
+
+        results = await asyncio.gather(
+            engine.run(time.sleep, 1.0),
+            engine.run(time.sleep, 1.0),
+        )
+
+        assert results == [None, None]
+        assert engine.stats()["timed_out"] == 0
+
+    @pytest.mark.asyncio
+    async def test_timeout_interrupts_job_without_recycling_pool(self, make_engine):
+        """Test a slow job is stopped inside its worker and the pool keeps serving."""
+        engine = make_engine(max_workers=1, queue_size=4, job_timeout=30)
+
+        slow, healthy = await asyncio.gather(
+            engine.run(time.sleep, 10, timeout=0.5),
+            engine.run(time.sleep, 0.1),
+            return_exceptions=True,
+        )
+
+        assert isinstance(slow, ExtractionTimeoutError)
+        assert healthy is None
+        stats = engine.stats()
+        assert stats["timed_out"] == 1
+        assert stats["failed"] == 1
+        assert stats["pool_restarts"] == 0
+
+    @pytest.mark.asyncio
+    async def test_crashed_worker_recycles_pool(self, make_engine):
+        """Test a dead worker gets the pool restarted for the next job."""
+        engine = make_engine(max_workers=1, queue_size=4, job_timeout=30)
+
+        with pytest.raises(BrokenProcessPool):
+            await engine.run(os._exit, 1)
+
+        assert await engine.run(time.sleep, 0) is None
+        assert engine.stats()["pool_restarts"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_thread_fallback_raises_extraction_timeout(self, make_engine, monkeypatch):
+        """Test the daemon-process fallback reports timeouts like the pool does."""
+        monkeypatch.setattr(
+            engine_module.multiprocessing, "current_process", lambda: SimpleNamespace(daemon=True)
+        )
+        engine = make_engine(max_workers=1, queue_size=4, job_timeout=30)
+
+        with pytest.raises(ExtractionTimeoutError):
+            await engine.run(time.sleep, 1, timeout=0.1)
+
+        assert engine.stats()["timed_out"] == 1
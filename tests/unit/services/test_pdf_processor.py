@@ -0,0 +1,237 @@
+"""
+Unit tests for PDF download and extraction orchestration.
+"""
+import asyncio
+import hashlib
+import os
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.pdf_extraction_engine import extraction_engine
+from app.services import pdf_processor as pdf_processor_module
+from app.services.pdf_processor import PDFProcessor, SpooledPDF, PDFTooLargeError
+from app.services.pdf_store import PDFBlobStore
+
+
+def page_text(page_num: int, words: int = 60) -> str:
+    """Readable text for a generated page, tagged with its page number."""
+    return f"Page{page_num} " + " ".join(f"word{page_num}x{i}" for i in range(words))
+
+
+def make_processor(handler) -> PDFProcessor:
+    """Build a processor whose HTTP client is served by `handler`."""
+    processor = PDFProcessor()
+    processor.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return processor
+
+
+async def chunked(data: bytes, sent: list, size: int = 1000):
+    """Yield a body in chunks, so no Content-Length is sent."""
+    for start in range(0, len(data), size):
+        sent.append(start)
+        yield data[start:start + size]
+
+
+class TestSpooledPDF:
+    """Test the spool holding downloaded PDFs."""
+
+    def test_small_content_stays_in_memory(self):
+        """Test content under the memory limit is kept as bytes."""
+        spool = SpooledPDF(max_size=10_000, max_memory_size=5_000)
+        spool.write(b"a" * 1000)
+        spool.finish()
+
+        assert spool.path is None
+        assert spool.source == b"a" * 1000
+        assert spool.sha256 == hashlib.sha256(b"a" * 1000).hexdigest()
+
+    def test_rolls_over_to_disk(self, tmp_path, monkeypatch):
+        """Test content past the memory limit moves to a temp file."""
+        monkeypatch.setattr(settings, "pdf_spool_dir", str(tmp_path))
+        spool = SpooledPDF(max_size=10_000, max_memory_size=1_500)
+
+        for _ in range(3):
+            spool.write(b"b" * 1000)
+        spool.finish()
+
+        try:
+            assert spool.source == spool.path
+            with open(spool.path, "rb") as spooled:
+                assert spooled.read() == b"b" * 3000
+        finally:
+            spool.cleanup()
+
+        assert not os.listdir(tmp_path)
+
+    def test_write_past_size_cap_raises(self):
+        """Test writing stops as soon as the size cap is crossed."""
+        spool = SpooledPDF(max_size=2_500, max_memory_size=10_000)
+        spool.write(b"c" * 1000)
+        spool.write(b"c" * 1000)
+
+        with pytest.raises(PDFTooLargeError):
+            spool.write(b"c" * 1000)
+
+
+class TestDownloadPDF:
+    """Test streamed downloads enforce the size cap."""
+
+    @pytest.mark.asyncio
+    async def test_downloads_into_spool(self, monkeypatch):
+        """Test a normal download is spooled and hashed."""
+        monkeypatch.setattr(settings, "upload_max_size", 10_000)
+        data = os.urandom(5_000)
+        processor = make_processor(
+            lambda request: httpx.Response(200, content=data, headers={"content-type": "application/pdf"})
+        )
+
+        spool = await processor._download_pdf("https://example.org/paper.pdf")
+
+        try:
+            assert spool.size == len(data)
+            assert spool.sha256 == hashlib.sha256(data).hexdigest()
+        finally:
+            spool.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_rejects_declared_oversized_body(self, monkeypatch):
+        """Test a Content-Length over the cap is refused before reading the body."""
+        monkeypatch.setattr(settings, "upload_max_size", 1_000)
+        processor = make_processor(lambda request: httpx.Response(200, content=b"x" * 5_000))
+
+        assert await processor._download_pdf("https://example.org/paper.pdf") is None
+
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_stream(self, monkeypatch):
+        """Test a body without Content-Length is cut off mid-stream."""
+        monkeypatch.setattr(settings, "upload_max_size", 2_500)
+        monkeypatch.setattr(settings, "pdf_download_chunk_size", 1_000)
+        sent = []
+        processor = make_processor(lambda request: httpx.Response(200, content=chunked(b"x" * 10_000, sent)))
+
+        assert await processor._download_pdf("https://example.org/paper.pdf") is None
+        assert len(sent) == 3
+
+
+class TestParallelExtraction:
+    """Test page ranges extracted in separate jobs are merged in page order."""
+
+    @pytest.fixture
+    def inline_engine(self, monkeypatch):
+        """Run extraction jobs inline, finishing earlier page ranges last."""
+        submitted = []
+
+        async def run(func, *args, timeout=None):
+            start = args[2]
+            submitted.append(start)
+            await asyncio.sleep(0.01 * (10 - start))
+            return func(*args)
+
+        monkeypatch.setattr(extraction_engine, "run", run)
+        monkeypatch.setattr(extraction_engine, "max_workers", 2)
+        monkeypatch.setattr(settings, "pdf_parallel_pages_per_job", 2)
+        return submitted
+
+    @pytest.mark.asyncio
+    async def test_merges_ranges_in_page_order(self, make_pdf, inline_engine, monkeypatch):
+        """Test ranges finishing out of order still produce ordered text."""
+        monkeypatch.setattr(settings, "pdf_max_text_length", 100_000)
+        path = make_pdf([page_text(page) for page in range(1, 7)])
+
+        result = await PDFProcessor()._extract_text_pages_parallel(path, 6)
+
+        positions = [result["text"].index(f"--- Page {page} ---") for page in range(1, 7)]
+        assert positions == sorted(positions)
+        assert "Page1 word1x0" in result["text"]
+        assert result["pages_read"] == 6
+        assert result["pages_skipped"] == 0
+        assert inline_engine == [0, 2, 4]
+
+    @pytest.mark.asyncio
+    async def test_stops_submitting_once_budget_is_reached(self, make_pdf, inline_engine, monkeypatch):
+        """Test no further ranges start after the first range fills the budget."""
+        monkeypatch.setattr(settings, "pdf_max_text_length", 100)
+        path = make_pdf([page_text(page) for page in range(1, 7)])
+
+        result = await PDFProcessor()._extract_text_pages_parallel(path, 6)
+
+        assert "--- Page 1 ---" in result["text"]
+        assert "--- Page 3 ---" not in result["text"]
+        assert inline_engine == [0, 2]
+        assert result["pages_read"] == 1
+        assert result["pages_skipped"] == 5
+
+
+class TestExtractionBudget:
+    """Test extraction keeps more text than a single AI prompt takes."""
+
+    @pytest.mark.asyncio
+    async def test_extracts_past_prompt_limit(self, make_pdf, monkeypatch):
+        """Test the last pages survive when the paper is longer than max_paper_length."""
+        async def run(func, *args, timeout=None):
+            return func(*args)
+
+        monkeypatch.setattr(extraction_engine, "run", run)
+        monkeypatch.setattr(settings, "max_paper_length", 500)
+        monkeypatch.setattr(settings, "pdf_max_text_length", 100_000)
+        with open(make_pdf([page_text(page) for page in range(1, 6)]), "rb") as pdf_file:
+            source = pdf_file.read()
+
+        result = await PDFProcessor()._extract_text_from_source(source)
+
+        assert "word5x59" in result["text"]
+        assert result["pages_skipped"] == 0
+
+
+class TestURLRevalidation:
+    """Test stored extractions are only reused while their URL serves the same content."""
+
+    URL = "https://example.org/paper.pdf"
+
+    @pytest.fixture
+    def store(self, tmp_path, monkeypatch):
+        """Store holding an extraction for a URL checked longer ago than the TTL."""
+        store = PDFBlobStore(root=str(tmp_path), url_ttl=0)
+        store.put_extraction("a" * 64, {"text": "stored", "metadata": {}})
+        store.record_url(self.URL, "a" * 64, etag='"v1"')
+        monkeypatch.setattr(pdf_processor_module, "pdf_store", store)
+        return store
+
+    @pytest.mark.asyncio
+    async def test_not_modified_reuses_extraction(self, store):
+        """Test a 304 to the conditional HEAD serves the stored extraction without a download."""
+        requests = []
+
+        def handler(request):
+            requests.append((request.method, request.headers.get("if-none-match")))
+            return httpx.Response(304)
+
+        result = await make_processor(handler).process_pdf_from_url(self.URL)
+
+        assert result["text"] == "stored"
+        assert requests == [("HEAD", '"v1"')]
+
+    @pytest.mark.asyncio
+    async def test_changed_content_is_downloaded(self, store, make_pdf, monkeypatch):
+        """Test new content at a known URL is downloaded and recorded with its validators."""
+        async def run(func, *args, timeout=None):
+            return func(*args)
+
+        monkeypatch.setattr(extraction_engine, "run", run)
+        with open(make_pdf([page_text(1)]), "rb") as pdf_file:
+            data = pdf_file.read()
+
+        def handler(request):
+            headers = {"content-type": "application/pdf", "etag": '"v2"'}
+            if request.method == "HEAD":
+                return httpx.Response(200, headers=headers)
+            return httpx.Response(200, content=data, headers=headers)
+
+        result = await make_processor(handler).process_pdf_from_url(self.URL)
+
+        assert "word1x0" in result["text"]
+        entry = store.lookup_url(self.URL)
+        assert entry["content_hash"] == hashlib.sha256(data).hexdigest()
+        assert entry["etag"] == '"v2"'
@@ -0,0 +1,238 @@
+"""
+Unit tests for the range-request PDF reader.
+"""
+import os
+import re
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fitz
+import httpx
+import pytest
+
+from app.services import pdf_workers
+from app.services.pdf_processor import PDFProcessor
+from app.services import pdf_range_reader
+from app.services.pdf_range_reader import (
+    PDFRangeReader, PDFStream, RangeNotSupportedError, UnusableXrefError, RangeBudgetExceededError, decode_stream
+)
+from app.services.pdf_store import pdf_store
+
+
+TITLE = "Attention Is All You Need"
+PAGE_COUNT = 40
+
+
+def build_pdf(object_streams: bool = False) -> bytes:
+    """Build a multi-page paper with a title in the info dictionary."""
+
+    document = fitz.open()
+    for page_num in range(PAGE_COUNT):
+        page = document.new_page()
+        page.insert_text((72, 72), f"Page {page_num + 1} heading")
+        for line in range(40):
+            page.insert_text((72, 100 + line * 16), f"Body line {line} of page {page_num + 1} with some words")
+
+    # Links point at other pages, which must not be fetched
+    document[0].insert_link({"kind": fitz.LINK_GOTO, "from": fitz.Rect(72, 60, 200, 80), "page": 5})
+    document.set_metadata({"title": TITLE, "author": "Vaswani"})
+
+    data = document.tobytes(garbage=1, use_objstms=1 if object_streams else 0)
+    document.close()
+    return data
+
+
+class PDFServer:
+    """Local HTTP stand-in serving fixture PDFs, with or without range support."""
+
+    def __init__(self):
+        """Start server on a free port."""
+        self.files = {}
+        self.bytes_served = 0
+        self.ranges_enabled = True
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                data = server.files[self.path]
+                byte_range = self.headers.get("Range")
+
+                if not server.ranges_enabled or not byte_range:
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    server.bytes_served += len(data)
+                    self.wfile.write(data)
+                    return
+
+                suffix = re.match(r"bytes=-(\d+)", byte_range)
+                if suffix:
+                    start, end = max(0, len(data) - int(suffix.group(1))), len(data) - 1
+                else:
+                    start, end = map(int, re.match(r"bytes=(\d+)-(\d+)", byte_range).groups())
+                    end = min(end, len(data) - 1)
+
+                body = data[start:end + 1]
+                self.send_response(206)
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                server.bytes_served += len(body)
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, path: str) -> str:
+        """Get URL of a served file."""
+        return f"http://127.0.0.1:{self.httpd.server_port}{path}"
+
+    def close(self):
+        """Stop server."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture(scope="module")
+def fixture_pdfs():
+    """Build fixture PDFs once per module."""
+    classic = build_pdf()
+    return {
+        "/classic.pdf": classic,
+        "/objstm.pdf": build_pdf(object_streams=True),
+        "/broken.pdf": re.sub(rb"startxref\s+\d+", b"startxref\n999999999", classic)
+    }
+
+
+@pytest.fixture
+def pdf_server(fixture_pdfs):
+    """Serve fixture PDFs."""
+    server = PDFServer()
+    server.files.update(fixture_pdfs)
+    yield server
+    server.close()
+
+
+class TestPDFRangeReader:
+    """Test first page extraction over range requests."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("path", ["/classic.pdf", "/objstm.pdf"])
+    async def test_reads_first_page_with_partial_download(self, pdf_server, path):
+        """Test title, page count and first page come from a fraction of the file."""
+        async with httpx.AsyncClient() as client:
+            reader = PDFRangeReader(client, pdf_server.url(path), tail_size=1024, max_bytes=1024 * 1024)
+            first_page = await reader.fetch_first_page()
+
+        try:
+            raw = pdf_workers.extract_metadata(first_page.path)
+        finally:
+            os.unlink(first_page.path)
+
+        assert not raw["repaired"]
+        assert raw["metadata"]["title"] == TITLE
+        assert raw["page_count"] == 1
+        assert "Page 1 heading" in raw["first_page_text"]
+        assert "Page 2 heading" not in raw["first_page_text"]
+        assert first_page.page_count == PAGE_COUNT
+        assert first_page.bytes_fetched == pdf_server.bytes_served
+        assert first_page.bytes_fetched < len(pdf_server.files[path]) / 4
+
+    @pytest.mark.asyncio
+    async def test_rejects_server_without_ranges(self, pdf_server):
+        """Test a 200 response is abandoned without reading the body."""
+        pdf_server.ranges_enabled = False
+
+        async with httpx.AsyncClient() as client:
+            reader = PDFRangeReader(client, pdf_server.url("/classic.pdf"), tail_size=1024)
+            with pytest.raises(RangeNotSupportedError):
+                await reader.fetch_first_page()
+
+        assert reader.bytes_fetched == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_unusable_xref(self, pdf_server):
+        """Test a startxref pointing outside the file is reported."""
+        async with httpx.AsyncClient() as client:
+            reader = PDFRangeReader(client, pdf_server.url("/broken.pdf"), tail_size=1024)
+            with pytest.raises(UnusableXrefError):
+                await reader.fetch_first_page()
+
+    @pytest.mark.asyncio
+    async def test_stops_at_byte_budget(self, pdf_server):
+        """Test fetching stops once the byte budget is spent."""
+        async with httpx.AsyncClient() as client:
+            reader = PDFRangeReader(client, pdf_server.url("/classic.pdf"), tail_size=1024, max_bytes=2048)
+            with pytest.raises(RangeBudgetExceededError):
+                await reader.fetch_first_page()
+
+        assert reader.bytes_fetched <= 2048
+
+
+class TestDecodeStream:
+    """Test Flate stream decoding limits."""
+
+    def test_decodes_flate_stream(self):
+        """Test a compressed stream decodes to its content."""
+        stream = PDFStream({"Filter": "FlateDecode"}, zlib.compress(b"1 0 2 0"))
+
+        assert decode_stream(stream) == b"1 0 2 0"
+
+    def test_rejects_stream_over_decoded_limit(self, monkeypatch):
+        """Test a small stream that inflates past the limit is refused instead of decoded."""
+        monkeypatch.setattr(pdf_range_reader, "MAX_DECODED_BYTES", 1024)
+        stream = PDFStream({"Filter": "FlateDecode"}, zlib.compress(b"\0" * 1_000_000))
+
+        with pytest.raises(UnusableXrefError):
+            decode_stream(stream)
+
+    def test_rejects_corrupt_stream(self):
+        """Test undecodable data is reported as unusable."""
+        with pytest.raises(UnusableXrefError):
+            decode_stream(PDFStream({"Filter": "FlateDecode"}, b"not deflate"))
+
+
+class TestMetadataFastPath:
+    """Test PDF processor metadata extraction over range requests."""
+
+    @pytest.fixture
+    def processor(self, monkeypatch):
+        """Processor with no stored extractions and a recorded full download."""
+        processor = PDFProcessor()
+        processor.downloads = []
+
+        async def process_pdf_from_url(pdf_url):
+            processor.downloads.append(pdf_url)
+            return {"metadata": {"title": "Downloaded"}}
+
+        monkeypatch.setattr(pdf_store, "lookup_url", lambda url: None)
+        monkeypatch.setattr(processor, "process_pdf_from_url", process_pdf_from_url)
+        return processor
+
+    @pytest.mark.asyncio
+    async def test_uses_ranges(self, pdf_server, processor):
+        """Test metadata comes from the first page without a download."""
+        metadata = await processor.extract_metadata_from_url(pdf_server.url("/classic.pdf"))
+
+        assert "page 1" in metadata["title"]
+        assert metadata["page_count"] == PAGE_COUNT
+        assert processor.downloads == []
+        assert pdf_server.bytes_served < len(pdf_server.files["/classic.pdf"])
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("path,ranges_enabled", [("/classic.pdf", False), ("/broken.pdf", True)])
+    async def test_falls_back_to_download(self, pdf_server, processor, path, ranges_enabled):
+        """Test full download is used when ranges are unsupported or the xref is unusable."""
+        pdf_server.ranges_enabled = ranges_enabled
+
+        metadata = await processor.extract_metadata_from_url(pdf_server.url(path))
+
+        assert metadata == {"title": "Downloaded"}
+        assert processor.downloads == [pdf_server.url(path)]
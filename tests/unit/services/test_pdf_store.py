@@ -0,0 +1,167 @@
+"""
+Unit tests for the content-addressed PDF store.
+"""
+import os
+import time
+
+import pytest
+
+from app.services import pdf_store as pdf_store_module
+from app.services.pdf_store import PDFBlobStore
+
+
+def content_hash(n: int) -> str:
+    """Fake SHA-256 hex digest for entry `n`."""
+    return f"{n:02d}" + "a" * 62
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Store in a temp directory with room for about three 1KB entries."""
+    return PDFBlobStore(root=str(tmp_path), max_bytes=3_500, pending_ttl=3_600)
+
+
+def age(store: PDFBlobStore, n: int, seconds: float) -> None:
+    """Make entry `n` look last used `seconds` ago."""
+    past = time.time() - seconds
+    os.utime(store._entry_dir(content_hash(n)), (past, past))
+
+
+class TestExtractionCache:
+    """Test cached extraction results."""
+
+    def test_hit_and_miss(self, store):
+        """Test stored results are returned and unknown hashes miss."""
+        store.put_extraction(content_hash(1), {"text": "hello"})
+
+        assert store.get_extraction(content_hash(1)) == {"text": "hello"}
+        assert store.get_extraction(content_hash(2)) is None
+
+        stats = store.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_version_bump_invalidates(self, store, monkeypatch):
+        """Test results written by an older extraction version are ignored."""
+        store.put_extraction(content_hash(1), {"text": "hello"})
+        monkeypatch.setattr(pdf_store_module, "EXTRACTION_VERSION", pdf_store_module.EXTRACTION_VERSION + 1)
+
+        assert store.get_extraction(content_hash(1)) is None
+
+    def test_put_blob_moves_file_into_place(self, store, tmp_path):
+        """Test a spooled temp file is moved rather than copied."""
+        spooled = tmp_path / "upload.pdf"
+        spooled.write_bytes(b"%PDF-1.4")
+
+        path = store.put_blob(content_hash(1), str(spooled))
+
+        assert store.blob_path(content_hash(1)) == path
+        assert not spooled.exists()
+
+
+class TestEviction:
+    """Test size-based LRU eviction."""
+
+    def test_evicts_least_recently_used(self, store):
+        """Test the oldest processed entries go first."""
+        for n in range(3):
+            store.put_blob(content_hash(n), b"x" * 1_000)
+            store.put_extraction(content_hash(n), {"text": "t"})
+            age(store, n, 100 - n)
+
+        store.put_blob(content_hash(3), b"x" * 1_000)
+        store.put_extraction(content_hash(3), {"text": "t"})
+
+        assert store.blob_path(content_hash(0)) is None
+        assert store.blob_path(content_hash(1)) is not None
+        assert store.blob_path(content_hash(3)) is not None
+        assert store.stats()["evictions"] == 1
+
+    def test_pending_blobs_are_pinned(self, store):
+        """Test blobs still waiting for extraction survive, even when oldest."""
+        store.put_blob(content_hash(0), b"x" * 1_000)
+        age(store, 0, 1_000)
+
+        for n in range(1, 4):
+            store.put_blob(content_hash(n), b"x" * 1_000)
+            store.put_extraction(content_hash(n), {"text": "t"})
+
+        assert store.blob_path(content_hash(0)) is not None
+        assert store.stats()["evictions"] == 1
+
+    def test_stale_pending_blobs_are_evicted(self, store):
+        """Test blobs whose extraction never succeeded are released after the TTL."""
+        store.put_blob(content_hash(0), b"x" * 1_000)
+        age(store, 0, 7_200)
+
+        for n in range(1, 4):
+            store.put_blob(content_hash(n), b"x" * 1_000)
+            store.put_extraction(content_hash(n), {"text": "t"})
+
+        assert store.blob_path(content_hash(0)) is None
+        assert all(store.blob_path(content_hash(n)) for n in range(1, 4))
+
+    def test_store_is_scanned_only_over_limit(self, store, monkeypatch):
+        """Test writes under the limit use the running size total instead of a scan."""
+        scans = []
+        scan_entries = store._scan_entries
+
+        def spy():
+            scans.append(True)
+            return scan_entries()
+
+        monkeypatch.setattr(store, "_scan_entries", spy)
+
+        for n in range(3):
+            store.put_blob(content_hash(n), b"x" * 1_000)
+            store.put_extraction(content_hash(n), {"text": "t"})
+
+        assert len(scans) == 1
+
+        store.put_blob(content_hash(3), b"x" * 1_000)
+        store.put_extraction(content_hash(3), {"text": "t"})
+
+        assert len(scans) == 2
+        assert store.stats()["evictions"] == 1
+
+
+class TestURLIndex:
+    """Test the URL index and its revalidation window."""
+
+    def test_recorded_url_is_fresh_until_ttl(self, store):
+        """Test a URL entry keeps its validators and goes stale after the TTL."""
+        store.record_url("https://example.org/paper.pdf", content_hash(1), etag='"v1"')
+
+        entry = store.lookup_url("https://example.org/paper.pdf")
+        assert entry["content_hash"] == content_hash(1)
+        assert entry["etag"] == '"v1"'
+        assert entry["fresh"]
+
+        store.url_ttl = 0
+        assert not store.lookup_url("https://example.org/paper.pdf")["fresh"]
+
+    def test_bare_hash_entries_need_revalidation(self, store):
+        """Test entries written before validators were kept are read as stale."""
+        path = store._url_path("https://example.org/paper.pdf")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "w") as f:
+            f.write(content_hash(1))
+
+        entry = store.lookup_url("https://example.org/paper.pdf")
+
+        assert entry["content_hash"] == content_hash(1)
+        assert not entry["fresh"]
+
+    def test_evict_removes_urls_of_evicted_content(self, store):
+        """Test URL entries go once the content they point to has been evicted."""
+        for n in range(3):
+            store.put_blob(content_hash(n), b"x" * 1_000)
+            store.put_extraction(content_hash(n), {"text": "t"})
+            store.record_url(f"https://example.org/{n}.pdf", content_hash(n))
+            age(store, n, 100 - n)
+
+        store.put_blob(content_hash(3), b"x" * 1_000)
+        store.put_extraction(content_hash(3), {"text": "t"})
+
+        assert store.lookup_url("https://example.org/0.pdf") is None
+        assert store.lookup_url("https://example.org/2.pdf") is not None
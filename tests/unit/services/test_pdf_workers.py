@@ -0,0 +1,176 @@
+"""
+Unit tests for the PDF parsing functions run in extraction workers.
+"""
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import pdf_workers
+from app.services.pdf_workers import collect_pages, page_quality, PAGE_QUALITY_THRESHOLD
+
+
+def page_text(page_num: int, words: int = 60) -> str:
+    """Readable text for a generated page, tagged with its page number."""
+    return f"Page{page_num} " + " ".join(f"word{page_num}x{i}" for i in range(words))
+
+
+class TestCollectPages:
+    """Test pages are joined until the character budget is reached."""
+
+    def test_joins_all_pages_under_budget(self):
+        """Test every page is kept with its marker when the budget allows."""
+        pages = [(1, "first page"), (2, "second page")]
+
+        result = collect_pages(iter(pages), 2, 10_000)
+
+        assert result["text"] == "--- Page 1 ---\nfirst page\n\n--- Page 2 ---\nsecond page"
+        assert result["pages_read"] == 2
+        assert result["pages_skipped"] == 0
+
+    def test_stops_reading_at_budget(self):
+        """Test pages past the budget are never pulled from the iterator."""
+        pulled = []
+
+        def pages():
+            for page_num in range(1, 11):
+                pulled.append(page_num)
+                yield page_num, "x " * 50
+
+        result = collect_pages(pages(), 10, 250)
+
+        assert pulled == [1, 2, 3]
+        assert result["pages_read"] == 3
+        assert result["pages_skipped"] == 7
+        assert result["length"] >= 250
+
+    def test_blank_pages_count_as_read(self):
+        """Test empty pages are skipped in the text but still counted."""
+        result = collect_pages(iter([(1, ""), (2, None), (3, "text")]), 3, 10_000)
+
+        assert result["text"] == "--- Page 3 ---\ntext"
+        assert result["pages_read"] == 3
+
+    def test_no_text_returns_none(self):
+        """Test a document without text yields no text rather than an empty string."""
+        result = collect_pages(iter([(1, "  ")]), 1, 10_000)
+
+        assert result["text"] is None
+        assert result["length"] == 0
+
+
+class TestExtractText:
+    """Test text extraction from generated PDFs."""
+
+    def test_extraction_stops_at_budget(self, make_pdf):
+        """Test a small budget leaves the remaining pages unopened."""
+        path = make_pdf([page_text(page) for page in range(1, 6)])
+
+        result = pdf_workers.extract_text(path, 100)
+
+        assert "Page1 word1x0" in result["text"]
+        assert "Page2" not in result["text"]
+        assert result["pages_read"] == 1
+        assert result["pages_skipped"] == 4
+
+    def test_extracts_page_range(self, make_pdf):
+        """Test only the requested pages are read."""
+        path = make_pdf([page_text(page) for page in range(1, 6)])
+
+        result = pdf_workers.extract_text(path, 100_000, 1, 3)
+
+        assert "--- Page 2 ---" in result["text"]
+        assert "--- Page 3 ---" in result["text"]
+        assert "Page1 " not in result["text"]
+        assert "Page4 " not in result["text"]
+        assert result["pages_read"] == 2
+        assert result["pages_skipped"] == 0
+
+
+class TestPageQuality:
+    """Test the page text quality probe."""
+
+    def test_empty_text_scores_zero(self):
+        """Test pages without text are unusable."""
+        assert page_quality("") == 0.0
+
+    def test_readable_text_scores_full(self):
+        """Test ordinary prose passes the probe."""
+        assert page_quality(page_text(1)) == 1.0
+
+    def test_short_text_scores_low(self):
+        """Test a page with a few characters looks like a scan."""
+        assert page_quality("Figure 3") < PAGE_QUALITY_THRESHOLD
+
+    def test_garbage_glyphs_score_low(self):
+        """Test replacement characters from broken font encodings fail the probe."""
+        text = page_text(1)
+        garbled = "".join(char if i % 8 else "\ufffd" for i, char in enumerate(text))
+
+        assert page_quality(garbled) < PAGE_QUALITY_THRESHOLD
+
+    def test_glued_words_score_low(self):
+        """Test text with almost no whitespace fails the probe."""
+        assert page_quality(page_text(1).replace(" ", "")) < PAGE_QUALITY_THRESHOLD
+
+
+class TestPagePatching:
+    """Test pages PyMuPDF reads badly are patched with PyPDF2 text."""
+
+    @pytest.fixture
+    def fake_pypdf2(self, monkeypatch):
+        """Replace PyPDF2 with a reader returning good text for every page."""
+        opened = []
+
+        @contextmanager
+        def open_reader(source):
+            opened.append(source)
+            pages = [
+                SimpleNamespace(extract_text=lambda page_num=page_num: page_text(page_num + 1, 80))
+                for page_num in range(3)
+            ]
+            yield SimpleNamespace(pages=pages)
+
+        monkeypatch.setattr(pdf_workers, "_open_pypdf2", open_reader)
+        return opened
+
+    @pytest.fixture
+    def scanned_pdf(self, make_pdf):
+        """PDF whose second page only carries a caption."""
+        return make_pdf([page_text(1), "Figure 2", page_text(3)])
+
+    def test_patches_low_quality_page(self, scanned_pdf, fake_pypdf2):
+        """Test only the failing page is re-read and recorded in the plan."""
+        result = pdf_workers.extract_text(scanned_pdf, 100_000)
+
+        assert result["page_plan"] == {"2": pdf_workers.PYPDF2}
+        assert result["pages_patched"] == 1
+        assert "word2x79" in result["text"]
+        assert "Page1 word1x0" in result["text"]
+        assert "Figure 2" not in result["text"]
+        assert len(fake_pypdf2) == 1
+
+    def test_plan_skips_probing(self, scanned_pdf, fake_pypdf2, monkeypatch):
+        """Test a stored plan sends planned pages straight to their extractor."""
+        probed = []
+
+        def spy(text):
+            probed.append(text)
+            return page_quality(text)
+
+        monkeypatch.setattr(pdf_workers, "page_quality", spy)
+
+        result = pdf_workers.extract_text(scanned_pdf, 100_000, page_plan={"2": pdf_workers.PYPDF2})
+
+        assert result["pages_patched"] == 1
+        assert "word2x79" in result["text"]
+        assert not any("Figure 2" in text for text in probed)
+        assert len(probed) == 2
+
+    def test_plan_keeps_pymupdf_pages(self, scanned_pdf, fake_pypdf2):
+        """Test pages planned for PyMuPDF are never re-read, even when they look poor."""
+        result = pdf_workers.extract_text(scanned_pdf, 100_000, page_plan={"2": pdf_workers.PYMUPDF})
+
+        assert result["pages_patched"] == 0
+        assert "Figure 2" in result["text"]
+        assert fake_pypdf2 == []
@@ -0,0 +1,104 @@
+"""
+Unit tests for the paper section index.
+"""
+import pytest
+
+from app.services.section_index import build_section_index, select_sections, classify_section
+
+
+PAPER_TEXT = """--- Page 1 ---
+Sparse Attention for Long Documents
+Jane Doe, John Smith
+Abstract— We propose a sparse attention scheme.
+It scales linearly.
+1 Introduction
+Long documents are hard.
+
+--- Page 2 ---
+2. Related Work
+Prior work uses dense attention.
+3 Our Approach
+We restrict attention to local windows.
+3.1 Data
+We use arXiv papers.
+3.2 Training Details
+We train for ten epochs.
+
+--- Page 3 ---
+4 Experiments
+Accuracy improves by four points.
+5 Conclusion
+Sparse attention works.
+Limitations
+Only English text was tested.
+References
+[1] Vaswani et al."""
+
+
+class TestSectionIndex:
+    """Test section index construction and selection."""
+
+    def test_builds_sections_with_offsets_and_pages(self):
+        """Test sections are found with exact offsets and page ranges."""
+        index = build_section_index(PAPER_TEXT)
+
+        assert [section["kind"] for section in index] == [
+            "front_matter", "abstract", "introduction", "background", "methods",
+            "methods", "methods", "results", "conclusion", "limitations", "references"
+        ]
+
+        for section, following in zip(index, index[1:]):
+            assert section["end"] == following["start"]
+            assert PAPER_TEXT[following["start"]:].startswith(following["name"].split("—")[0])
+
+        introduction = index[2]
+        assert introduction["page_start"] == 1
+        assert introduction["page_end"] == 1
+
+        training = index[6]
+        assert training["name"] == "3.2 Training Details"
+        assert training["level"] == 2
+        assert (training["page_start"], training["page_end"]) == (2, 2)
+
+    def test_subsections_inherit_parent_kind(self):
+        """Test unnamed numbered subsections take their parent's kind."""
+        index = build_section_index("1 Introduction\nText\n2 Methods\nText\n2.1 Corpus\nText\n3 Widgets\nText")
+
+        assert [section["kind"] for section in index] == ["introduction", "methods", "methods", "body"]
+
+    def test_ignores_body_lines(self):
+        """Test sentences mentioning section words are not headers."""
+        index = build_section_index("1 Introduction\nthe model we propose\nOur results show gains.\n2 models were trained")
+
+        assert len(index) == 1
+
+    def test_selects_sections_in_order(self):
+        """Test selection joins the requested sections only."""
+        index = build_section_index(PAPER_TEXT)
+
+        methods = select_sections(PAPER_TEXT, index, ["methods"], 10_000)
+        assert methods.startswith("3 Our Approach")
+        assert "We train for ten epochs." in methods
+        assert "Accuracy" not in methods
+
+        limitations = select_sections(PAPER_TEXT, index, ["conclusion", "limitations"], 10_000)
+        assert limitations.index("Sparse attention works.") < limitations.index("Only English")
+
+    def test_selection_respects_budget(self):
+        """Test selected text is capped and missing kinds yield None."""
+        index = build_section_index(PAPER_TEXT)
+
+        assert len(select_sections(PAPER_TEXT, index, ["methods"], 40)) <= 40
+        assert select_sections(PAPER_TEXT, index, ["appendix"], 1000) is None
+        assert build_section_index("") == []
+
+    @pytest.mark.parametrize("name,kind", [
+        ("Methodology", "methods"),
+        ("Experimental Results", "results"),
+        ("Conclusions and Future Work", "conclusion"),
+        ("Threats to Validity", "limitations"),
+        ("Widgets", None),
+    ])
+    def test_classifies_section_names(self, name, kind):
+        """Test header names map to section kinds."""
+        assert classify_section(name) == kind
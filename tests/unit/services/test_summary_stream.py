@@ -0,0 +1,256 @@
+"""
+Unit tests for streaming summaries and shared stream generations.
+"""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import summary_stream
+from app.services.ai_service import AIService
+from app.services.llm_providers import FakeChatProvider
+from app.services.summary_stream import StreamHub
+
+
+def counting_generation(calls, count=3, delay=0.02, fail=False):
+    """Generation factory yielding numbered token events slowly."""
+    def generate():
+        async def events():
+            calls.append(1)
+            for number in range(count):
+                await asyncio.sleep(delay)
+                yield {"event": "token", "data": {"text": str(number)}}
+            if fail:
+                raise RuntimeError("provider down")
+        return events()
+    return generate
+
+
+async def collect(stream):
+    """Gather a subscriber's events."""
+    return [event async for event in stream]
+
+
+class TestStreamHub:
+    """Test generations shared between viewers."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_viewers_share_one_generation(self):
+        """Test viewers of the same key get the same events from a single generation."""
+        hub = StreamHub()
+        calls = []
+
+        first, second = await asyncio.gather(
+            collect(hub.subscribe("paper-1", counting_generation(calls))),
+            collect(hub.subscribe("paper-1", counting_generation(calls)))
+        )
+
+        assert len(calls) == 1
+        assert first == second
+        assert [event["event"] for event in first] == ["token", "token", "token", "done"]
+        assert hub.stats()["attached"] == 1
+
+    @pytest.mark.asyncio
+    async def test_late_viewer_replays_earlier_events(self):
+        """Test a viewer joining mid-generation still receives every event."""
+        hub = StreamHub()
+        calls = []
+
+        first = asyncio.ensure_future(collect(hub.subscribe("paper-1", counting_generation(calls, count=5))))
+        await asyncio.sleep(0.05)
+        late = await collect(hub.subscribe("paper-1", counting_generation(calls)))
+
+        assert len(calls) == 1
+        assert late == await first
+        assert len(late) == 6
+
+    @pytest.mark.asyncio
+    async def test_generation_outlives_disconnected_viewer(self):
+        """Test the generation finishes after its only viewer leaves."""
+        hub = StreamHub()
+        calls = []
+
+        stream = hub.subscribe("paper-1", counting_generation(calls))
+        await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0.1)
+
+        assert hub.stats()["active"] == 0
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_failure_ends_with_error_and_next_viewer_restarts(self):
+        """Test a failed generation sends an error event and is not reused."""
+        hub = StreamHub()
+        calls = []
+
+        events = await collect(hub.subscribe("paper-1", counting_generation(calls, count=1, fail=True)))
+        await collect(hub.subscribe("paper-1", counting_generation(calls, count=1)))
+
+        assert events[-1] == {"event": "error", "data": {"detail": "Generation failed"}}
+        assert len(calls) == 2
+        assert hub.stats()["failed"] == 1
+
+
+class SharedRedis:
+    """In-memory stand-in for the Redis commands the hub uses, shared by several hubs."""
+
+    def __init__(self):
+        self.values = {}
+        self.streams = {}
+
+    async def eval(self, script, key_count, *args):
+        keys, argv = args[:key_count], args[key_count:]
+        if script == summary_stream.CLAIM_SCRIPT:
+            if keys[0] in self.values:
+                return 0
+            self.values[keys[0]] = argv[0]
+            self.streams.pop(keys[1], None)
+            return 1
+        if self.values.get(keys[0]) == argv[0]:
+            del self.values[keys[0]]
+            return 1
+        return 0
+
+    async def xread(self, streams, count=None, block=None):
+        (key, last_id), = streams.items()
+        for _ in range(block // 10):
+            entries = self.streams.get(key, [])
+            position = 0 if last_id == "0-0" else int(last_id.split("-")[0])
+            if position < len(entries):
+                return [(key, entries[position:position + count])]
+            await asyncio.sleep(0.01)
+        return []
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+    async def expire(self, key, seconds):
+        return True
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.commands = []
+
+            def xadd(self, key, fields):
+                self.commands.append((key, fields))
+
+            def expire(self, key, seconds):
+                pass
+
+            async def execute(self):
+                for key, fields in self.commands:
+                    entries = redis.streams.setdefault(key, [])
+                    entries.append((f"{len(entries) + 1}-0", fields))
+
+        return Pipeline()
+
+
+class TestSharedAcrossWorkers:
+    """Test generations shared between hubs of different workers through Redis."""
+
+    @pytest.fixture
+    def redis(self, monkeypatch):
+        """Enable sharing and point every hub at one shared fake Redis."""
+        monkeypatch.setattr(settings, "stream_sharing_enabled", True)
+        monkeypatch.setattr(summary_stream, "FOLLOW_BLOCK_MS", 100)
+        shared = SharedRedis()
+        monkeypatch.setattr(StreamHub, "_redis", lambda hub: shared)
+        return shared
+
+    @pytest.mark.asyncio
+    async def test_second_worker_follows_first(self, redis):
+        """Test a viewer on another worker replays and follows the running generation."""
+        owner, follower = StreamHub(), StreamHub()
+        calls = []
+
+        first = asyncio.ensure_future(collect(owner.subscribe("paper-1", counting_generation(calls))))
+        await asyncio.sleep(0.03)
+        second = await collect(follower.subscribe("paper-1", counting_generation(calls)))
+
+        assert len(calls) == 1
+        assert second == await first
+        assert [event["event"] for event in second] == ["token", "token", "token", "done"]
+        assert follower.stats()["followed"] == 1
+        assert redis.values == {}
+
+    @pytest.mark.asyncio
+    async def test_follower_gets_error_when_owner_fails(self, redis):
+        """Test a failure on the owning worker reaches viewers on other workers."""
+        owner, follower = StreamHub(), StreamHub()
+        calls = []
+
+        first = asyncio.ensure_future(collect(owner.subscribe("paper-1", counting_generation(calls, fail=True))))
+        await asyncio.sleep(0.01)
+        second = await collect(follower.subscribe("paper-1", counting_generation(calls)))
+
+        await first
+        assert second[-1] == {"event": "error", "data": {"detail": "Generation failed"}}
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_follower_gives_up_on_lost_owner(self, redis):
+        """Test followers stop waiting once the owner's lease expires without a final event."""
+        redis.values["summary_stream:paper-1:owner"] = "crashed-worker"
+        follower = StreamHub()
+        calls = []
+
+        following = asyncio.ensure_future(collect(follower.subscribe("paper-1", counting_generation(calls))))
+        await asyncio.sleep(0.05)
+        del redis.values["summary_stream:paper-1:owner"]
+        events = await following
+
+        assert events == [{"event": "error", "data": {"detail": "Generation failed"}}]
+        assert calls == []
+
+    @pytest.mark.asyncio
+    async def test_unreachable_redis_generates_locally(self, monkeypatch):
+        """Test viewers are still served by a local generation when Redis is down."""
+        monkeypatch.setattr(settings, "stream_sharing_enabled", True)
+        hub = StreamHub(redis_url="redis://127.0.0.1:1/0")
+        calls = []
+
+        events = await collect(hub.subscribe("paper-1", counting_generation(calls)))
+
+        assert events[-1] == {"event": "done", "data": {}}
+        assert len(calls) == 1
+        assert hub.stats()["followed"] == 0
+
+
+class TestStreamSummary:
+    """Test summary events from a streaming provider."""
+
+    @pytest.mark.asyncio
+    async def test_streams_sections_then_parsed_summary(self):
+        """Test sections arrive in order between tokens and the final summary is parsed from them."""
+        service = AIService()
+        service.register_provider("openai", FakeChatProvider(latency=0.0, distribution="fixed"))
+
+        events = [event async for event in service.stream_summary("content", "Test Paper", ["Author"])]
+
+        sections = [event["data"]["section"] for event in events if event["event"] == "section"]
+        tokens = "".join(event["data"]["text"] for event in events if event["event"] == "token")
+        summary = events[-1]["data"]
+
+        assert sections == [
+            "executive_summary", "key_findings", "methodology_overview",
+            "contributions", "limitations", "future_work", "scores"
+        ]
+        assert "#" not in tokens
+        assert events[-1]["event"] == "summary"
+        assert len(summary["key_findings"]) == 3
+        assert summary["contributions"][0]["type"] in ("theoretical", "empirical", "methodological")
+        assert 0.5 <= summary["confidence_score"] <= 1.0
+
+    def test_parses_summary_with_missing_sections(self):
+        """Test sections the model skipped are left empty."""
+        summary = AIService()._parse_sectioned_summary(
+            "## Executive Summary\nShort overview.\n\n## Key Findings\n1. First\n2. Second\n"
+        )
+
+        assert summary.executive_summary == "Short overview."
+        assert summary.key_findings == ["First", "Second"]
+        assert summary.limitations == [] and summary.confidence_score == 0.5
@@ -0,0 +1,61 @@
+"""
+Unit tests for the extracted text normalizer.
+"""
+import random
+
+import pytest
+
+from app.services.text_normalizer import normalize_text, legacy_clean_text
+
+
+# Golden corpus: raw extraction output shapes seen in academic PDFs
+GOLDEN_CORPUS = [
+    "",
+    "Abstract",
+    "   leading and trailing   \t ",
+    "Deep learn- ing models are widely used .\nWe evalu-  ate them , too !",
+    "Intro\n\n\n\n\nMethods\n \t \n \nResults",
+    "Results\n12\nPage 3\nVol. 2\nIV\nXII\nIVX chapter continues\nDiscussion",
+    "Some text\npage\n  42  \n\tVOL 7\t\nThe end",
+    "12\n13\nFirst real line\n\n14",
+    "Line one \n . starts with punctuation\nword\n\n\n, comma",
+    "Trailing non-breaking\xa0\nspace\r\nand carriage returns\r\n\x0c form feed",
+    "Unicode digits ٣٤\n٣٤\nand numerals Ⅳ stay",
+    "tab\tseparated\t\tcolumns\t\nhyphen\t-\tword co- \top",
+    "x- y- z- w , done ;\n-\n- \n -a\na-\n",
+    "--- Page 1 ---\nTitle of the paper\n\n--- Page 2 ---\n2\nBody text here .",
+]
+
+FUZZ_ALPHABET = [
+    "a", "Z", "1", "9", "-", "- ", " ", "  ", "\t", "\n", "\n\n", "\n \n",
+    ".", ",", "?", "page", "Page", "VOL", "IV", "X", "\r", "\xa0", "\x0c",
+    "é", "٣", "_", "Ⅳ", "İ", "12", "\n\t", " "
+]
+
+
+class TestTextNormalizer:
+    """Test single-pass normalizer against the legacy cleaner."""
+
+    @pytest.mark.parametrize("text", GOLDEN_CORPUS)
+    def test_matches_legacy_on_golden_corpus(self, text):
+        """Test output is identical to the legacy cleaner."""
+        assert normalize_text(text) == legacy_clean_text(text)
+
+    def test_matches_legacy_on_random_text(self):
+        """Test output is identical on generated whitespace-heavy text."""
+        rng = random.Random(1234)
+
+        for _ in range(5000):
+            text = "".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(0, 40)))
+            assert normalize_text(text) == legacy_clean_text(text), repr(text)
+
+    def test_normalizes_paper_text(self):
+        """Test the individual cleaning rules."""
+        raw = "Deep learn- ing  works .\n\n\n\n12\nPage 4\n  Next   line  "
+
+        assert normalize_text(raw) == "Deep learning works.\n\nNext line"
+
+    def test_none_passthrough(self):
+        """Test empty input is returned unchanged."""
+        assert normalize_text(None) is None
+        assert normalize_text("") == ""
@@ -0,0 +1,124 @@
+"""
+Unit tests for streamed PDF upload ingestion.
+"""
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.core.request_limits import UploadSizeLimitMiddleware, MULTIPART_OVERHEAD
+from app.services.pdf_processor import PDFProcessor, PDFTooLargeError
+
+
+class FakeUpload:
+    """Async file-like upload reading from bytes."""
+
+    def __init__(self, data: bytes):
+        """Initialize upload."""
+        self._file = io.BytesIO(data)
+        self.reads = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        """Read a chunk."""
+        self.reads += 1
+        return self._file.read(size)
+
+
+@pytest.fixture
+def upload_app():
+    """Minimal app with a size-limited upload endpoint."""
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_middleware(UploadSizeLimitMiddleware, max_size=1024, paths=["/upload"])
+    return app
+
+
+class TestSpoolUpload:
+    """Test uploads are spooled in chunks with an incremental hash."""
+
+    @pytest.mark.asyncio
+    async def test_spools_and_hashes(self, monkeypatch):
+        """Test content is hashed and rolled to disk past the memory limit."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "pdf_download_chunk_size", 1000)
+        monkeypatch.setattr(settings, "pdf_spool_max_memory", 2000)
+
+        data = os.urandom(10_000)
+        upload = FakeUpload(data)
+        spool = await PDFProcessor().spool_upload(upload)
+
+        try:
+            assert spool.sha256 == hashlib.sha256(data).hexdigest()
+            assert spool.size == len(data)
+            assert upload.reads == 11
+            with open(spool.source, "rb") as spooled:
+                assert spooled.read() == data
+        finally:
+            spool.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_upload(self, monkeypatch):
+        """Test copying stops at the size limit."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "pdf_download_chunk_size", 1000)
+        monkeypatch.setattr(settings, "upload_max_size", 2500)
+
+        upload = FakeUpload(b"x" * 10_000)
+        with pytest.raises(PDFTooLargeError):
+            await PDFProcessor().spool_upload(upload)
+
+        assert upload.reads == 3
+
+
+class TestUploadSizeLimitMiddleware:
+    """Test oversized request bodies are refused before parsing."""
+
+    def test_accepts_small_upload(self, upload_app):
+        """Test uploads within the limit reach the endpoint."""
+        response = TestClient(upload_app).post("/upload", files={"file": ("a.pdf", b"x" * 1000)})
+
+        assert response.status_code == 200
+        assert response.json() == {"size": 1000}
+
+    def test_rejects_declared_length(self, upload_app):
+        """Test a large Content-Length is refused up front."""
+        data = b"x" * (1024 + MULTIPART_OVERHEAD + 1)
+        response = TestClient(upload_app).post("/upload", files={"file": ("a.pdf", data)})
+
+        assert response.status_code == 413
+
+    @pytest.mark.asyncio
+    async def test_rejects_chunked_body(self, upload_app):
+        """Test a body without Content-Length is cut off once it crosses the limit."""
+        boundary = b"boundary"
+        chunks = [
+            b"--" + boundary + b'\r\nContent-Disposition: form-data; name="file"; filename="a.pdf"\r\n\r\n'
+        ] + [b"x" * 8192] * 20
+        received = []
+        sent = []
+
+        async def receive():
+            body = chunks[len(received)] if len(received) < len(chunks) else b""
+            received.append(body)
+            return {"type": "http.request", "body": body, "more_body": len(received) < len(chunks)}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http", "method": "POST", "path": "/upload", "raw_path": b"/upload",
+            "query_string": b"", "root_path": "", "scheme": "http", "http_version": "1.1",
+            "server": ("test", 80), "client": ("test", 1),
+            "headers": [(b"content-type", b"multipart/form-data; boundary=" + boundary)],
+        }
+        await upload_app(scope, receive, send)
+
+        assert sent[0]["status"] == 413
+        assert len(received) < len(chunks)